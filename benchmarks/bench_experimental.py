@@ -0,0 +1,48 @@
+"""Benchmarks for the experimental stability methods."""
+
+import numpy as np
+import pandas as pd
+
+from hydrostab.experimental import abrupt_changes, fft_stability, oscillation_fraction
+
+from .bench_scoring import _hydrographs
+
+
+class TimeExperimental:
+    """Classify a single hydrograph with each experimental method."""
+
+    params = [100, 1_000, 10_000]
+    param_names = ["n_times"]
+
+    def setup(self, n_times):
+        self.hydrograph = _hydrographs(n_times, 1)[:, 0]
+        self.times = pd.date_range("2020-01-01", periods=n_times, freq="15min")
+
+    def time_fft_stability(self, n_times):
+        fft_stability(self.hydrograph, sampling_rate=0.25, unstable_period=2.0)
+
+    def time_oscillation_fraction(self, n_times):
+        oscillation_fraction(self.hydrograph, self.times, 0.1)
+
+    def time_abrupt_changes(self, n_times):
+        abrupt_changes(self.hydrograph, 0.1, 5)
+
+
+class TimeExperimentalMany:
+    """Classify the hydrographs of a small mesh with each experimental method."""
+
+    def setup(self):
+        self.hydrographs = _hydrographs(577, 200).T.copy()
+        self.times = pd.date_range("2020-01-01", periods=577, freq="15min")
+
+    def time_fft_stability(self):
+        for hydrograph in self.hydrographs:
+            fft_stability(hydrograph, sampling_rate=0.25, unstable_period=2.0)
+
+    def time_oscillation_fraction(self):
+        for hydrograph in self.hydrographs:
+            oscillation_fraction(hydrograph, self.times, 0.1)
+
+    def time_abrupt_changes(self):
+        for hydrograph in self.hydrographs:
+            abrupt_changes(np.asarray(hydrograph), 0.1, 5)
@@ -0,0 +1,12 @@
+"""Benchmarks for the import time of the package."""
+
+
+class TimeImport:
+    """Import the package in a fresh interpreter.
+
+    NumPy is required by the scorer and imported in the setup, so only the
+    package's own cost is timed.
+    """
+
+    def timeraw_import_hydrostab(self):
+        return "import hydrostab", "import numpy"
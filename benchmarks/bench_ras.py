@@ -0,0 +1,69 @@
+"""Benchmarks for the HEC-RAS pipelines on a synthetic plan HDF file."""
+
+import os
+import sys
+
+from rashdf import RasPlanHdf
+
+from hydrostab.ras import (
+    mesh_cells_stability,
+    mesh_faces_stability,
+    plan_stability,
+    reflines_stability,
+    refpoints_stability,
+)
+
+# The synthetic plan HDF writer is shared with the test suite
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "tests"))
+from conftest import MESH_NAME, make_plan_hdf  # noqa: E402
+
+PLAN_FILE = "synthetic.p01.hdf"
+
+
+class RasPipelines:
+    """Score reference lines, points and a large mesh of a synthetic plan."""
+
+    timeout = 600
+
+    def setup_cache(self):
+        # 577 time steps and 40,000 cells, like a 6 day event at 15 minutes
+        make_plan_hdf(
+            PLAN_FILE, n_times=577, nx=200, ny=200, n_reflines=200, n_refpoints=200
+        )
+        return os.path.abspath(PLAN_FILE)
+
+    def setup(self, path):
+        self.plan_hdf = RasPlanHdf(path)
+
+    def teardown(self, path):
+        self.plan_hdf.close()
+
+    def time_reflines_stability(self, path):
+        reflines_stability(self.plan_hdf)
+
+    def time_refpoints_stability(self, path):
+        refpoints_stability(self.plan_hdf)
+
+    def time_mesh_cells_stability(self, path):
+        mesh_cells_stability(self.plan_hdf, MESH_NAME)
+
+    def peakmem_mesh_cells_stability(self, path):
+        mesh_cells_stability(self.plan_hdf, MESH_NAME)
+
+    def time_mesh_cells_stability_chunked(self, path):
+        mesh_cells_stability(self.plan_hdf, MESH_NAME, chunk_size=4096)
+
+    def peakmem_mesh_cells_stability_chunked(self, path):
+        mesh_cells_stability(self.plan_hdf, MESH_NAME, chunk_size=4096)
+
+    def time_mesh_faces_stability_chunked(self, path):
+        mesh_faces_stability(self.plan_hdf, MESH_NAME, chunk_size=4096)
+
+    def peakmem_mesh_faces_stability_chunked(self, path):
+        mesh_faces_stability(self.plan_hdf, MESH_NAME, chunk_size=4096)
+
+    def time_mesh_cells_stability_gdf(self, path):
+        mesh_cells_stability(self.plan_hdf, MESH_NAME, gdf=True)
+
+    def time_plan_stability(self, path):
+        plan_stability(self.plan_hdf, chunk_size=4096)
@@ -0,0 +1,83 @@
+"""Benchmarks for the slope change stability score."""
+
+import numpy as np
+
+import hydrostab
+
+
+def _hydrographs(n_times: int, n_elements: int) -> np.ndarray:
+    """Smooth flood waves with oscillations on every fourth element, as (time, elements)."""
+    rng = np.random.default_rng(0)
+    t = np.linspace(0.0, 1.0, n_times)[:, None]
+    peak = rng.uniform(0.3, 0.6, n_elements)
+    values = 100.0 + 50.0 * np.exp(-(((t - peak) / 0.1) ** 2))
+    values[:, ::4] += 5.0 * np.sin(np.arange(n_times) * np.pi / 2)[:, None]
+    return values
+
+
+class TimeStabilityScore1D:
+    """Score a single hydrograph of various lengths."""
+
+    params = [100, 1_000, 100_000]
+    param_names = ["n_times"]
+
+    def setup(self, n_times):
+        self.hydrograph = _hydrographs(n_times, 1)[:, 0]
+
+    def time_stability_score(self, n_times):
+        hydrostab.stability_score(self.hydrograph)
+
+    def time_stability(self, n_times):
+        hydrostab.stability(self.hydrograph)
+
+
+class StabilityScoreBatched:
+    """Score many hydrographs in one call, as for the cells of a 2D mesh."""
+
+    params = ([577], [1_000, 100_000], ["numpy", "numba"])
+    param_names = ["n_times", "n_elements", "engine"]
+    timeout = 300
+
+    def setup(self, n_times, n_elements, engine):
+        if engine == "numba":
+            try:
+                from hydrostab import _numba  # noqa: F401
+            except ImportError:
+                raise NotImplementedError("numba is not installed")
+            # Compile outside of the timed region
+            hydrostab.stability_score(_hydrographs(8, 2), axis=0, engine=engine)
+        self.hydrographs = _hydrographs(n_times, n_elements)
+
+    def time_stability_score(self, n_times, n_elements, engine):
+        hydrostab.stability_score(self.hydrographs, axis=0, engine=engine)
+
+    def peakmem_stability_score(self, n_times, n_elements, engine):
+        hydrostab.stability_score(self.hydrographs, axis=0, engine=engine)
+
+    def time_is_stable_early_exit(self, n_times, n_elements, engine):
+        hydrostab.is_stable_early_exit(self.hydrographs, axis=0, engine=engine)
+
+    def time_stability_prescreen(self, n_times, n_elements, engine):
+        hydrostab.stability(self.hydrographs, axis=0, engine=engine, prescreen=True)
+
+
+class TimeStabilityAccumulator:
+    """Accumulate a mesh of hydrographs one time step at a time."""
+
+    params = [1_000, 100_000]
+    param_names = ["n_elements"]
+
+    def setup(self, n_elements):
+        self.hydrographs = _hydrographs(577, n_elements)
+
+    def time_update(self, n_elements):
+        acc = hydrostab.StabilityAccumulator(shape=n_elements)
+        for values in self.hydrographs:
+            acc.update(values)
+        acc.score()
+
+    def time_extend(self, n_elements):
+        acc = hydrostab.StabilityAccumulator(shape=n_elements)
+        for block in np.array_split(self.hydrographs, 8):
+            acc.extend(block)
+        acc.score()
@@ -1,16 +1,424 @@
 """hydrostab: A Python package for hydrograph stability analysis."""
 
+import importlib
+from concurrent.futures import ThreadPoolExecutor
+
 import numpy as np
 import numpy.typing as npt
 
-from typing import Tuple
+from typing import Callable, Optional, Sequence, Tuple, Union
 
 from .utils import coerce_array
+from .streaming import StabilityAccumulator  # noqa: F401
+
+ENGINES = ("numpy", "numba", "auto")
+
+# Number of hydrographs scored per block of work, e.g. by each worker thread
+_BLOCK_ELEMENTS = 16384
+
+# Relative margin on the score bounds of the pre-screen
+_BOUND_RTOL = 1e-9
+
+# Submodules with heavy optional dependencies (pandas, xarray, rashdf, scipy,
+# numba) are only imported on first access, e.g. `hydrostab.ras`, so that
+# `import hydrostab` only needs NumPy
+_LAZY_SUBMODULES = (
+    "batch",
+    "cache",
+    "calibration",
+    "ensemble",
+    "experimental",
+    "ras",
+)
+
+
+def __getattr__(name: str):
+    """Import a submodule on first attribute access."""
+    if name in _LAZY_SUBMODULES:
+        return importlib.import_module(f".{name}", __name__)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def _resolve_engine(engine: str) -> str:
+    """Resolve a scoring engine name to "numpy" or "numba".
+
+    Parameters
+    ----------
+    engine : str
+        One of "numpy", "numba" or "auto". "auto" selects "numba" if it is
+        installed, and "numpy" otherwise.
+
+    Returns
+    -------
+    str
+        "numpy" or "numba"
+
+    Raises
+    ------
+    ValueError
+        If the engine name is not recognized
+    ImportError
+        If the "numba" engine is requested and numba is not installed
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"engine must be one of {ENGINES}, got '{engine}'")
+    if engine == "numpy":
+        return engine
+    try:
+        from . import _numba  # noqa: F401
+    except ImportError as e:
+        if engine == "auto":
+            return "numpy"
+        raise ImportError(
+            'The numba engine requires numba: pip install "hydrostab[jit]"'
+        ) from e
+    return "numba"
+
+
+def _element_blocks(n_elements: int) -> list[slice]:
+    """Split elements into contiguous blocks of at most `_BLOCK_ELEMENTS`.
+
+    Blocks do not depend on the number of worker threads, so neither do the
+    results of the NumPy reductions run on each block.
+    """
+    return [
+        slice(start, min(start + _BLOCK_ELEMENTS, n_elements))
+        for start in range(0, n_elements, _BLOCK_ELEMENTS)
+    ]
+
+
+def _run_blocks(
+    func: Callable[[slice], None],
+    blocks: Sequence[slice],
+    workers: Optional[int] = None,
+) -> None:
+    """Call `func` on each block, in a pool of `workers` threads if given.
+
+    Each call writes its own block of the output, so the output is in element
+    order whatever the order in which blocks finish. The scoring kernels spend
+    their time in NumPy routines or nogil numba code, which release the GIL.
+
+    Raises
+    ------
+    ValueError
+        If `workers` is less than 1
+    """
+    if workers is not None and workers < 1:
+        raise ValueError(f"workers must be at least 1, got {workers}")
+    if workers is None or workers == 1 or len(blocks) < 2:
+        for block in blocks:
+            func(block)
+        return
+    with ThreadPoolExecutor(max_workers=min(workers, len(blocks))) as pool:
+        # Consume the results to re-raise the first exception of any block
+        list(pool.map(func, blocks))
+
+
+def _run_numba_kernel(
+    hyd: npt.NDArray[np.float64],
+    time_first_kernel: Callable,
+    time_last_kernel: Callable,
+    args: tuple,
+    outs: Sequence[np.ndarray],
+    workers: Optional[int] = None,
+) -> None:
+    """Run a numba kernel over all hydrographs of an array, in blocks of elements.
+
+    Parameters
+    ----------
+    hyd : npt.NDArray[np.float64]
+        Validated array of hydrographs, with time along the last axis
+    time_first_kernel : Callable
+        Kernel for a range of columns of a 2D (time, element) array
+    time_last_kernel : Callable
+        Kernel for a 2D (element, time) array
+    args : tuple
+        Scalar kernel arguments, passed before the outputs
+    outs : Sequence[np.ndarray]
+        1D output arrays with one value per element
+    workers : int, optional
+        Number of worker threads, by default None
+    """
+    n = hyd.shape[-1]
+    # Pick the kernel that reads the array in memory order, e.g. HEC-RAS output
+    # is (time, element) in C order, which is time-first after moving the axis
+    time_first = np.moveaxis(hyd, -1, 0)
+    if time_first.flags.c_contiguous and hyd.ndim > 1:
+        values = time_first.reshape(n, -1)
+
+        def _run(block: slice) -> None:
+            time_first_kernel(values, *args, *outs, block.start, block.stop)
+
+    else:
+        values = np.ascontiguousarray(hyd).reshape(-1, n)
+
+        def _run(block: slice) -> None:
+            time_last_kernel(values[block], *args, *(out[block] for out in outs))
+
+    _run_blocks(_run, _element_blocks(len(outs[0])), workers)
+
+
+def _slope_change_scores_numba(
+    hyd: npt.NDArray[np.float64],
+    range_threshold: float,
+    workers: Optional[int] = None,
+) -> npt.NDArray[np.float64]:
+    """Compute slope change stability scores along the last axis with numba kernels.
+
+    Parameters
+    ----------
+    hyd : npt.NDArray[np.float64]
+        Validated array of hydrographs, with time along the last axis
+    range_threshold : float
+        Hydrographs with a range less than this threshold receive a score of 0.0
+    workers : int, optional
+        Number of worker threads, by default None
+
+    Returns
+    -------
+    npt.NDArray[np.float64]
+        Stability scores, with the shape of the input minus the last axis
+    """
+    from . import _numba
+
+    out_shape = hyd.shape[:-1]
+    out = np.empty(int(np.prod(out_shape)), dtype=np.float64)
+    _run_numba_kernel(
+        hyd,
+        _numba.slope_change_scores_time_first,
+        _numba.slope_change_scores_time_last,
+        (range_threshold,),
+        (out,),
+        workers,
+    )
+    return out.reshape(out_shape)
+
+
+def _slope_change_scores(
+    hyd: npt.NDArray[np.float64],
+    range_threshold: float,
+    engine: str = "numpy",
+    workers: Optional[int] = None,
+) -> npt.NDArray[np.float64]:
+    """Compute slope change stability scores along the last axis of an array.
+
+    With `workers`, the hydrographs are split along the longest other axis into
+    one block per worker thread.
+
+    Parameters
+    ----------
+    hyd : npt.NDArray[np.float64]
+        Validated array of hydrographs, with time along the last axis
+    range_threshold : float
+        Hydrographs with a range less than this threshold receive a score of 0.0
+    engine : str, optional
+        Scoring engine, one of "numpy", "numba" or "auto", by default "numpy"
+    workers : int, optional
+        Number of worker threads, by default None
+
+    Returns
+    -------
+    npt.NDArray[np.float64]
+        Stability scores, with the shape of the input minus the last axis
+    """
+    if _resolve_engine(engine) == "numba":
+        return _slope_change_scores_numba(hyd, range_threshold, workers)
+    return _numpy_blocks(_slope_change_scores_numpy, hyd, range_threshold, workers)
+
+
+def _numpy_blocks(
+    func: Callable[[npt.NDArray[np.float64], float], npt.NDArray[np.float64]],
+    hyd: npt.NDArray[np.float64],
+    range_threshold: float,
+    workers: Optional[int] = None,
+) -> npt.NDArray[np.float64]:
+    """Apply a NumPy scorer to blocks of hydrographs along the longest other axis.
+
+    Parameters
+    ----------
+    func : Callable[[npt.NDArray[np.float64], float], npt.NDArray[np.float64]]
+        Scorer of hydrographs with time along the last axis, e.g.
+        `_slope_change_scores_numpy`
+    hyd : npt.NDArray[np.float64]
+        Validated array of hydrographs, with time along the last axis
+    range_threshold : float
+        Hydrographs with a range less than this threshold receive a score of 0.0
+    workers : int, optional
+        Number of worker threads, by default None
+
+    Returns
+    -------
+    npt.NDArray[np.float64]
+        Scores, with the shape of the input minus the last axis
+    """
+    if hyd.ndim == 1:
+        return func(hyd, range_threshold)
+
+    axis = int(np.argmax(hyd.shape[:-1]))
+    scores = np.empty(hyd.shape[:-1], dtype=np.float64)
+
+    def _score(block: slice) -> None:
+        index = (slice(None),) * axis + (block,)
+        scores[index] = func(hyd[index], range_threshold)
+
+    _run_blocks(_score, _element_blocks(hyd.shape[axis]), workers)
+    return scores
+
+
+def _slope_change_parts_numpy(
+    hyd: npt.NDArray[np.float64],
+) -> Tuple[npt.NDArray[np.float64], npt.NDArray[np.float64]]:
+    """Compute the unnormalized parts of slope change scores along the last axis.
+
+    Normalizing a hydrograph to a 0-1 range divides every first difference by
+    the hydrograph range without changing its sign, so the sum of sign change
+    magnitudes is computed on the raw values and divided by the range once.
+
+    Parameters
+    ----------
+    hyd : npt.NDArray[np.float64]
+        Validated array of hydrographs, with time along the last axis
+
+    Returns
+    -------
+    raw_sum : npt.NDArray[np.float64]
+        Sum of the sign change magnitudes of the raw values of each hydrograph
+    h_range : npt.NDArray[np.float64]
+        Range of each hydrograph
+    """
+    h_range = np.ptp(hyd, axis=-1).astype(np.float64, copy=False)
+
+    # Compute first differences
+    diff = np.diff(hyd, axis=-1)
+
+    # Detect sign changes (positive to negative or vice versa)
+    sign = np.sign(diff)
+    sign_changes = sign[..., 1:] != sign[..., :-1]
+
+    # Compute magnitude of sign changes
+    sign_changes_magnitude = np.abs(np.diff(diff, axis=-1))
+
+    # Sum the magnitude of sign changes; float32 input is accumulated in float64
+    raw_sum = np.sum(
+        sign_changes_magnitude, axis=-1, where=sign_changes, dtype=np.float64
+    )
+    return raw_sum, h_range
+
+
+def _slope_change_scores_numpy(
+    hyd: npt.NDArray[np.float64], range_threshold: float
+) -> npt.NDArray[np.float64]:
+    """Compute slope change stability scores along the last axis with NumPy.
+
+    Parameters
+    ----------
+    hyd : npt.NDArray[np.float64]
+        Validated array of hydrographs, with time along the last axis
+    range_threshold : float
+        Hydrographs with a range less than this threshold receive a score of 0.0
+
+    Returns
+    -------
+    npt.NDArray[np.float64]
+        Stability scores, with the shape of the input minus the last axis
+    """
+    raw_sum, h_range = _slope_change_parts_numpy(hyd)
+    # Normalize by the range and divide by the number of points; flat
+    # hydrographs are given a score of 0.0
+    flat = h_range < range_threshold
+    return np.divide(
+        raw_sum, h_range * hyd.shape[-1], out=np.zeros_like(raw_sum), where=~flat
+    )
+
+
+def _slope_change_bounds_numpy(
+    hyd: npt.NDArray[np.float64], range_threshold: float
+) -> npt.NDArray[np.float64]:
+    """Compute upper bounds of slope change stability scores along the last axis.
+
+    The sum of sign change magnitudes only adds the absolute second differences
+    at sign changes, so the sum of all of them bounds it without the sign
+    tests. The bound is tight for smooth hydrographs, whose second differences
+    are small everywhere.
+
+    Parameters
+    ----------
+    hyd : npt.NDArray[np.float64]
+        Validated array of hydrographs, with time along the last axis
+    range_threshold : float
+        Hydrographs with a range less than this threshold receive a bound of 0.0
+
+    Returns
+    -------
+    npt.NDArray[np.float64]
+        Upper bounds of the stability scores, with the shape of the input minus
+        the last axis
+    """
+    n = hyd.shape[-1]
+    h_range = np.ptp(hyd, axis=-1).astype(np.float64, copy=False)
+    diff = np.diff(hyd, axis=-1)
+    total = np.sum(np.abs(np.diff(diff, axis=-1)), axis=-1, dtype=np.float64)
+    flat = h_range < range_threshold
+    return np.divide(total, h_range * n, out=np.zeros_like(total), where=~flat)
+
+
+def _prescreened_scores(
+    hydrograph: npt.NDArray[np.float64],
+    unstable_threshold: float,
+    range_threshold: float = 0.1,
+    axis: int = -1,
+    engine: str = "numpy",
+    workers: Optional[int] = None,
+) -> Union[np.float64, npt.NDArray[np.float64]]:
+    """Score only the hydrographs that a cheap upper bound cannot prove stable.
+
+    Hydrographs whose score bound is below `unstable_threshold` are stable
+    whatever their exact score, and are given a NaN score (0.0 if flat).
+    The others are gathered and scored in full with `engine`, so flags
+    derived as "not `score >= unstable_threshold`" match the full computation.
+
+    Parameters
+    ----------
+    hydrograph : npt.NDArray[np.float64]
+        Array of hydrograph data, with time along `axis`
+    unstable_threshold : float
+        Threshold above which a stability score indicates instability
+    range_threshold : float, optional
+        Hydrographs with a range less than this threshold receive a score of
+        0.0, by default 0.1
+    axis : int, optional
+        Time axis of the hydrograph array, by default -1
+    engine : str, optional
+        Scoring engine of the full scores, by default "numpy"
+    workers : int, optional
+        Number of worker threads, by default None
+
+    Returns
+    -------
+    Union[np.float64, npt.NDArray[np.float64]]
+        Stability scores, NaN for hydrographs proven stable by the bound
+    """
+    hyd = np.moveaxis(coerce_array(hydrograph, axis=axis), axis, -1)
+    _resolve_engine(engine)
+    bounds = _numpy_blocks(_slope_change_bounds_numpy, hyd, range_threshold, workers)
+    # The bound and the score are both float64 sums of the same nonnegative
+    # terms; the margin keeps summation rounding from screening out a
+    # hydrograph whose score reaches the threshold
+    candidates = bounds * (1.0 + _BOUND_RTOL) >= unstable_threshold
+    scores = np.where(bounds == 0.0, 0.0, np.nan)
+    scores[candidates] = _slope_change_scores(
+        hyd[candidates], range_threshold, engine, workers
+    )
+    return scores[()]
 
 
 def stability_score(
-    hydrograph: npt.NDArray[np.float64], range_threshold: float = 0.1
-) -> float:
+    hydrograph: npt.NDArray[np.float64],
+    range_threshold: float = 0.1,
+    axis: int = -1,
+    engine: str = "numpy",
+    workers: Optional[int] = None,
+) -> Union[float, npt.NDArray[np.float64]]:
     """Compute a stability score for a hydrograph based on slope sign changes.
 
     A higher score indicates more instability. The score is computed by:
@@ -20,54 +428,63 @@ def stability_score(
     4. Summing the magnitude of sign changes
     5. Normalizing by the length of the hydrograph
 
+    N-D input is treated as a batch of hydrographs with time along `axis`,
+    and all hydrographs are scored together in a few array passes. float32
+    input, like HEC-RAS output, is scored without a float64 copy; sums are
+    accumulated and scores returned in float64.
+
     Parameters
     ----------
     hydrograph : npt.NDArray[np.float64]
-        1D array of hydrograph data (flow or stage)
+        Array of hydrograph data (flow or stage). 1D for a single hydrograph,
+        or N-D for a batch of hydrographs with time along `axis`.
     range_threshold : float, optional
         If the range of values in the hydrograph is less than this threshold,
         return a score of 0.0, by default 0.1
+    axis : int, optional
+        Time axis of the hydrograph array, by default -1
+    engine : str, optional
+        Scoring engine: "numpy", "numba" (a fused single-pass JIT kernel;
+        requires numba) or "auto" (numba if installed, otherwise numpy),
+        by default "numpy"
+    workers : int, optional
+        Number of threads to split the hydrographs across, by default None,
+        which scores them in the calling thread. Results do not depend on
+        the number of workers.
 
     Returns
     -------
-    float
+    Union[float, npt.NDArray[np.float64]]
         Stability score between 0.0 and 1.0, where 0.0 indicates perfect stability
-        and higher values indicate more instability
+        and higher values indicate more instability. For N-D input, an array of
+        scores with the shape of the input minus `axis`.
 
     Raises
     ------
     ValueError
-        If input array has less than 2 points or contains NaN/infinite values
+        If input array has less than 2 points or contains NaN/infinite values,
+        if the engine is not recognized, or if `workers` is less than 1
+    ImportError
+        If the "numba" engine is requested and numba is not installed
     """
-    hyd = coerce_array(hydrograph)
-
-    # Check if the hydrograph is flat
-    h_range = np.ptp(hyd)
-    if h_range < range_threshold:
-        return 0.0
-
-    # Normalize to range of 0.0 to 1.0
-    h_norm = (hydrograph - np.min(hyd)) / h_range
-
-    # Compute first differences
-    diff = np.diff(h_norm)
-
-    # Detect sign changes (positive to negative or vice versa)
-    sign_changes = np.sign(diff[1:]) != np.sign(diff[:-1])
-
-    # Compute magnitude of sign changes
-    sign_changes_magnitude = np.abs(np.diff(diff))
-
-    # Sum the magnitude of sign changes and divide by the number of points
-    score = np.sum(sign_changes_magnitude[sign_changes]) / len(hyd)
-    return score
+    hyd = coerce_array(hydrograph, axis=axis)
+    scores = _slope_change_scores(
+        np.moveaxis(hyd, axis, -1), range_threshold, engine, workers
+    )
+    if scores.ndim == 0:
+        return float(scores)
+    return scores
 
 
 def is_stable(
     hydrograph: npt.NDArray[np.float64],
     unstable_threshold: float = 0.002,
     range_threshold: float = 0.1,
-) -> bool:
+    axis: int = -1,
+    engine: str = "numpy",
+    workers: Optional[int] = None,
+    prescreen: bool = False,
+) -> Union[bool, npt.NDArray[np.bool_]]:
     """Check if a time series hydrograph is stable.
 
     Parameters
@@ -79,49 +496,332 @@ def is_stable(
     range_threshold : float, optional
         If the range of values in the hydrograph is less than this threshold,
         return a score of 0.0, by default 0.1
+    axis : int, optional
+        Time axis of the hydrograph array, by default -1
+    engine : str, optional
+        Scoring engine: "numpy", "numba" (a fused single-pass JIT kernel;
+        requires numba) or "auto" (numba if installed, otherwise numpy),
+        by default "numpy"
+    workers : int, optional
+        Number of threads to split the hydrographs across, by default None,
+        which scores them in the calling thread. Results do not depend on
+        the number of workers.
+    prescreen : bool, optional
+        If True, first bound the score of every hydrograph in a cheaper pass
+        and only compute the full score of those whose bound is at least
+        `unstable_threshold`; classifications are unchanged. By default False.
 
     Returns
     -------
-    bool
-        True if the time series is stable, False otherwise
+    Union[bool, npt.NDArray[np.bool_]]
+        True if the time series is stable, False otherwise. For N-D input, an
+        array of flags with the shape of the input minus `axis`.
 
     Raises
     ------
     ValueError
-        If input array has less than 2 points or contains NaN/infinite values
+        If input array has less than 2 points or contains NaN/infinite values,
+        if the engine is not recognized, or if `workers` is less than 1
+    ImportError
+        If the "numba" engine is requested and numba is not installed
     """
-    score = stability_score(hydrograph, range_threshold)
-    return score < unstable_threshold
+    return stability(
+        hydrograph,
+        unstable_threshold,
+        range_threshold,
+        axis=axis,
+        engine=engine,
+        workers=workers,
+        prescreen=prescreen,
+    )[0]
 
 
 def stability(
     hydrograph: npt.NDArray[np.float64],
     unstable_threshold: float = 0.002,
     range_threshold: float = 0.1,
-) -> Tuple[bool, float]:
+    axis: int = -1,
+    engine: str = "numpy",
+    workers: Optional[int] = None,
+    prescreen: bool = False,
+) -> Tuple[Union[bool, npt.NDArray[np.bool_]], Union[float, npt.NDArray[np.float64]]]:
     """Classify a hydrograph as stable or unstable based on slope sign changes.
 
     Parameters
     ----------
     hydrograph : npt.NDArray[np.float64]
-        1D array of hydrograph data (flow or stage)
+        Array of hydrograph data (flow or stage). 1D for a single hydrograph,
+        or N-D for a batch of hydrographs with time along `axis`.
     unstable_threshold : float, optional
         Threshold above which a stability score indicates instability, by default 0.002
     range_threshold : float, optional
         If the range of values in the hydrograph is less than this threshold,
         return a score of 0.0, by default 0.1
+    axis : int, optional
+        Time axis of the hydrograph array, by default -1
+    engine : str, optional
+        Scoring engine: "numpy", "numba" (a fused single-pass JIT kernel;
+        requires numba) or "auto" (numba if installed, otherwise numpy),
+        by default "numpy"
+    workers : int, optional
+        Number of threads to split the hydrographs across, by default None,
+        which scores them in the calling thread. Results do not depend on
+        the number of workers.
+    prescreen : bool, optional
+        If True, first bound the score of every hydrograph in a cheaper pass
+        and only compute the full score of those whose bound is at least
+        `unstable_threshold`; classifications are unchanged. By default False.
 
     Returns
     -------
-    is_stable : bool
+    is_stable : Union[bool, npt.NDArray[np.bool_]]
         True if the hydrograph is classified as stable, False otherwise
-    score : float
-        Stability score based on slope sign changes
+    score : Union[float, npt.NDArray[np.float64]]
+        Stability score based on slope sign changes. With `prescreen`, NaN for
+        hydrographs proven stable by their bound, which are not scored.
 
     Raises
     ------
     ValueError
-        If input array has less than 2 points or contains NaN/infinite values
+        If input array has less than 2 points or contains NaN/infinite values,
+        if the engine is not recognized, or if `workers` is less than 1
+    ImportError
+        If the "numba" engine is requested and numba is not installed
+    """
+    if not prescreen:
+        score = stability_score(
+            hydrograph, range_threshold, axis=axis, engine=engine, workers=workers
+        )
+        return score < unstable_threshold, score
+    score = _prescreened_scores(
+        hydrograph, unstable_threshold, range_threshold, axis, engine, workers
+    )
+    # NaN scores were proven stable by the pre-screen
+    stable = ~(score >= unstable_threshold)
+    if np.ndim(score) == 0:
+        return bool(stable), float(score)
+    return stable, score
+
+
+def _early_exit_numpy(
+    hyd: npt.NDArray[np.float64],
+    unstable_threshold: float,
+    range_threshold: float,
+    block_size: int,
+) -> Tuple[npt.NDArray[np.bool_], npt.NDArray[np.int64]]:
+    """Classify 2D (element, time) hydrographs, scanning time in blocks.
+
+    Elements proven unstable are dropped from the scan after each block.
+
+    Parameters
+    ----------
+    hyd : npt.NDArray[np.float64]
+        Validated 2D array of hydrographs, with time along the last axis
+    unstable_threshold : float
+        Threshold above which a stability score indicates instability
+    range_threshold : float
+        Hydrographs with a range less than this threshold are stable
+    block_size : int
+        Number of time steps to scan per block
+
+    Returns
+    -------
+    stable : npt.NDArray[np.bool_]
+        Stability flag for each element
+    examined : npt.NDArray[np.int64]
+        Number of samples scanned for sign changes for each element
     """
-    score = stability_score(hydrograph, range_threshold)
-    return score < unstable_threshold, score
+    n_elements, n = hyd.shape
+    h_range = np.ptp(hyd, axis=-1).astype(np.float64, copy=False)
+    limit = unstable_threshold * h_range * n
+    stable = np.ones(n_elements, dtype=bool)
+    examined = np.zeros(n_elements, dtype=np.int64)
+
+    active = np.flatnonzero(h_range >= range_threshold)
+    examined[active] = n
+    raw_sum = np.zeros(len(active))
+    # Second differences j = 0 .. n - 3 use samples j .. j + 2
+    for start in range(0, n - 2, block_size):
+        if len(active) == 0:
+            break
+        stop = min(start + block_size, n - 2)
+        diff = np.diff(hyd[active, start : stop + 2], axis=-1)
+        sign = np.sign(diff)
+        sign_changes = sign[:, 1:] != sign[:, :-1]
+        magnitude = np.where(sign_changes, np.abs(np.diff(diff, axis=-1)), 0.0)
+        running = raw_sum[:, np.newaxis] + np.cumsum(
+            magnitude, axis=-1, dtype=np.float64
+        )
+        crossed = running >= limit[active, np.newaxis]
+        unstable = crossed.any(axis=-1)
+        if unstable.any():
+            done = active[unstable]
+            stable[done] = False
+            examined[done] = start + np.argmax(crossed[unstable], axis=-1) + 3
+        raw_sum = running[~unstable, -1]
+        active = active[~unstable]
+    return stable, examined
+
+
+def is_stable_early_exit(
+    hydrograph: npt.NDArray[np.float64],
+    unstable_threshold: float = 0.002,
+    range_threshold: float = 0.1,
+    axis: int = -1,
+    engine: str = "numpy",
+    block_size: int = 256,
+    workers: Optional[int] = None,
+) -> Tuple[Union[bool, npt.NDArray[np.bool_]], Union[int, npt.NDArray[np.int64]]]:
+    """Classify a hydrograph as stable or unstable, stopping once instability is proven.
+
+    A hydrograph is unstable once its running sum of sign change magnitudes
+    exceeds `unstable_threshold * len * range`, so the scan for sign changes
+    stops there instead of computing the complete score. The range is found
+    first, with a cheap min/max pass over all samples. Classifications match
+    `is_stable`.
+
+    Parameters
+    ----------
+    hydrograph : npt.NDArray[np.float64]
+        Array of hydrograph data (flow or stage). 1D for a single hydrograph,
+        or N-D for a batch of hydrographs with time along `axis`.
+    unstable_threshold : float, optional
+        Threshold above which a stability score indicates instability, by default 0.002
+    range_threshold : float, optional
+        If the range of values in the hydrograph is less than this threshold,
+        it is stable, by default 0.1
+    axis : int, optional
+        Time axis of the hydrograph array, by default -1
+    engine : str, optional
+        Scoring engine: "numpy", "numba" (stops per sample; requires numba) or
+        "auto" (numba if installed, otherwise numpy), by default "numpy"
+    block_size : int, optional
+        Number of time steps scanned per block by the numpy engine, by default 256
+    workers : int, optional
+        Number of threads to split the hydrographs across, by default None,
+        which scores them in the calling thread. Results do not depend on
+        the number of workers.
+
+    Returns
+    -------
+    is_stable : Union[bool, npt.NDArray[np.bool_]]
+        True if the hydrograph is classified as stable, False otherwise
+    samples_examined : Union[int, npt.NDArray[np.int64]]
+        Number of samples scanned for sign changes: the full length for stable
+        hydrographs, 0 for flat hydrographs, and the position at which the
+        instability was proven for unstable hydrographs
+
+    Raises
+    ------
+    ValueError
+        If input array has less than 2 points or contains NaN/infinite values,
+        if the engine is not recognized, or if `workers` is less than 1
+    ImportError
+        If the "numba" engine is requested and numba is not installed
+    """
+    hyd = np.moveaxis(coerce_array(hydrograph, axis=axis), axis, -1)
+    n = hyd.shape[-1]
+    out_shape = hyd.shape[:-1]
+    n_elements = int(np.prod(out_shape))
+    stable = np.empty(n_elements, dtype=np.bool_)
+    examined = np.empty(n_elements, dtype=np.int64)
+    if _resolve_engine(engine) == "numba":
+        from . import _numba
+
+        _run_numba_kernel(
+            hyd,
+            _numba.early_exit_time_first,
+            _numba.early_exit_time_last,
+            (unstable_threshold, range_threshold),
+            (stable, examined),
+            workers,
+        )
+    else:
+        hyd = hyd.reshape(-1, n)
+
+        def _classify(block: slice) -> None:
+            stable[block], examined[block] = _early_exit_numpy(
+                hyd[block], unstable_threshold, range_threshold, block_size
+            )
+
+        _run_blocks(_classify, _element_blocks(n_elements), workers)
+    if not out_shape:
+        return bool(stable[0]), int(examined[0])
+    return stable.reshape(out_shape), examined.reshape(out_shape)
+
+
+def rolling_stability_score(
+    hydrograph: npt.NDArray[np.float64],
+    window: int,
+    stride: int = 1,
+    range_threshold: float = 0.1,
+    axis: int = -1,
+) -> npt.NDArray[np.float64]:
+    """Compute slope change stability scores over a moving window of time steps.
+
+    Window `i` covers time steps `i * stride` to `i * stride + window - 1`. Each
+    sign change is attributed to the window only if the three points that
+    form it are all in the window, and window scores are normalized by the
+    range of the whole hydrograph (not of the window) and by the window length.
+    A window covering the whole hydrograph therefore gives `stability_score`.
+    All windows are computed in O(n) from a cumulative sum of the sign change
+    magnitudes.
+
+    Parameters
+    ----------
+    hydrograph : npt.NDArray[np.float64]
+        Array of hydrograph data (flow or stage). 1D for a single hydrograph,
+        or N-D for a batch of hydrographs with time along `axis`.
+    window : int
+        Number of time steps in each window
+    stride : int, optional
+        Number of time steps between the starts of consecutive windows, by default 1
+    range_threshold : float, optional
+        If the range of values in the hydrograph is less than this threshold,
+        all its window scores are 0.0, by default 0.1
+    axis : int, optional
+        Time axis of the hydrograph array, by default -1
+
+    Returns
+    -------
+    npt.NDArray[np.float64]
+        Window stability scores, with the shape of the input and windows along
+        `axis` in place of time steps
+
+    Raises
+    ------
+    ValueError
+        If input array has less than 2 points or contains NaN/infinite values,
+        or if the window or stride is invalid
+    """
+    hyd = np.moveaxis(coerce_array(hydrograph, axis=axis), axis, -1)
+    n = hyd.shape[-1]
+    if not 2 <= window <= n:
+        raise ValueError(f"window must be between 2 and the hydrograph length ({n})")
+    if stride < 1:
+        raise ValueError("stride must be at least 1")
+
+    h_range = np.ptp(hyd, axis=-1, keepdims=True).astype(np.float64, copy=False)
+    diff = np.diff(hyd, axis=-1)
+    sign = np.sign(diff)
+    sign_changes_magnitude = np.where(
+        sign[..., 1:] != sign[..., :-1], np.abs(np.diff(diff, axis=-1)), 0.0
+    )
+
+    # The sign change between points j, j + 1 and j + 2 is in window [s, s + window)
+    # if s <= j <= s + window - 3
+    cumulative = np.zeros(hyd.shape[:-1] + (n - 1,))
+    np.cumsum(
+        sign_changes_magnitude, axis=-1, dtype=np.float64, out=cumulative[..., 1:]
+    )
+    starts = np.arange(0, n - window + 1, stride)
+    raw_sums = cumulative[..., starts + window - 2] - cumulative[..., starts]
+
+    flat = h_range < range_threshold
+    scores = np.divide(
+        raw_sums,
+        h_range * window,
+        out=np.zeros_like(raw_sums),
+        where=~flat,
+    )
+    return np.moveaxis(scores, -1, axis)
@@ -0,0 +1,149 @@
+"""JIT-compiled slope change kernels (requires numba)."""
+
+import numba
+import numpy as np
+
+
+@numba.njit(cache=True, nogil=True)
+def _sign(x: float) -> int:
+    return (x > 0.0) - (x < 0.0)
+
+
+@numba.njit(cache=True, nogil=True)
+def slope_change_scores_time_last(hyd, range_threshold, out):
+    """Score each row of a 2D (element, time) array in a single pass.
+
+    The running min/max and the sum of sign change magnitudes are computed
+    together, without allocating temporaries.
+    """
+    n_elements, n = hyd.shape
+    for e in range(n_elements):
+        lo = hyd[e, 0]
+        hi = hyd[e, 0]
+        raw_sum = 0.0
+        last_diff = 0.0
+        for i in range(1, n):
+            value = hyd[e, i]
+            lo = min(lo, value)
+            hi = max(hi, value)
+            diff = value - hyd[e, i - 1]
+            if i >= 2 and _sign(diff) != _sign(last_diff):
+                raw_sum += abs(diff - last_diff)
+            last_diff = diff
+        h_range = hi - lo
+        if h_range < range_threshold:
+            out[e] = 0.0
+        else:
+            out[e] = raw_sum / (h_range * n)
+
+
+@numba.njit(cache=True, nogil=True)
+def slope_change_scores_time_first(hyd, range_threshold, out, start, stop):
+    """Score columns `start` to `stop` of a 2D (time, element) array.
+
+    Time steps are visited in the outer loop so that a C-contiguous array, like
+    HEC-RAS output, is read sequentially. Per-element state is kept in a few
+    arrays of length `stop - start`. Columns are given as a range rather than
+    as a slice of the array, so that the array keeps its contiguous layout.
+    """
+    n = hyd.shape[0]
+    lo = hyd[0, start:stop].copy()
+    hi = hyd[0, start:stop].copy()
+    raw_sum = np.zeros(stop - start)
+    last_diff = np.zeros(stop - start)
+    for i in range(1, n):
+        for k in range(stop - start):
+            value = hyd[i, start + k]
+            lo[k] = min(lo[k], value)
+            hi[k] = max(hi[k], value)
+            diff = value - hyd[i - 1, start + k]
+            if i >= 2 and _sign(diff) != _sign(last_diff[k]):
+                raw_sum[k] += abs(diff - last_diff[k])
+            last_diff[k] = diff
+    for k in range(stop - start):
+        h_range = hi[k] - lo[k]
+        if h_range < range_threshold:
+            out[start + k] = 0.0
+        else:
+            out[start + k] = raw_sum[k] / (h_range * n)
+
+
+@numba.njit(cache=True, nogil=True)
+def early_exit_time_last(hyd, unstable_threshold, range_threshold, stable, examined):
+    """Classify each row of a 2D (element, time) array, stopping once unstable.
+
+    `examined` receives the number of samples scanned for sign changes.
+    """
+    n_elements, n = hyd.shape
+    for e in range(n_elements):
+        lo = hyd[e, 0]
+        hi = hyd[e, 0]
+        for i in range(1, n):
+            lo = min(lo, hyd[e, i])
+            hi = max(hi, hyd[e, i])
+        h_range = hi - lo
+        stable[e] = True
+        examined[e] = 0
+        if h_range < range_threshold:
+            continue
+        limit = unstable_threshold * h_range * n
+        raw_sum = 0.0
+        last_diff = hyd[e, 1] - hyd[e, 0]
+        examined[e] = n
+        for i in range(2, n):
+            diff = hyd[e, i] - hyd[e, i - 1]
+            if _sign(diff) != _sign(last_diff):
+                raw_sum += abs(diff - last_diff)
+                if raw_sum >= limit:
+                    stable[e] = False
+                    examined[e] = i + 1
+                    break
+            last_diff = diff
+
+
+@numba.njit(cache=True, nogil=True)
+def early_exit_time_first(
+    hyd, unstable_threshold, range_threshold, stable, examined, start, stop
+):
+    """Classify columns `start` to `stop` of a 2D (time, element) array.
+
+    Time steps are visited in the outer loop and the scan ends as soon as every
+    element is either flat or proven unstable.
+    """
+    n = hyd.shape[0]
+    n_elements = stop - start
+    lo = hyd[0, start:stop].copy()
+    hi = hyd[0, start:stop].copy()
+    for i in range(1, n):
+        for k in range(n_elements):
+            lo[k] = min(lo[k], hyd[i, start + k])
+            hi[k] = max(hi[k], hyd[i, start + k])
+    limit = np.empty(n_elements)
+    active = np.zeros(n_elements, dtype=np.bool_)
+    n_active = 0
+    for k in range(n_elements):
+        h_range = hi[k] - lo[k]
+        stable[start + k] = True
+        examined[start + k] = 0
+        if h_range >= range_threshold:
+            limit[k] = unstable_threshold * h_range * n
+            active[k] = True
+            examined[start + k] = n
+            n_active += 1
+    raw_sum = np.zeros(n_elements)
+    last_diff = hyd[1, start:stop] - hyd[0, start:stop]
+    for i in range(2, n):
+        if n_active == 0:
+            break
+        for k in range(n_elements):
+            if not active[k]:
+                continue
+            diff = hyd[i, start + k] - hyd[i - 1, start + k]
+            if _sign(diff) != _sign(last_diff[k]):
+                raw_sum[k] += abs(diff - last_diff[k])
+                if raw_sum[k] >= limit[k]:
+                    stable[start + k] = False
+                    examined[start + k] = i + 1
+                    active[k] = False
+                    n_active -= 1
+            last_diff[k] = diff
@@ -0,0 +1,697 @@
+"""Batch stability analysis of many HEC-RAS plan HDF files."""
+
+import argparse
+import glob
+import json
+import multiprocessing
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import pandas as pd
+
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+try:
+    import geopandas as gpd
+    from rashdf import RasPlanHdf
+    import xarray as xr
+
+    from hydrostab.cache import ScoreCache
+    from hydrostab.ras import ELEMENT_TYPES, _mesh_cell_polygons, plan_stability
+except ImportError as e:
+    raise ImportError(
+        "Batch stability analysis requires the 'ras' extra:"
+        ' pip install "hydrostab[ras]"'
+    ) from e
+
+TABLE_COLUMNS = [
+    "plan",
+    "element_type",
+    "mesh_name",
+    "element_id",
+    "element_name",
+    "variable",
+    "score",
+    "is_stable",
+]
+
+
+def _expand_plan_files(plan_files: Union[str, Iterable[str]]) -> List[str]:
+    """Expand a glob pattern or list of glob patterns/paths to a list of plan files.
+
+    Parameters
+    ----------
+    plan_files : Union[str, Iterable[str]]
+        Plan HDF file path, glob pattern, or an iterable of them
+
+    Returns
+    -------
+    List[str]
+        Plan HDF file paths, in input order with globs sorted
+    """
+    if isinstance(plan_files, (str, os.PathLike)):
+        plan_files = [plan_files]
+    paths = []
+    for pattern in plan_files:
+        pattern = str(pattern)
+        if glob.has_magic(pattern):
+            paths.extend(sorted(glob.glob(pattern, recursive=True)))
+        else:
+            paths.append(pattern)
+    return paths
+
+
+def _require_parquet() -> None:
+    """Raise a clear error if Parquet output is not available.
+
+    Raises
+    ------
+    ImportError
+        If pyarrow is not installed
+    """
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError as e:
+        raise ImportError(
+            "Parquet output requires the 'parquet' extra:"
+            ' pip install "hydrostab[parquet]"'
+        ) from e
+
+
+def _element_geometry(
+    plan_hdf: RasPlanHdf, element_type: str, mesh_name: Optional[str] = None
+) -> gpd.GeoDataFrame:
+    """Read the geometry of all elements of one type from a plan HDF file.
+
+    Parameters
+    ----------
+    plan_hdf : RasPlanHdf
+        Open HEC-RAS plan HDF file
+    element_type : str
+        One of "reflines", "refpoints" and "mesh_cells"
+    mesh_name : str, optional
+        For "mesh_cells", the mesh to read cell polygons for, by default None,
+        which reads the cells of every mesh
+
+    Returns
+    -------
+    gpd.GeoDataFrame
+        Element geometry, with columns "mesh_name", "element_id" and "geometry"
+
+    Raises
+    ------
+    ValueError
+        If the element type is not recognized
+    """
+    if element_type == "reflines":
+        gdf = plan_hdf.reference_lines(include_output=False)
+        gdf = gdf.rename(columns={"refln_id": "element_id"})
+    elif element_type == "refpoints":
+        gdf = plan_hdf.reference_points(include_output=False)
+        gdf = gdf.rename(columns={"refpt_id": "element_id"})
+    elif element_type == "mesh_cells":
+        mesh_names = plan_hdf.mesh_area_names() if mesh_name is None else [mesh_name]
+        if not mesh_names:
+            return gpd.GeoDataFrame(
+                columns=["mesh_name", "element_id", "geometry"], geometry="geometry"
+            )
+        gdf = pd.concat(
+            [_mesh_cell_polygons(plan_hdf, mesh_name) for mesh_name in mesh_names],
+            ignore_index=True,
+        )
+        gdf = gdf.rename(columns={"cell_id": "element_id"})
+    else:
+        raise ValueError(f"Unknown element type: {element_type}")
+    return gdf[["mesh_name", "element_id", "geometry"]]
+
+
+def _add_geometry(
+    table: pd.DataFrame,
+    plan_hdf: RasPlanHdf,
+    element_type: str,
+    mesh_name: Optional[str] = None,
+) -> pd.DataFrame:
+    """Add a WKB "geometry" column to the stability table of one element type.
+
+    For mesh cells, only the polygons of the cells of `mesh_name` are built.
+    """
+    gdf = _element_geometry(plan_hdf, element_type, mesh_name)
+    wkb = pd.DataFrame(
+        {
+            "mesh_name": gdf["mesh_name"].values,
+            "element_id": gdf["element_id"].values,
+            "geometry": gdf.geometry.to_wkb().values,
+        }
+    )
+    table = table.merge(wkb, on=["mesh_name", "element_id"], how="left")
+    geometry = table["geometry"].astype(object)
+    table["geometry"] = geometry.where(geometry.notna(), None)
+    return table
+
+
+def _stability_table(
+    ds: xr.Dataset,
+    element_type: str,
+    id_dim: str,
+    variables: Sequence[str],
+    name_coord: Optional[str] = None,
+    mesh_name: Optional[str] = None,
+) -> pd.DataFrame:
+    """Convert a stability Dataset to a long table with one row per element and variable.
+
+    Parameters
+    ----------
+    ds : xr.Dataset
+        Dataset with stability score and flag variables from `hydrostab.ras`
+    element_type : str
+        Type of elements in the dataset, e.g. "reflines"
+    id_dim : str
+        Name of the element dimension, e.g. "refln_id"
+    variables : Sequence[str]
+        Names of the variables that were scored, e.g. ["Flow", "Water Surface"]
+    name_coord : str, optional
+        Name of the element name coordinate, e.g. "refln_name"
+    mesh_name : str, optional
+        Mesh name for all elements, if the dataset has no "mesh_name" coordinate
+
+    Returns
+    -------
+    pd.DataFrame
+        Table with the columns of `TABLE_COLUMNS`, except "plan"
+    """
+    tables = []
+    for var in variables:
+        score_var = var + " Stability Score"
+        if score_var not in ds:
+            continue
+        table = pd.DataFrame(
+            {
+                "element_type": element_type,
+                "mesh_name": (
+                    ds["mesh_name"].values if "mesh_name" in ds.coords else mesh_name
+                ),
+                "element_id": ds[id_dim].values,
+                "element_name": ds[name_coord].values if name_coord else None,
+                "variable": var,
+                "score": ds[score_var].values,
+                "is_stable": ds[var + " is Stable"].values,
+            }
+        )
+        tables.append(table)
+    if not tables:
+        return pd.DataFrame(columns=TABLE_COLUMNS[1:])
+    return pd.concat(tables, ignore_index=True)
+
+
+def plan_stability_table(
+    plan_file: Union[str, os.PathLike],
+    element_types: Sequence[str] = ELEMENT_TYPES,
+    mesh_names: Optional[Sequence[str]] = None,
+    unstable_threshold: float = 0.002,
+    range_threshold: float = 0.1,
+    chunk_size: Optional[int] = None,
+    max_memory: Optional[int] = None,
+    geometry: bool = False,
+    cache: Optional[ScoreCache] = None,
+) -> pd.DataFrame:
+    """Calculate stability metrics for one plan HDF file as a long table.
+
+    The plan is scored with `hydrostab.ras.plan_stability`. Element types
+    without output in the plan file are skipped.
+
+    Parameters
+    ----------
+    plan_file : Union[str, os.PathLike]
+        Path to a HEC-RAS plan HDF file
+    element_types : Sequence[str], optional
+        Element types to analyze, any of "reflines", "refpoints" and "mesh_cells",
+        by default all
+    mesh_names : Sequence[str], optional
+        Names of the 2D meshes to analyze, by default all meshes in the plan
+    unstable_threshold : float, optional
+        Threshold above which a stability score indicates instability, by default 0.002
+    range_threshold : float, optional
+        Threshold for range normalization in stability calculation, by default 0.1
+    chunk_size : int, optional
+        Number of mesh cells to read and score per block, by default None
+    max_memory : int, optional
+        Approximate working memory budget in bytes for scoring a block of mesh
+        cells, by default None
+    geometry : bool, optional
+        If True, add a "geometry" column with the WKB encoded geometry of each
+        element, by default False
+    cache : ScoreCache, optional
+        On-disk cache of stability scores to reuse and update, by default None
+
+    Returns
+    -------
+    pd.DataFrame
+        Table with one row per element and variable, with columns `TABLE_COLUMNS`
+        (and "geometry")
+
+    Raises
+    ------
+    ValueError
+        If an element type is not recognized
+    """
+    variables = ["Flow", "Water Surface"]
+    tables = []
+    with RasPlanHdf(plan_file) as plan_hdf:
+        result = plan_stability(
+            plan_hdf,
+            unstable_threshold,
+            range_threshold,
+            element_types=element_types,
+            mesh_names=mesh_names,
+            chunk_size=chunk_size,
+            max_memory=max_memory,
+            cache=cache,
+        )
+        for element_type, id_dim, name_coord, ds in [
+            ("reflines", "refln_id", "refln_name", result.reflines),
+            ("refpoints", "refpt_id", "refpt_name", result.refpoints),
+        ]:
+            if ds is not None:
+                table = _stability_table(
+                    ds, element_type, id_dim, variables, name_coord
+                )
+                if geometry:
+                    table = _add_geometry(table, plan_hdf, element_type)
+                tables.append(table)
+        for mesh_name, ds in result.mesh_cells.items():
+            table = _stability_table(
+                ds, "mesh_cells", "cell_id", variables, mesh_name=mesh_name
+            )
+            if geometry:
+                table = _add_geometry(table, plan_hdf, "mesh_cells", mesh_name)
+            tables.append(table)
+    columns = TABLE_COLUMNS + ["geometry"] if geometry else TABLE_COLUMNS
+    if not tables:
+        return pd.DataFrame(columns=columns)
+    table = pd.concat(tables, ignore_index=True)
+    table.insert(0, "plan", str(plan_file))
+    return table
+
+
+def _iter_plan_tables(
+    paths: Sequence[str], workers: Optional[int] = None, **kwargs
+) -> Iterator[Tuple[str, Optional[pd.DataFrame], Optional[str]]]:
+    """Analyze plan files in a pool of worker processes, yielding results as they finish.
+
+    Parameters
+    ----------
+    paths : Sequence[str]
+        Plan HDF file paths
+    workers : int, optional
+        Number of worker processes. If 1, plan files are analyzed in the current
+        process. By default None, which uses the number of CPUs.
+    **kwargs
+        Keyword arguments for `plan_stability_table`
+
+    Yields
+    ------
+    path : str
+        Plan HDF file path
+    table : Optional[pd.DataFrame]
+        Stability table of the plan file, or None if it could not be analyzed
+    error : Optional[str]
+        Error message if the plan file could not be analyzed, otherwise None
+    """
+    if workers == 1:
+        for path in paths:
+            try:
+                table = plan_stability_table(path, **kwargs)
+            except Exception as e:
+                yield path, None, f"{type(e).__name__}: {e}"
+            else:
+                yield path, table, None
+        return
+
+    # Forked workers deadlock if HDF5 was already used in the parent process
+    mp_context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=mp_context) as executor:
+        futures = {
+            executor.submit(plan_stability_table, path, **kwargs): path
+            for path in paths
+        }
+        for future in as_completed(futures):
+            path = futures.pop(future)
+            try:
+                table = future.result()
+            except Exception as e:
+                yield path, None, f"{type(e).__name__}: {e}"
+            else:
+                yield path, table, None
+
+
+def batch_stability(
+    plan_files: Union[str, Iterable[str]],
+    element_types: Sequence[str] = ELEMENT_TYPES,
+    mesh_names: Optional[Sequence[str]] = None,
+    unstable_threshold: float = 0.002,
+    range_threshold: float = 0.1,
+    chunk_size: Optional[int] = None,
+    max_memory: Optional[int] = None,
+    workers: Optional[int] = None,
+    cache: Optional[ScoreCache] = None,
+    output: Optional[Union[str, os.PathLike]] = None,
+) -> Tuple[pd.DataFrame, Dict[str, str]]:
+    """Calculate stability metrics for many plan HDF files in parallel.
+
+    Plan files are distributed across a pool of worker processes. A failure
+    while analyzing one plan file is recorded and does not abort the batch.
+
+    Parameters
+    ----------
+    plan_files : Union[str, Iterable[str]]
+        Plan HDF file path, glob pattern, or an iterable of them
+    element_types : Sequence[str], optional
+        Element types to analyze, any of "reflines", "refpoints" and "mesh_cells",
+        by default all
+    mesh_names : Sequence[str], optional
+        Names of the 2D meshes to analyze, by default all meshes in each plan
+    unstable_threshold : float, optional
+        Threshold above which a stability score indicates instability, by default 0.002
+    range_threshold : float, optional
+        Threshold for range normalization in stability calculation, by default 0.1
+    chunk_size : int, optional
+        Number of mesh cells to read and score per block, by default None
+    max_memory : int, optional
+        Approximate working memory budget in bytes for scoring a block of mesh
+        cells in each worker, by default None
+    workers : int, optional
+        Number of worker processes. If 1, plan files are analyzed in the current
+        process. By default None, which uses the number of CPUs.
+    cache : ScoreCache, optional
+        On-disk cache of stability scores, shared by the worker processes, by
+        default None
+    output : Union[str, os.PathLike], optional
+        If given, also write the consolidated table to this path, as Parquet if
+        the suffix is ".parquet" (requires pyarrow) and as CSV otherwise
+
+    Returns
+    -------
+    table : pd.DataFrame
+        Consolidated table of per-element stability metrics keyed by plan,
+        with columns `TABLE_COLUMNS`, in the order of the input plan files
+    failures : Dict[str, str]
+        Error message for each plan file that could not be analyzed
+
+    Raises
+    ------
+    ImportError
+        If Parquet output is requested and pyarrow is not installed
+    """
+    write_parquet = output is not None and Path(output).suffix == ".parquet"
+    if write_parquet:
+        _require_parquet()
+
+    paths = _expand_plan_files(plan_files)
+    kwargs = {
+        "element_types": element_types,
+        "mesh_names": mesh_names,
+        "unstable_threshold": unstable_threshold,
+        "range_threshold": range_threshold,
+        "chunk_size": chunk_size,
+        "max_memory": max_memory,
+        "cache": cache,
+    }
+
+    tables = {}
+    failures = {}
+    for path, table, error in _iter_plan_tables(paths, workers, **kwargs):
+        if error is None:
+            tables[path] = table
+        else:
+            failures[path] = error
+
+    ordered = [tables[path] for path in paths if path in tables]
+    if ordered:
+        table = pd.concat(ordered, ignore_index=True)
+    else:
+        table = pd.DataFrame(columns=TABLE_COLUMNS)
+
+    if output is not None:
+        if write_parquet:
+            table.to_parquet(output, index=False)
+        else:
+            table.to_csv(output, index=False)
+    return table, failures
+
+
+class _StabilityWriter:
+    """Append plan stability tables to a Parquet, GeoParquet or CSV file.
+
+    Parquet output is written one row group per plan file with a fixed schema,
+    so only the table of the plan being written is held in memory. With
+    geometry, the Parquet file carries GeoParquet metadata, with the CRS of the
+    first plan written, and CSV output has the geometry as WKT.
+    """
+
+    def __init__(self, output: Union[str, os.PathLike], geometry: bool = False):
+        self.output = output
+        self.geometry = geometry
+        self.parquet = Path(output).suffix == ".parquet"
+        if self.parquet:
+            _require_parquet()
+        self._writer = None
+        self.n_rows = 0
+
+    def _parquet_schema(self, plan: str):
+        import pyarrow as pa
+
+        fields = [
+            ("plan", pa.string()),
+            ("element_type", pa.string()),
+            ("mesh_name", pa.string()),
+            ("element_id", pa.int64()),
+            ("element_name", pa.string()),
+            ("variable", pa.string()),
+            ("score", pa.float64()),
+            ("is_stable", pa.bool_()),
+        ]
+        if not self.geometry:
+            return pa.schema(fields)
+        with RasPlanHdf(plan) as plan_hdf:
+            crs = plan_hdf.projection()
+        geo = {
+            "version": "1.0.0",
+            "primary_column": "geometry",
+            "columns": {
+                "geometry": {
+                    "encoding": "WKB",
+                    "geometry_types": [],
+                    "crs": None if crs is None else crs.to_json_dict(),
+                }
+            },
+        }
+        fields.append(("geometry", pa.binary()))
+        return pa.schema(fields, metadata={"geo": json.dumps(geo)})
+
+    def write(self, table: pd.DataFrame) -> None:
+        """Append the stability table of one plan file."""
+        if self.parquet:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            if self._writer is None:
+                schema = self._parquet_schema(table["plan"].iloc[0])
+                self._writer = pq.ParquetWriter(self.output, schema)
+            self._writer.write_table(
+                pa.Table.from_pandas(
+                    table, schema=self._writer.schema, preserve_index=False
+                )
+            )
+        else:
+            if self.geometry:
+                table = table.assign(
+                    geometry=gpd.GeoSeries.from_wkb(table["geometry"]).to_wkt()
+                )
+            table.to_csv(
+                self.output,
+                mode="a" if self.n_rows else "w",
+                header=not self.n_rows,
+                index=False,
+            )
+        self.n_rows += len(table)
+
+    def close(self) -> None:
+        """Finish the output file, writing an empty table if nothing was written."""
+        if self._writer is not None:
+            self._writer.close()
+        elif self.n_rows == 0:
+            columns = TABLE_COLUMNS + ["geometry"] if self.geometry else TABLE_COLUMNS
+            empty = pd.DataFrame(columns=columns)
+            if self.parquet:
+                empty.to_parquet(self.output, index=False)
+            else:
+                empty.to_csv(self.output, index=False)
+
+
+def write_batch_stability(
+    plan_files: Union[str, Iterable[str]],
+    output: Union[str, os.PathLike],
+    element_types: Sequence[str] = ELEMENT_TYPES,
+    mesh_names: Optional[Sequence[str]] = None,
+    unstable_threshold: float = 0.002,
+    range_threshold: float = 0.1,
+    chunk_size: Optional[int] = None,
+    max_memory: Optional[int] = None,
+    workers: Optional[int] = None,
+    cache: Optional[ScoreCache] = None,
+    geometry: bool = False,
+) -> Dict[str, str]:
+    """Calculate stability metrics for many plan HDF files, writing results as they finish.
+
+    Unlike `batch_stability`, the table of each plan file is appended to the
+    output as soon as its worker finishes and is then discarded, so memory use
+    does not grow with the number of plan files. Rows are written in the order
+    the plan files finish.
+
+    Parameters
+    ----------
+    plan_files : Union[str, Iterable[str]]
+        Plan HDF file path, glob pattern, or an iterable of them
+    output : Union[str, os.PathLike]
+        Output path, written as Parquet if the suffix is ".parquet" (requires
+        pyarrow) and as CSV otherwise
+    element_types : Sequence[str], optional
+        Element types to analyze, any of "reflines", "refpoints" and "mesh_cells",
+        by default all
+    mesh_names : Sequence[str], optional
+        Names of the 2D meshes to analyze, by default all meshes in each plan
+    unstable_threshold : float, optional
+        Threshold above which a stability score indicates instability, by default 0.002
+    range_threshold : float, optional
+        Threshold for range normalization in stability calculation, by default 0.1
+    chunk_size : int, optional
+        Number of mesh cells to read and score per block, by default None
+    max_memory : int, optional
+        Approximate working memory budget in bytes for scoring a block of mesh
+        cells in each worker, by default None
+    workers : int, optional
+        Number of worker processes. If 1, plan files are analyzed in the current
+        process. By default None, which uses the number of CPUs.
+    cache : ScoreCache, optional
+        On-disk cache of stability scores, shared by the worker processes, by
+        default None
+    geometry : bool, optional
+        If True, add the geometry of each element. Parquet output is then written
+        as GeoParquet and CSV output has the geometry as WKT. By default False.
+
+    Returns
+    -------
+    Dict[str, str]
+        Error message for each plan file that could not be analyzed
+
+    Raises
+    ------
+    ImportError
+        If Parquet output is requested and pyarrow is not installed
+    """
+    writer = _StabilityWriter(output, geometry=geometry)
+    paths = _expand_plan_files(plan_files)
+    kwargs = {
+        "element_types": element_types,
+        "mesh_names": mesh_names,
+        "unstable_threshold": unstable_threshold,
+        "range_threshold": range_threshold,
+        "chunk_size": chunk_size,
+        "max_memory": max_memory,
+        "geometry": geometry,
+        "cache": cache,
+    }
+    failures = {}
+    try:
+        for path, table, error in _iter_plan_tables(paths, workers, **kwargs):
+            if error is not None:
+                failures[path] = error
+            elif len(table):
+                writer.write(table)
+    finally:
+        writer.close()
+    return failures
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """Run a batch stability analysis from the command line.
+
+    Results are written to the output file incrementally, as each plan file
+    finishes.
+
+    Parameters
+    ----------
+    argv : Sequence[str], optional
+        Command line arguments, by default `sys.argv[1:]`
+
+    Returns
+    -------
+    int
+        Exit code; 1 if any plan file failed, otherwise 0
+    """
+    parser = argparse.ArgumentParser(
+        prog="hydrostab",
+        description="Score the stability of many HEC-RAS plan HDF files in parallel.",
+    )
+    parser.add_argument("plan_files", nargs="+", help="Plan HDF files or glob patterns")
+    parser.add_argument(
+        "-o", "--output", required=True, help="Output CSV or (Geo)Parquet file"
+    )
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--mesh", action="append", dest="mesh_names")
+    parser.add_argument(
+        "--element-types", nargs="+", choices=ELEMENT_TYPES, default=ELEMENT_TYPES
+    )
+    parser.add_argument("--unstable-threshold", type=float, default=0.002)
+    parser.add_argument("--range-threshold", type=float, default=0.1)
+    parser.add_argument("--chunk-size", type=int, default=None)
+    parser.add_argument(
+        "--max-memory",
+        type=int,
+        default=None,
+        help="Working memory budget in bytes for scoring a block of mesh cells",
+    )
+    parser.add_argument(
+        "--cache",
+        default=None,
+        help="SQLite file caching stability scores across runs",
+    )
+    parser.add_argument(
+        "--cache-max-bytes",
+        type=int,
+        default=1024**3,
+        help="Size limit of the score cache in bytes",
+    )
+    parser.add_argument(
+        "--geometry",
+        action="store_true",
+        help="Include element geometry; Parquet output is written as GeoParquet",
+    )
+    args = parser.parse_args(argv)
+
+    failures = write_batch_stability(
+        args.plan_files,
+        args.output,
+        element_types=args.element_types,
+        mesh_names=args.mesh_names,
+        unstable_threshold=args.unstable_threshold,
+        range_threshold=args.range_threshold,
+        chunk_size=args.chunk_size,
+        max_memory=args.max_memory,
+        workers=args.workers,
+        geometry=args.geometry,
+        cache=(
+            None
+            if args.cache is None
+            else ScoreCache(args.cache, max_bytes=args.cache_max_bytes)
+        ),
+    )
+    for path, error in failures.items():
+        print(f"Failed to analyze {path}: {error}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
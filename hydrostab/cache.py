@@ -0,0 +1,250 @@
+"""Persistent on-disk cache of per-element stability scores."""
+
+import os
+import sqlite3
+import time
+
+import numpy as np
+import numpy.typing as npt
+
+from typing import Optional, Union
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS scores (
+    plan_file TEXT NOT NULL,
+    file_size INTEGER NOT NULL,
+    file_mtime_ns INTEGER NOT NULL,
+    element_type TEXT NOT NULL,
+    mesh_name TEXT NOT NULL,
+    variable TEXT NOT NULL,
+    range_threshold REAL NOT NULL,
+    scores BLOB NOT NULL,
+    n_bytes INTEGER NOT NULL,
+    last_access INTEGER NOT NULL,
+    PRIMARY KEY (plan_file, element_type, mesh_name, variable, range_threshold)
+)
+"""
+
+
+class ScoreCache:
+    """On-disk cache of raw per-element stability scores, stored in SQLite.
+
+    Scores are keyed by plan file, element type, mesh name, variable and
+    `range_threshold`. Stability flags are derived from scores, so changing
+    `unstable_threshold` does not require rescoring. The size and modification
+    time of each plan file are stored with its scores, and scores of a plan file
+    that has since changed are discarded on lookup. Once the cache exceeds
+    `max_bytes`, the least recently used scores are evicted.
+
+    A cache can be shared by several processes, and is pickled by path, so it
+    can be passed to worker processes.
+
+    Parameters
+    ----------
+    path : Union[str, os.PathLike]
+        Path to the SQLite cache file, created if it does not exist
+    max_bytes : int, optional
+        Maximum total size of cached scores in bytes, by default 1 GiB.
+        None for no limit.
+
+    Examples
+    --------
+    >>> cache = ScoreCache("scores.sqlite")
+    >>> ds = mesh_cells_stability(plan_hdf, "ElkMiddle", cache=cache)
+    >>> # Instant, the scores are read from the cache
+    >>> ds = mesh_cells_stability(plan_hdf, "ElkMiddle", 0.003, cache=cache)
+    """
+
+    def __init__(
+        self, path: Union[str, os.PathLike], max_bytes: Optional[int] = 1024**3
+    ):
+        self.path = os.fspath(path)
+        self.max_bytes = max_bytes
+        self._connection = None
+
+    def __getstate__(self) -> dict:
+        """Pickle the cache by path, without the open connection."""
+        return {"path": self.path, "max_bytes": self.max_bytes}
+
+    def __setstate__(self, state: dict) -> None:
+        """Restore a pickled cache; the connection is reopened on first use."""
+        self.__init__(**state)
+
+    def __enter__(self) -> "ScoreCache":
+        """Return the cache."""
+        return self
+
+    def __exit__(self, *exc) -> None:
+        """Close the cache connection."""
+        self.close()
+
+    @property
+    def _db(self) -> sqlite3.Connection:
+        """Open the connection and create the schema on first use."""
+        if self._connection is None:
+            directory = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(directory, exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=60.0)
+            # Let readers proceed while another process writes
+            connection.execute("PRAGMA journal_mode=WAL")
+            with connection:
+                connection.execute(_SCHEMA)
+            self._connection = connection
+        return self._connection
+
+    def close(self) -> None:
+        """Close the connection to the cache file."""
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    @staticmethod
+    def _plan_key(plan_file: Union[str, os.PathLike]) -> tuple[str, int, int]:
+        """Return the resolved path, size and modification time of a plan file."""
+        path = os.path.realpath(plan_file)
+        stat = os.stat(path)
+        return path, stat.st_size, stat.st_mtime_ns
+
+    def get(
+        self,
+        plan_file: Union[str, os.PathLike],
+        element_type: str,
+        variable: str,
+        range_threshold: float,
+        mesh_name: Optional[str] = None,
+    ) -> Optional[npt.NDArray[np.float64]]:
+        """Return cached scores, or None if they are not cached or are stale.
+
+        Parameters
+        ----------
+        plan_file : Union[str, os.PathLike]
+            Path to the HEC-RAS plan HDF file
+        element_type : str
+            Type of elements, e.g. "reflines" or "mesh_cells"
+        variable : str
+            Name of the scored variable, e.g. "Water Surface"
+        range_threshold : float
+            Range threshold the scores were computed with
+        mesh_name : str, optional
+            Name of the mesh, for mesh elements
+
+        Returns
+        -------
+        Optional[npt.NDArray[np.float64]]
+            Stability score for each element
+        """
+        path, size, mtime_ns = self._plan_key(plan_file)
+        key = (path, element_type, mesh_name or "", variable, float(range_threshold))
+        where = (
+            "plan_file = ? AND element_type = ? AND mesh_name = ? AND variable = ?"
+            " AND range_threshold = ?"
+        )
+        with self._db as db:
+            row = db.execute(
+                f"SELECT file_size, file_mtime_ns, scores FROM scores WHERE {where}",
+                key,
+            ).fetchone()
+            if row is None:
+                return None
+            if (row[0], row[1]) != (size, mtime_ns):
+                db.execute("DELETE FROM scores WHERE plan_file = ?", (path,))
+                return None
+            db.execute(
+                f"UPDATE scores SET last_access = ? WHERE {where}",
+                (time.time_ns(), *key),
+            )
+        return np.frombuffer(row[2], dtype=np.float64).copy()
+
+    def put(
+        self,
+        plan_file: Union[str, os.PathLike],
+        element_type: str,
+        variable: str,
+        range_threshold: float,
+        scores: npt.ArrayLike,
+        mesh_name: Optional[str] = None,
+    ) -> None:
+        """Store scores, evicting the least recently used scores if over the size limit.
+
+        Parameters
+        ----------
+        plan_file : Union[str, os.PathLike]
+            Path to the HEC-RAS plan HDF file
+        element_type : str
+            Type of elements, e.g. "reflines" or "mesh_cells"
+        variable : str
+            Name of the scored variable, e.g. "Water Surface"
+        range_threshold : float
+            Range threshold the scores were computed with
+        scores : npt.ArrayLike
+            1D array with the stability score of each element
+        mesh_name : str, optional
+            Name of the mesh, for mesh elements
+        """
+        path, size, mtime_ns = self._plan_key(plan_file)
+        blob = np.ascontiguousarray(scores, dtype=np.float64).ravel().tobytes()
+        with self._db as db:
+            db.execute(
+                "INSERT OR REPLACE INTO scores VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    path,
+                    size,
+                    mtime_ns,
+                    element_type,
+                    mesh_name or "",
+                    variable,
+                    float(range_threshold),
+                    blob,
+                    len(blob),
+                    time.time_ns(),
+                ),
+            )
+            if self.max_bytes is not None:
+                # Keep the most recently used scores that fit in max_bytes
+                db.execute(
+                    """
+                    DELETE FROM scores WHERE rowid IN (
+                        SELECT rowid FROM (
+                            SELECT rowid, SUM(n_bytes) OVER (
+                                ORDER BY last_access DESC, rowid DESC
+                            ) AS total
+                            FROM scores
+                        )
+                        WHERE total > ?
+                    )
+                    """,
+                    (self.max_bytes,),
+                )
+
+    def invalidate(self, plan_file: Optional[Union[str, os.PathLike]] = None) -> int:
+        """Remove the cached scores of one plan file, or of all plan files.
+
+        Parameters
+        ----------
+        plan_file : Union[str, os.PathLike], optional
+            Path to the HEC-RAS plan HDF file, by default None, which clears the
+            whole cache
+
+        Returns
+        -------
+        int
+            Number of removed entries
+        """
+        with self._db as db:
+            if plan_file is None:
+                cursor = db.execute("DELETE FROM scores")
+            else:
+                path = os.path.realpath(plan_file)
+                cursor = db.execute("DELETE FROM scores WHERE plan_file = ?", (path,))
+        return cursor.rowcount
+
+    @property
+    def size(self) -> int:
+        """Total size of the cached scores in bytes."""
+        return self._db.execute(
+            "SELECT COALESCE(SUM(n_bytes), 0) FROM scores"
+        ).fetchone()[0]
+
+    def __len__(self) -> int:
+        """Return the number of cached entries."""
+        return self._db.execute("SELECT COUNT(*) FROM scores").fetchone()[0]
@@ -0,0 +1,318 @@
+"""Threshold calibration of stability methods against a labeled hydrograph corpus."""
+
+import time
+import warnings
+from pathlib import Path
+
+import numpy as np
+import numpy.typing as npt
+import pandas as pd
+
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+from hydrostab import _slope_change_parts_numpy
+from hydrostab.experimental import (
+    _coerce_dt_array,
+    _find_first_peak,
+    _time_interval_minutes,
+    fft_stability,
+    oscillation_fraction,
+)
+from hydrostab.utils import coerce_array
+
+METHODS = ("slope_change", "fft", "oscillation_fraction", "abrupt_changes")
+
+CORPUS_LABELS = {"stable": False, "unstable": True}
+
+
+def _parse_times(times: pd.Series) -> npt.NDArray[np.datetime64]:
+    """Parse the datetime column of a corpus CSV file as naive UTC times.
+
+    Corpus files use several date formats, e.g. "1/1/00 0:00", so times whose
+    format cannot be inferred are parsed one by one, on any pandas version.
+    """
+    with warnings.catch_warnings():
+        warnings.filterwarnings("ignore", "Could not infer format", UserWarning)
+        times = pd.to_datetime(times, utc=True)
+    return times.dt.tz_localize(None).to_numpy()
+
+
+def load_corpus(
+    root: Union[str, Path], value_column: str = "flow", time_column: str = "time"
+) -> pd.DataFrame:
+    """Load a labeled hydrograph corpus of CSV files.
+
+    CSV files are found recursively under the "stable" and "unstable"
+    subdirectories of `root`, e.g. `tests/data/hydrographs`.
+
+    Parameters
+    ----------
+    root : Union[str, Path]
+        Corpus directory
+    value_column : str, optional
+        Name of the hydrograph value column, by default "flow"
+    time_column : str, optional
+        Name of the datetime column, by default "time"
+
+    Returns
+    -------
+    pd.DataFrame
+        One row per hydrograph with columns "name", "unstable" (the label),
+        "values" and "times"
+
+    Raises
+    ------
+    ValueError
+        If no labeled CSV files are found
+    """
+    rows = []
+    for label, unstable in CORPUS_LABELS.items():
+        for csv in sorted((Path(root) / label).rglob("*.csv")):
+            hydrograph = pd.read_csv(csv)
+            rows.append(
+                {
+                    "name": str(csv.relative_to(root)),
+                    "unstable": unstable,
+                    "values": hydrograph[value_column].to_numpy(dtype=np.float64),
+                    "times": _parse_times(hydrograph[time_column]),
+                }
+            )
+    if not rows:
+        raise ValueError(f"No labeled hydrographs found under {root}")
+    return pd.DataFrame(rows)
+
+
+def _batch_groups(
+    hydrographs: Sequence[np.ndarray], keys: Optional[Sequence] = None
+) -> List[np.ndarray]:
+    """Return the indices of each group of equal-length hydrographs.
+
+    Each group can be stacked and scored in one batched call. With `keys`,
+    hydrographs are also grouped by their key.
+    """
+    groups: Dict[tuple, List[int]] = {}
+    for i, values in enumerate(hydrographs):
+        key = (len(values),) if keys is None else (len(values), keys[i])
+        groups.setdefault(key, []).append(i)
+    return [np.array(ids) for ids in groups.values()]
+
+
+def _abrupt_change_score(values: npt.NDArray[np.float64]) -> float:
+    """Return the largest change after the first peak as a fraction of the range.
+
+    `abrupt_changes` classifies a hydrograph as unstable exactly when this
+    score is at least `percent_change`.
+    """
+    # The change at index i of the first differences is that of point i + 1
+    changes = np.abs(np.diff(values))[_find_first_peak(values) - 1 :]
+    if changes.size == 0:
+        # No change after the first peak can make the hydrograph unstable
+        return -np.inf
+    return np.max(changes) / np.ptp(values)
+
+
+def score_corpus(
+    corpus: pd.DataFrame,
+    methods: Sequence[str] = METHODS,
+    range_thresholds: Sequence[float] = (0.1,),
+    fft_kwargs: Optional[dict] = None,
+    rate_of_change_threshold: float = 0.1,
+) -> Tuple[pd.DataFrame, Dict[str, float]]:
+    """Score every hydrograph of a labeled corpus once with each method.
+
+    Each method gives a continuous score, such that a hydrograph is classified
+    as unstable when its score is at least a threshold:
+
+    - "slope_change": `stability_score`, for each of `range_thresholds`
+      (computed from one batched pass over hydrographs of equal length)
+    - "fft": the high-frequency power proportion of `fft_stability`, batched
+      over hydrographs of equal length
+    - "oscillation_fraction": the oscillation fraction of `oscillation_fraction`,
+      batched over hydrographs of equal length and time interval
+    - "abrupt_changes": the largest change after the first peak as a fraction
+      of the range; `abrupt_changes` is unstable when it is at least
+      `percent_change`
+
+    Parameters
+    ----------
+    corpus : pd.DataFrame
+        Labeled hydrographs, as returned by `load_corpus`
+    methods : Sequence[str], optional
+        Methods to score, by default all of `METHODS`
+    range_thresholds : Sequence[float], optional
+        Range thresholds of the slope change method, by default (0.1,)
+    fft_kwargs : dict, optional
+        Keyword arguments for `fft_stability`, e.g. `sampling_rate`, by default None
+    rate_of_change_threshold : float, optional
+        Rate of change threshold of `oscillation_fraction`, by default 0.1
+
+    Returns
+    -------
+    scores : pd.DataFrame
+        Long table with columns "name", "unstable", "method", "range_threshold"
+        (NaN for methods without one) and "score"
+    timings : Dict[str, float]
+        Wall time in seconds spent scoring the corpus with each method
+
+    Raises
+    ------
+    ValueError
+        If a method is not recognized
+    """
+    unknown = set(methods) - set(METHODS)
+    if unknown:
+        raise ValueError(f"Unknown methods: {sorted(unknown)}")
+    fft_kwargs = {} if fft_kwargs is None else fft_kwargs
+    hydrographs = [coerce_array(values) for values in corpus["values"]]
+
+    tables = []
+    timings = {}
+
+    def _add(method: str, scores: npt.ArrayLike, range_threshold: float = np.nan):
+        tables.append(
+            pd.DataFrame(
+                {
+                    "name": corpus["name"].values,
+                    "unstable": corpus["unstable"].values,
+                    "method": method,
+                    "range_threshold": range_threshold,
+                    "score": scores,
+                }
+            )
+        )
+
+    for method in methods:
+        start = time.perf_counter()
+        if method == "slope_change":
+            n = np.array([len(values) for values in hydrographs])
+            raw_sum, h_range = np.empty((2, len(hydrographs)))
+            for ids in _batch_groups(hydrographs):
+                raw_sum[ids], h_range[ids] = _slope_change_parts_numpy(
+                    np.stack([hydrographs[i] for i in ids])
+                )
+            # Each range threshold only changes which hydrographs are flat
+            rts = np.asarray(range_thresholds, dtype=np.float64)[:, np.newaxis]
+            flat = h_range < rts
+            all_scores = np.divide(
+                raw_sum,
+                h_range * n,
+                out=np.zeros(flat.shape),
+                where=~flat,
+            )
+        elif method == "fft":
+            all_scores = np.empty(len(hydrographs))
+            for ids in _batch_groups(hydrographs):
+                all_scores[ids] = fft_stability(
+                    np.stack([hydrographs[i] for i in ids]),
+                    return_spectrum=False,
+                    **fft_kwargs,
+                )[1]
+        elif method == "oscillation_fraction":
+            # The times of a hydrograph only set its time interval, so
+            # hydrographs of equal length and interval share one batched call
+            times = list(corpus["times"])
+            intervals = [_time_interval_minutes(_coerce_dt_array(t)) for t in times]
+            all_scores = np.empty(len(hydrographs))
+            for ids in _batch_groups(hydrographs, intervals):
+                all_scores[ids] = oscillation_fraction(
+                    np.stack([hydrographs[i] for i in ids]),
+                    times[ids[0]],
+                    rate_of_change_threshold,
+                )[0]
+        else:
+            all_scores = [_abrupt_change_score(values) for values in hydrographs]
+        timings[method] = time.perf_counter() - start
+
+        if method == "slope_change":
+            for rt, scores in zip(range_thresholds, all_scores):
+                _add(method, scores, rt)
+        else:
+            _add(method, all_scores)
+    return pd.concat(tables, ignore_index=True), timings
+
+
+def threshold_sweep(
+    scores: pd.DataFrame,
+    thresholds: Optional[Union[npt.ArrayLike, Dict[str, npt.ArrayLike]]] = None,
+) -> pd.DataFrame:
+    """Evaluate many classification thresholds from precomputed corpus scores.
+
+    Parameters
+    ----------
+    scores : pd.DataFrame
+        Corpus scores, as returned by `score_corpus`
+    thresholds : Union[npt.ArrayLike, Dict[str, npt.ArrayLike]], optional
+        Thresholds to evaluate for every method, or a dict of thresholds for
+        each method. By default None, which evaluates every distinct score of
+        each method (and infinity), giving the exact ROC curve.
+
+    Returns
+    -------
+    pd.DataFrame
+        One row per method, range threshold and threshold, with the confusion
+        matrix ("tp", "fp", "tn", "fn", where positive means unstable), the
+        true positive rate "tpr", false positive rate "fpr" and "accuracy"
+    """
+    rows = []
+    groups = scores.groupby(["method", "range_threshold"], sort=False, dropna=False)
+    for (method, range_threshold), group in groups:
+        values = group["score"].to_numpy(dtype=np.float64)
+        unstable = group["unstable"].to_numpy(dtype=bool)
+        if thresholds is None:
+            method_thresholds = np.append(np.unique(values), np.inf)
+        elif isinstance(thresholds, dict):
+            method_thresholds = np.asarray(thresholds[method], dtype=np.float64)
+        else:
+            method_thresholds = np.asarray(thresholds, dtype=np.float64)
+
+        predicted = values[np.newaxis, :] >= method_thresholds[:, np.newaxis]
+        tp = np.sum(predicted & unstable, axis=1)
+        fp = np.sum(predicted & ~unstable, axis=1)
+        n_unstable = np.sum(unstable)
+        n_stable = len(unstable) - n_unstable
+        rows.append(
+            pd.DataFrame(
+                {
+                    "method": method,
+                    "range_threshold": range_threshold,
+                    "threshold": method_thresholds,
+                    "tp": tp,
+                    "fp": fp,
+                    "tn": n_stable - fp,
+                    "fn": n_unstable - tp,
+                    "tpr": tp / max(n_unstable, 1),
+                    "fpr": fp / max(n_stable, 1),
+                    "accuracy": (tp + n_stable - fp) / len(unstable),
+                }
+            )
+        )
+    return pd.concat(rows, ignore_index=True)
+
+
+def roc_auc(sweep: pd.DataFrame) -> pd.Series:
+    """Compute the area under the ROC curve of each method from a threshold sweep.
+
+    Parameters
+    ----------
+    sweep : pd.DataFrame
+        Threshold sweep, as returned by `threshold_sweep`
+
+    Returns
+    -------
+    pd.Series
+        Area under the ROC curve, indexed by method and range threshold
+    """
+    areas: List[float] = []
+    index = []
+    groups = sweep.groupby(["method", "range_threshold"], sort=False, dropna=False)
+    for key, group in groups:
+        curve = group.sort_values(["fpr", "tpr"])
+        fpr = np.concatenate([[0.0], curve["fpr"].to_numpy(), [1.0]])
+        tpr = np.concatenate([[0.0], curve["tpr"].to_numpy(), [1.0]])
+        areas.append(float(np.sum(np.diff(fpr) * (tpr[1:] + tpr[:-1]) / 2)))
+        index.append(key)
+    return pd.Series(
+        areas,
+        index=pd.MultiIndex.from_tuples(index, names=["method", "range_threshold"]),
+        name="roc_auc",
+    )
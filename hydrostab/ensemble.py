@@ -0,0 +1,293 @@
+"""Ensemble stability statistics across many HEC-RAS plan HDF files (events)."""
+
+import os
+
+import numpy as np
+import numpy.typing as npt
+import pandas as pd
+
+from typing import Dict, Iterable, Optional, Sequence, Union
+
+try:
+    import geopandas as gpd
+    from rashdf import RasPlanHdf
+except ImportError as e:
+    raise ImportError(
+        "Ensemble stability analysis requires the 'ras' extra:"
+        ' pip install "hydrostab[ras]"'
+    ) from e
+
+from hydrostab.batch import (
+    ELEMENT_TYPES,
+    _element_geometry,
+    _expand_plan_files,
+    _iter_plan_tables,
+    plan_stability_table,
+)
+from hydrostab.ras import _reformat_var_name
+
+# Default histogram bin edges for approximate score quantiles. Scores range from
+# 0.0 up to at most 2.0 and unstable_threshold is typically around 1e-3, so bins
+# are log-spaced to resolve small scores.
+DEFAULT_BIN_EDGES = np.concatenate([[0.0], np.geomspace(1e-6, 2.0, 96)])
+
+ELEMENT_COLUMNS = [
+    "element_type",
+    "mesh_name",
+    "element_id",
+    "element_name",
+    "variable",
+]
+
+
+class EnsembleStability:
+    """Running per-element stability statistics across an ensemble of events.
+
+    Plan files are added one at a time (or streamed from a process pool) and
+    only running aggregates are kept for each element and variable: the number
+    of events, the number of unstable events, the min/max/mean score and a
+    fixed-bin score histogram for approximate quantiles. Memory use therefore
+    stays constant as the number of events grows. All plan files must come
+    from the same model, i.e. have the same elements.
+
+    Parameters
+    ----------
+    element_types : Sequence[str], optional
+        Element types to analyze, any of "reflines", "refpoints" and "mesh_cells",
+        by default all
+    mesh_names : Sequence[str], optional
+        Names of the 2D meshes to analyze, by default all meshes in the plans
+    unstable_threshold : float, optional
+        Threshold above which a stability score indicates instability, by default 0.002
+    range_threshold : float, optional
+        Threshold for range normalization in stability calculation, by default 0.1
+    chunk_size : int, optional
+        Number of mesh cells to read and score per block, by default None
+    max_memory : int, optional
+        Approximate working memory budget in bytes for scoring a block of mesh
+        cells, by default None
+    bin_edges : npt.ArrayLike, optional
+        Increasing score histogram bin edges used for approximate quantiles,
+        by default `DEFAULT_BIN_EDGES`. Scores beyond the last edge are counted
+        in the last bin.
+
+    Examples
+    --------
+    >>> ensemble = EnsembleStability(element_types=["reflines", "mesh_cells"])
+    >>> ensemble.add_plans("events/*.p01.hdf", workers=8)
+    >>> stats = ensemble.statistics(quantiles=(0.5, 0.9))
+    >>> gdf = ensemble.to_geodataframe("mesh_cells")
+    """
+
+    def __init__(
+        self,
+        element_types: Sequence[str] = ELEMENT_TYPES,
+        mesh_names: Optional[Sequence[str]] = None,
+        unstable_threshold: float = 0.002,
+        range_threshold: float = 0.1,
+        chunk_size: Optional[int] = None,
+        max_memory: Optional[int] = None,
+        bin_edges: Optional[npt.ArrayLike] = None,
+    ):
+        self.unstable_threshold = unstable_threshold
+        self._table_kwargs = {
+            "element_types": element_types,
+            "mesh_names": mesh_names,
+            "unstable_threshold": unstable_threshold,
+            "range_threshold": range_threshold,
+            "chunk_size": chunk_size,
+            "max_memory": max_memory,
+        }
+        edges = DEFAULT_BIN_EDGES if bin_edges is None else bin_edges
+        self.bin_edges = np.asarray(edges, dtype=np.float64)
+        if self.bin_edges.ndim != 1 or np.any(np.diff(self.bin_edges) <= 0):
+            raise ValueError("bin_edges must be a 1D array of increasing values")
+
+        self.plans = []
+        self.failures = {}
+        self._elements = None
+        self._geometry = {}
+        self._n_events = None
+        self._n_unstable = None
+        self._min = None
+        self._max = None
+        self._sum = None
+        self._hist = None
+
+    def _update(self, plan: str, table: pd.DataFrame) -> None:
+        """Add the stability table of one plan to the running aggregates."""
+        elements = table[ELEMENT_COLUMNS].reset_index(drop=True)
+        if self._elements is None:
+            n = len(elements)
+            self._elements = elements
+            self._n_events = np.zeros(n, dtype=np.int64)
+            self._n_unstable = np.zeros(n, dtype=np.int64)
+            self._min = np.full(n, np.inf)
+            self._max = np.full(n, -np.inf)
+            self._sum = np.zeros(n)
+            self._hist = np.zeros((n, len(self.bin_edges) - 1), dtype=np.uint32)
+        elif not (
+            len(elements) == len(self._elements)
+            and (
+                elements["element_id"].values == self._elements["element_id"].values
+            ).all()
+            and (elements["variable"].values == self._elements["variable"].values).all()
+        ):
+            raise ValueError(
+                f"Elements of plan '{plan}' do not match the first plan of the ensemble"
+            )
+
+        scores = table["score"].to_numpy(dtype=np.float64)
+        self._n_events += 1
+        self._n_unstable += ~table["is_stable"].to_numpy(dtype=bool)
+        np.minimum(self._min, scores, out=self._min)
+        np.maximum(self._max, scores, out=self._max)
+        self._sum += scores
+        bins = np.searchsorted(self.bin_edges, scores, side="right") - 1
+        bins = np.clip(bins, 0, self._hist.shape[1] - 1)
+        self._hist[np.arange(len(scores)), bins] += 1
+        self.plans.append(plan)
+
+    def add_plan(self, plan_file: Union[str, os.PathLike]) -> None:
+        """Score one plan file in the current process and add it to the ensemble.
+
+        Parameters
+        ----------
+        plan_file : Union[str, os.PathLike]
+            Path to a HEC-RAS plan HDF file
+
+        Raises
+        ------
+        ValueError
+            If the plan's elements do not match the first plan of the ensemble
+        """
+        table = plan_stability_table(plan_file, **self._table_kwargs)
+        self._update(str(plan_file), table)
+
+    def add_plans(
+        self, plan_files: Union[str, Iterable[str]], workers: Optional[int] = None
+    ) -> Dict[str, str]:
+        """Score many plan files in a process pool and add them to the ensemble.
+
+        Results are aggregated as each plan file finishes, so only the running
+        statistics are kept in memory. A failure while analyzing one plan file
+        is recorded and does not abort the ensemble.
+
+        Parameters
+        ----------
+        plan_files : Union[str, Iterable[str]]
+            Plan HDF file path, glob pattern, or an iterable of them
+        workers : int, optional
+            Number of worker processes. If 1, plan files are analyzed in the current
+            process. By default None, which uses the number of CPUs.
+
+        Returns
+        -------
+        Dict[str, str]
+            Error message for each plan file that could not be added
+        """
+        paths = _expand_plan_files(plan_files)
+        failures = {}
+        for path, table, error in _iter_plan_tables(
+            paths, workers, **self._table_kwargs
+        ):
+            if error is None:
+                try:
+                    self._update(path, table)
+                except ValueError as e:
+                    error = f"{type(e).__name__}: {e}"
+            if error is not None:
+                failures[path] = error
+        self.failures.update(failures)
+        return failures
+
+    def _quantiles(self, q: float) -> np.ndarray:
+        """Approximate a score quantile for every element from the histograms."""
+        cumulative = np.cumsum(self._hist, axis=1, dtype=np.float64)
+        target = q * self._n_events
+        index = np.argmax(cumulative >= target[:, np.newaxis], axis=1)
+        rows = np.arange(len(index))
+        below = cumulative[rows, index] - self._hist[rows, index]
+        in_bin = np.maximum(self._hist[rows, index], 1)
+        fraction = np.clip((target - below) / in_bin, 0.0, 1.0)
+        lower = self.bin_edges[index]
+        upper = self.bin_edges[index + 1]
+        values = lower + fraction * (upper - lower)
+        # Exact bounds are known from the running min/max
+        return np.clip(values, self._min, self._max)
+
+    def statistics(self, quantiles: Sequence[float] = (0.5, 0.9, 0.99)) -> pd.DataFrame:
+        """Return per-element ensemble statistics.
+
+        Parameters
+        ----------
+        quantiles : Sequence[float], optional
+            Approximate score quantiles to compute, by default (0.5, 0.9, 0.99)
+
+        Returns
+        -------
+        pd.DataFrame
+            One row per element and variable, with the number of events, number
+            and fraction of unstable events, the min/max/mean score and a
+            "score_q<percent>" column for each quantile
+
+        Raises
+        ------
+        ValueError
+            If no plan has been added to the ensemble
+        """
+        if self._elements is None:
+            raise ValueError("No plans have been added to the ensemble")
+        stats = self._elements.copy()
+        stats["n_events"] = self._n_events
+        stats["n_unstable"] = self._n_unstable
+        stats["unstable_fraction"] = self._n_unstable / self._n_events
+        stats["score_min"] = self._min
+        stats["score_max"] = self._max
+        stats["score_mean"] = self._sum / self._n_events
+        for q in quantiles:
+            stats[f"score_q{100 * q:g}"] = self._quantiles(q)
+        return stats
+
+    def _load_geometry(self, element_type: str) -> gpd.GeoDataFrame:
+        """Load element geometry from the first plan of the ensemble, once."""
+        if element_type not in self._geometry:
+            with RasPlanHdf(self.plans[0]) as plan_hdf:
+                gdf = _element_geometry(plan_hdf, element_type)
+            self._geometry[element_type] = gdf
+        return self._geometry[element_type]
+
+    def to_geodataframe(
+        self, element_type: str, quantiles: Sequence[float] = (0.5, 0.9, 0.99)
+    ) -> gpd.GeoDataFrame:
+        """Return ensemble statistics for one element type joined to its geometry.
+
+        Geometry is read from the first plan of the ensemble. Statistics of each
+        variable are added as columns prefixed with the variable name, e.g.
+        "water_surface_unstable_fraction".
+
+        Parameters
+        ----------
+        element_type : str
+            One of "reflines", "refpoints" and "mesh_cells"
+        quantiles : Sequence[float], optional
+            Approximate score quantiles to compute, by default (0.5, 0.9, 0.99)
+
+        Returns
+        -------
+        gpd.GeoDataFrame
+            One row per element with geometry and ensemble statistics
+        """
+        stats = self.statistics(quantiles)
+        stats = stats[stats["element_type"] == element_type]
+        gdf = self._load_geometry(element_type)
+        gdf = gdf[gdf["mesh_name"].isin(stats["mesh_name"].unique())]
+        stat_columns = [c for c in stats.columns if c not in ELEMENT_COLUMNS]
+        for var, var_stats in stats.groupby("variable", sort=False):
+            var_stats = var_stats[["mesh_name", "element_id"] + stat_columns]
+            prefix = _reformat_var_name(var)
+            var_stats = var_stats.rename(
+                columns={c: f"{prefix}_{c}" for c in stat_columns}
+            )
+            gdf = gdf.merge(var_stats, on=["mesh_name", "element_id"], how="left")
+        return gdf
@@ -1,13 +1,36 @@
 """Experimental methods for hydrograph stability analysis."""
 
+from __future__ import annotations
+
+import functools
+
 import numpy as np
 import numpy.typing as npt
-import pandas as pd
 
-from typing import Tuple
+from typing import TYPE_CHECKING, Optional, Tuple, Union
 
 from hydrostab.utils import coerce_array
 
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+# Maximum number of hydrographs transformed at once when spectra are not returned
+_FFT_BLOCK_SIZE = 4096
+
+
+@functools.lru_cache(maxsize=32)
+def _fft_frequencies(
+    n: int, sampling_rate: float, unstable_period: float
+) -> Tuple[npt.NDArray[np.float64], npt.NDArray[np.bool_]]:
+    """Return the (cached, read-only) rfft frequencies and high-frequency mask."""
+    d = 1.0 / sampling_rate
+    freqs = np.fft.rfftfreq(n, d=d)
+    high_freq_mask = freqs > 1.0 / unstable_period
+    freqs.setflags(write=False)
+    high_freq_mask.setflags(write=False)
+    return freqs, high_freq_mask
+
 
 def fft_stability(
     hydrograph: npt.NDArray[np.float64],
@@ -18,15 +41,28 @@ def fft_stability(
     relative: bool = False,
     standardize: bool = False,
     detrend: bool = False,
-) -> Tuple[bool, float, npt.NDArray[np.float64], npt.NDArray[np.float64]]:
+    axis: int = -1,
+    return_spectrum: bool = True,
+    workers: Optional[int] = None,
+) -> Tuple[
+    Union[bool, npt.NDArray[np.bool_]],
+    Union[float, npt.NDArray[np.float64]],
+    Optional[npt.NDArray[np.float64]],
+    npt.NDArray[np.float64],
+]:
     """Check if a time series hydrograph is stable using Fourier Transforms.
 
     EXPERIMENTAL: This method is still under development.
 
+    N-D input is treated as a batch of hydrographs with time along `axis`, which
+    are transformed together. The frequencies and high-frequency mask are cached
+    for each combination of length, sampling rate and unstable period.
+
     Parameters
     ----------
     hydrograph : npt.NDArray[np.float64]
-        Time series hydrograph data
+        Time series hydrograph data. 1D for a single hydrograph, or N-D for a
+        batch of hydrographs with time along `axis`.
     sampling_rate : float, optional
         Sampling rate of the hydrograph data (time between each point), by default 1.0
     unstable_period : float, optional
@@ -45,15 +81,25 @@ def fft_stability(
         Standardize data to zero mean and unit variance, by default False
     detrend : bool, optional
         Remove the mean from the data, by default False
+    axis : int, optional
+        Time axis of the hydrograph array, by default -1
+    return_spectrum : bool, optional
+        If False, do not return the power spectrum, and transform hydrographs in
+        blocks so that memory use is proportional to the number of hydrographs
+        rather than hydrographs x frequencies, by default True
+    workers : int, optional
+        Number of threads for the Fourier Transform (requires scipy), by default
+        None, which uses numpy in a single thread
 
     Returns
     -------
-    is_unstable : bool
+    is_unstable : Union[bool, npt.NDArray[np.bool_]]
         True if the time series is unstable, False otherwise
-    high_freq_proportion : float
+    high_freq_proportion : Union[float, npt.NDArray[np.float64]]
         Proportion of power in high-frequency components
-    power_spectrum : npt.NDArray[np.float64]
-        Power spectrum of the hydrograph data
+    power_spectrum : Optional[npt.NDArray[np.float64]]
+        Power spectrum of the hydrograph data, with frequencies along the last
+        axis, or None if `return_spectrum` is False
     freqs : npt.NDArray[np.float64]
         Frequencies of the power spectrum
 
@@ -62,39 +108,66 @@ def fft_stability(
     ValueError
         If input array has less than 2 points or contains invalid values
     ImportError
-        If scipy is not installed
+        If `detrend` or `workers` is used and scipy is not installed
     """
-    import scipy.signal
+    hydrograph = np.moveaxis(coerce_array(hydrograph, axis=axis), axis, -1)
 
     if detrend:
-        hydrograph = scipy.signal.detrend(hydrograph, type="constant")
+        import scipy.signal
+
+        hydrograph = scipy.signal.detrend(hydrograph, axis=-1, type="constant")
     if standardize:
-        hydrograph = (hydrograph - np.mean(hydrograph)) / np.std(hydrograph)
+        hydrograph = (
+            hydrograph - np.mean(hydrograph, axis=-1, keepdims=True)
+        ) / np.std(hydrograph, axis=-1, keepdims=True)
     if relative:
-        hydrograph = hydrograph - np.min(hydrograph)
+        hydrograph = hydrograph - np.min(hydrograph, axis=-1, keepdims=True)
     if normalize:
-        hydrograph = hydrograph / np.max(hydrograph)
+        hydrograph = hydrograph / np.max(hydrograph, axis=-1, keepdims=True)
 
-    # compute the Fourier Transform
-    fft_values = np.fft.rfft(hydrograph)
+    if workers is None:
+        rfft = np.fft.rfft
+    else:
+        import scipy.fft
 
-    # compute frequencies, dropping negative frequencies
-    n = len(hydrograph)
-    d = 1.0 / sampling_rate
-    freqs = np.fft.rfftfreq(n, d=d)
+        rfft = functools.partial(scipy.fft.rfft, workers=workers)
 
-    # compute power spectrum, dropping negative frequencies
-    power_spectrum = np.abs(fft_values)
+    # compute frequencies, dropping negative frequencies, and identify
+    # high-freq components
+    n = hydrograph.shape[-1]
+    freqs, high_freq_mask = _fft_frequencies(n, sampling_rate, unstable_period)
 
-    # identify high-freq components
-    threshold_freq = 1.0 / unstable_period
-    high_freq_power = power_spectrum[freqs > threshold_freq]
+    def _power_spectrum(values):
+        # compute the Fourier Transform and the power spectrum
+        return np.abs(rfft(values, axis=-1))
 
-    total_power = np.sum(power_spectrum)
-    high_freq_proportion = np.sum(high_freq_power) / total_power
+    def _high_freq_proportion(power_spectrum):
+        high_freq_power = power_spectrum[..., high_freq_mask]
+        total_power = np.sum(power_spectrum, axis=-1)
+        return np.sum(high_freq_power, axis=-1) / total_power
 
-    # convert from numpy bool to Python bool
-    is_stable = bool(high_freq_proportion < threshold)
+    if return_spectrum or hydrograph.ndim == 1:
+        power_spectrum = _power_spectrum(hydrograph)
+        high_freq_proportion = _high_freq_proportion(power_spectrum)
+    else:
+        # transform blocks of hydrographs, keeping only the proportions
+        batch_shape = hydrograph.shape[:-1]
+        flat = hydrograph.reshape(-1, n)
+        high_freq_proportion = np.empty(flat.shape[0])
+        for start in range(0, flat.shape[0], _FFT_BLOCK_SIZE):
+            block = slice(start, start + _FFT_BLOCK_SIZE)
+            high_freq_proportion[block] = _high_freq_proportion(
+                _power_spectrum(flat[block])
+            )
+        high_freq_proportion = high_freq_proportion.reshape(batch_shape)
+        power_spectrum = None
+    if not return_spectrum:
+        power_spectrum = None
+
+    is_stable = high_freq_proportion < threshold
+    if is_stable.ndim == 0:
+        # convert from numpy bool to Python bool
+        return bool(is_stable), high_freq_proportion, power_spectrum, freqs
     return is_stable, high_freq_proportion, power_spectrum, freqs
 
 
@@ -120,34 +193,55 @@ def _coerce_dt_array(dt_array: npt.ArrayLike) -> pd.Series[pd.Timestamp]:
     dt_array = np.asarray(dt_array)  # Convert to NumPy array
     if dt_array.ndim != 1:
         raise ValueError("Input must be 1D")
+    import pandas as pd
+
     return pd.to_datetime(dt_array)
 
 
+def _time_interval_minutes(hyd_times: pd.DatetimeIndex) -> float:
+    """Infer the time interval between measurements in minutes, as the most common difference."""
+    time_diffs = hyd_times.diff().dropna().to_series()
+    return time_diffs.mode()[0].total_seconds() / 60
+
+
 def oscillation_fraction(
     hydrograph_values: npt.ArrayLike,
     hydrograph_times: npt.ArrayLike,
     rate_of_change_threshold: float,
-) -> tuple[float, npt.NDArray[np.float64], float, float]:
+    axis: int = -1,
+) -> Tuple[
+    Union[float, npt.NDArray[np.float64]],
+    npt.NDArray[np.float64],
+    Union[float, npt.NDArray[np.float64]],
+    float,
+]:
     """Calculate the oscillation fraction from the hydrograph data.
 
     EXPERIMENTAL: This method is still under development.
 
+    N-D input is treated as a batch of hydrographs sharing one time axis, e.g.
+    the cells of a 2D mesh. The time interval is inferred once and all
+    hydrographs are processed together in vectorized form.
+
     Parameters
     ----------
     hydrograph_values : npt.ArrayLike
-        Array of hydrograph values (flow or stage)
+        Array of hydrograph values (flow or stage). 1D for a single hydrograph,
+        or N-D for a batch of hydrographs with time along `axis`.
     hydrograph_times : npt.ArrayLike
-        Array of datetime values corresponding to hydrograph_values
+        1D array of datetime values corresponding to the time axis of hydrograph_values
     rate_of_change_threshold : float
         Threshold for the rate of change to consider an oscillation
+    axis : int, optional
+        Time axis of the hydrograph values array, by default -1
 
     Returns
     -------
-    oscillation_fraction : float
+    oscillation_fraction : Union[float, npt.NDArray[np.float64]]
         Fraction of points that exceed the rate of change threshold
     rate_of_change_percentage : npt.NDArray[np.float64]
-        Percentage rate of change at each point
-    std_dev_rate_of_change : float
+        Percentage rate of change at each point, with the shape of the input
+    std_dev_rate_of_change : Union[float, npt.NDArray[np.float64]]
         Standard deviation of the rate of change percentage
     time_interval_minutes : float
         Inferred time interval between measurements in minutes
@@ -157,27 +251,32 @@ def oscillation_fraction(
     ValueError
         If input arrays have different lengths or contain invalid values
     """
-    hyd_values = coerce_array(hydrograph_values)
+    hyd_values = np.moveaxis(coerce_array(hydrograph_values, axis=axis), axis, -1)
     hyd_times = _coerce_dt_array(hydrograph_times)
+    n = hyd_values.shape[-1]
+    if len(hyd_times) != n:
+        raise ValueError(
+            "hydrograph_times must have the same length as the time axis of"
+            " hydrograph_values"
+        )
 
-    # Convert negative values in hyd_values to 0
-    hyd_values[hyd_values < 0] = 0
+    # Convert negative values in hyd_values to 0 (without modifying the input)
+    hyd_values = np.maximum(hyd_values, 0.0)
 
     # Calculate the mean of the flow data
-    mean_flow = np.mean(hyd_values)
+    mean_flow = np.mean(hyd_values, axis=-1, keepdims=True)
 
     # Use 10% of the mean value as epsilon
     epsilon = 0.1 * mean_flow
 
-    # Infer the time interval in minutes
-    time_diffs = hyd_times.diff().dropna().to_series()
-    time_interval_minutes = time_diffs.mode()[0].total_seconds() / 60
+    # Infer the time interval in minutes, once for all hydrographs
+    time_interval_minutes = _time_interval_minutes(hyd_times)
 
     # Convert time interval from minutes to hours
     time_interval_hour = time_interval_minutes / 60
 
     # Calculate the first derivative (rate of change)
-    rate_of_change = np.diff(hyd_values, prepend=hyd_values[0])
+    rate_of_change = np.diff(hyd_values, axis=-1, prepend=hyd_values[..., :1])
 
     # Normalize the rate of change by the time interval to account for different sampling frequencies,
     # penalizing higher resolution intervals (e.g., 15 min) more than lower resolution intervals (e.g., 60 min)
@@ -191,132 +290,115 @@ def oscillation_fraction(
 
     # Determine the number of oscillations
     oscillations = np.sum(
-        np.abs(rate_of_change_percentage) > (rate_of_change_threshold * 100)
+        np.abs(rate_of_change_percentage) > (rate_of_change_threshold * 100), axis=-1
     )
 
     # Calculate the oscillation fraction
-    oscillation_fraction = oscillations / len(hyd_values)
+    oscillation_fraction = oscillations / n
 
     # Calculate the standard deviation of the rate of change percentage
-    std_dev_rate_of_change = np.std(rate_of_change_percentage)
+    std_dev_rate_of_change = np.std(rate_of_change_percentage, axis=-1)
 
     return (
         oscillation_fraction,
-        rate_of_change_percentage,
+        np.moveaxis(rate_of_change_percentage, -1, axis),
         std_dev_rate_of_change,
         time_interval_minutes,
     )
 
 
-def _find_first_peak(flow: npt.NDArray[np.float64]) -> int:
+def _find_first_peak(
+    flow: npt.NDArray[np.float64], axis: int = -1
+) -> Union[int, npt.NDArray[np.intp]]:
     """Find the first peak data point in a data array.
 
     Parameters
     ----------
     flow : npt.NDArray[np.float64]
-        Array of hydrograph data (flow or stage)
+        Array of hydrograph data (flow or stage). 1D for a single hydrograph,
+        or N-D for a batch of hydrographs with time along `axis`.
+    axis : int, optional
+        Time axis of the array, by default -1
 
     Returns
     -------
-    int
-        Index location of the first peak data point in the input array
+    Union[int, npt.NDArray[np.intp]]
+        Index location of the first peak data point in the input array, or the
+        length of the array if no peak is found. For N-D input, an array of
+        indices with the shape of the input minus `axis`.
     """
-    # Set the initial maximum flow to be 0
-    max = 0
-
-    # Find the first data point that is not the maximum value compared to all data points beforehand
-    for i in range(len(flow) - 1):
-        if i != 0:
-            max = np.max(flow[0:i])
-            if flow[i - 1] != max:
-                ind = i
-                # Return the index value
-                if ind != 0 and ind != (len(flow) - 1):
-                    return ind
-                else:
-                    return 0
+    flow = np.moveaxis(np.asarray(flow), axis, -1)
+    n = flow.shape[-1]
+
+    # The first peak is the last data point before the hydrograph first falls
+    # below its running maximum (the final two points are not considered)
+    head = flow[..., : max(n - 2, 0)]
+    below_max = head < np.maximum.accumulate(head, axis=-1)
+    # Append a sentinel so that argmax is defined when no point is below the maximum
+    sentinel = np.ones(below_max.shape[:-1] + (1,), dtype=np.bool_)
+    first_below = np.argmax(np.concatenate([below_max, sentinel], axis=-1), axis=-1)
+    peak = np.where(first_below < head.shape[-1], first_below + 1, n)
+    if peak.ndim == 0:
+        return int(peak)
+    return peak
 
 
 def abrupt_changes(
-    hydrograph_values: npt.ArrayLike, percent_change: float, max_time_interval: int
-) -> bool:
+    hydrograph_values: npt.ArrayLike,
+    percent_change: float,
+    max_time_interval: int,
+    axis: int = -1,
+) -> Union[bool, npt.NDArray[np.bool_]]:
     """Detect abrupt changes in a time series hydrograph.
 
     EXPERIMENTAL: This method is still under development.
 
+    An abrupt change point is a point whose absolute change from the previous
+    point is at least `percent_change` of the hydrograph range. A hydrograph is
+    stable if all abrupt change points are before its first peak, which allows
+    for a quick ramp-up.
+
     Parameters
     ----------
     hydrograph_values : npt.ArrayLike
-        Array of hydrograph data (flow or stage)
+        Array of hydrograph data (flow or stage). 1D for a single hydrograph,
+        or N-D for a batch of hydrographs with time along `axis`.
     percent_change : float
         Minimum percentage change in the hydrograph range to be considered an abrupt change
     max_time_interval : int
         Maximum number of samples between points to be considered part of the same change
+    axis : int, optional
+        Time axis of the hydrograph array, by default -1
 
     Returns
     -------
-    bool
-        True if the hydrograph is classified as stable, False otherwise
+    Union[bool, npt.NDArray[np.bool_]]
+        True if the hydrograph is classified as stable, False otherwise. For N-D
+        input, an array with the shape of the input minus `axis`.
 
     Raises
     ------
     ValueError
         If input array has less than 2 points or contains invalid values
     """
-    # Find location of the first peak
-    first_peak_index = _find_first_peak(hydrograph_values)
-
-    hyd_values = pd.Series(coerce_array(hydrograph_values))
+    hyd_values = np.moveaxis(coerce_array(hydrograph_values, axis=axis), axis, -1)
+    n = hyd_values.shape[-1]
 
-    # Calculate the absolute change in the flow.
-    abs_change = hyd_values.diff().abs()
+    # Find location of the first peak
+    first_peak_index = _find_first_peak(hyd_values)
 
     # Calculate the threshold for the minimum change required to be considered an abrupt change.
-    change_threshold = (np.max(hyd_values) - np.min(hyd_values)) * percent_change
-
-    # Initialize a mask of False values to indicate no abrupt changes have been detected yet.
-    abrupt_changes = pd.Series(False, index=range(len(hyd_values)))
+    change_threshold = np.ptp(hyd_values, axis=-1, keepdims=True) * percent_change
 
-    # Loop over each data point in the flow.
-    for i in range(1, len(hyd_values)):
-        # If the absolute change is greater than the threshold, mark this data point as the start of an abrupt change.
-        if abs_change[i] >= change_threshold:
-            abrupt_changes[i] = True
-
-            # Keep track of the end of the current change.
-            end_of_change = i
-
-            # Continue checking subsequent data points to see if they are still part of the same change.
-            for j in range(i + 1, min(i + max_time_interval, len(hyd_values))):
-                if abs_change[j] >= change_threshold:
-                    # If the change is still above the threshold, mark this data point as part of the same change.
-                    abrupt_changes[j] = True
-
-                    # Update the end of the current change.
-                    end_of_change = j
-                else:
-                    # If the change has fallen below the threshold, stop checking subsequent data points.
-                    break
-
-            # Skip checking data points that are already part of the current change.
-            i = end_of_change
-
-    # Transform change points array to a list
-    ls_abrupt_changes = abrupt_changes.tolist()
-
-    # Calculate the abrupt change points detected that are prior to the first peak
-    ls_abrupt_changes_before_peak = ls_abrupt_changes[0:first_peak_index]
-
-    # Calculate the number of change points prior to the first peak
-    unstable_pt_before_peak = ls_abrupt_changes_before_peak.count(1)
-    unstable_pt = ls_abrupt_changes.count(1)
+    # Mark the points whose absolute change from the previous point exceeds the
+    # threshold. Runs of consecutive marked points are a single abrupt change,
+    # but every point of a run is counted, so runs need not be grouped.
+    abrupt = np.abs(np.diff(hyd_values, axis=-1)) >= change_threshold
 
     # Determine the hydrograph to be stable if all abrupt change points detected are before the first peak.
     # This is to improve metric performance with quick ramp-up in data.
-    if unstable_pt_before_peak == unstable_pt:
-        return True
-    # Return the hydrograph to be stable if no abrupt change point detected. Otherwise return unstable.
-    elif unstable_pt == 0:
-        return True
-    else:
-        return False
+    after_peak = np.arange(1, n) >= np.expand_dims(first_peak_index, -1)
+    stable = ~np.any(abrupt & after_peak, axis=-1)
+    if stable.ndim == 0:
+        return bool(stable)
+    return stable
@@ -1,12 +1,48 @@
 """Utilities for working with HEC-RAS model data."""
 
+from datetime import datetime
+
 import geopandas as gpd
+import h5py
+import numpy as np
+import pandas as pd
 from rashdf import RasPlanHdf
+import shapely
+from shapely.geometry import Polygon
 import xarray as xr
 
-from typing import Union
+from typing import Optional, Sequence, Union
 
 import hydrostab
+from hydrostab.cache import ScoreCache
+
+# Mesh face time series output variables analyzed by `mesh_faces_stability`
+MESH_FACE_VARIABLES = ("Face Flow", "Face Velocity")
+
+# 1D output variables analyzed by `cross_sections_stability` and
+# `structures_stability`
+CROSS_SECTION_VARIABLES = ("Flow", "Water Surface")
+STRUCTURE_VARIABLES = ("Total Flow", "Stage HW", "Stage TW")
+
+# Time series output groups of 1D structures, and their type in the
+# structures geometry
+STRUCTURE_OUTPUT_GROUPS = {
+    "Inline Structures": "Inline",
+    "Lateral Structures": "Lateral",
+    "SA 2D Area Conn": "Connection",
+}
+
+
+def _score_bytes_per_value(dtype: np.dtype) -> int:
+    """Approximate bytes of working memory per hydrograph value while scoring a block.
+
+    float32 and float64 blocks are scored in their own precision, so this is the
+    raw HDF read plus about five temporaries of the scorer in that precision.
+    Other dtypes are scored in float64.
+    """
+    dtype = np.dtype(dtype)
+    compute = dtype if dtype in (np.float32, np.float64) else np.dtype(np.float64)
+    return dtype.itemsize + 5 * compute.itemsize
 
 
 def _reformat_var_name(var_name: str) -> str:
@@ -25,14 +61,431 @@ def _reformat_var_name(var_name: str) -> str:
     return var_name.lower().replace(" ", "_")
 
 
+def _mesh_cell_count(plan_hdf: RasPlanHdf, mesh_name: str) -> int:
+    """Return the number of real (non-ghost) cells in a 2D flow area mesh.
+
+    Parameters
+    ----------
+    plan_hdf : RasPlanHdf
+        HEC-RAS plan HDF file object
+    mesh_name : str
+        Name of the mesh
+
+    Returns
+    -------
+    int
+        Number of cells in the mesh
+
+    Raises
+    ------
+    ValueError
+        If the mesh is not found in the plan HDF file
+    """
+    attrs = plan_hdf[f"{RasPlanHdf.FLOW_AREA_2D_PATH}/Attributes"][()]
+    for name, count in zip(attrs["Name"], attrs["Cell Count"]):
+        if name.decode("utf-8") == mesh_name:
+            return int(count)
+    raise ValueError(f"Mesh '{mesh_name}' not found in the Plan HDF file.")
+
+
+def _mesh_cell_polygons(
+    plan_hdf: RasPlanHdf,
+    mesh_name: str,
+    cell_ids: Optional[np.ndarray] = None,
+) -> gpd.GeoDataFrame:
+    """Build the cell polygons of one 2D flow area mesh.
+
+    Only the geometry datasets of `mesh_name` are read, and only the faces of
+    the requested cells are built. Polygons are built from the cell faces like
+    `RasPlanHdf.mesh_cell_polygons`, but for all cells in one vectorized pass.
+
+    Parameters
+    ----------
+    plan_hdf : RasPlanHdf
+        HEC-RAS plan HDF file object
+    mesh_name : str
+        Name of the mesh
+    cell_ids : np.ndarray, optional
+        IDs of the cells to build, in the order of the returned rows, by default
+        None, which builds every cell of the mesh
+
+    Returns
+    -------
+    gpd.GeoDataFrame
+        Cell polygons, with columns "mesh_name", "cell_id" and "geometry"
+
+    Raises
+    ------
+    ValueError
+        If the mesh is not found in the plan HDF file
+    """
+    n_cells = _mesh_cell_count(plan_hdf, mesh_name)
+    if cell_ids is None:
+        cell_ids = np.arange(n_cells)
+    cell_ids = np.asarray(cell_ids, dtype=np.int64)
+    mesh = plan_hdf[f"{RasPlanHdf.FLOW_AREA_2D_PATH}/{mesh_name}"]
+
+    # Face IDs of each requested cell, as a (cell, face) matrix padded with -1
+    face_info = mesh["Cells Face and Orientation Info"][()][cell_ids]
+    face_values = mesh["Cells Face and Orientation Values"][()][:, 0]
+    starts, counts = face_info[:, 0], face_info[:, 1]
+    max_faces = int(counts.max()) if len(counts) else 0
+    slots = np.arange(max_faces)
+    has_face = slots < counts[:, np.newaxis]
+    cell_faces = np.full(has_face.shape, -1, dtype=np.int64)
+    cell_faces[has_face] = face_values[(starts[:, np.newaxis] + slots)[has_face]]
+
+    faces, face_index = np.unique(cell_faces[has_face], return_inverse=True)
+    lines = _face_lines(mesh, faces)
+
+    cell_lines = np.full(has_face.shape, None, dtype=object)
+    cell_lines[has_face] = lines[face_index]
+    polygons, _, _, invalid_rings = shapely.polygonize_full(cell_lines)
+    geometry = shapely.get_geometry(polygons, 0)
+    # Cells whose faces do not close a polygon are built from their ring
+    for i in np.flatnonzero(shapely.is_missing(geometry)):
+        geometry[i] = Polygon(shapely.get_geometry(invalid_rings[i], 0))
+    return gpd.GeoDataFrame(
+        {"mesh_name": mesh_name, "cell_id": cell_ids, "geometry": geometry},
+        geometry="geometry",
+        crs=plan_hdf.projection(),
+    )
+
+
+def _face_lines(mesh: h5py.Group, faces: np.ndarray) -> np.ndarray:
+    """Build the lines of faces of a 2D flow area mesh in one vectorized pass.
+
+    Each face is a line from its first facepoint, through its perimeter
+    points, to its second facepoint, like `RasPlanHdf.mesh_cell_faces`.
+
+    Parameters
+    ----------
+    mesh : h5py.Group
+        Geometry group of the mesh
+    faces : np.ndarray
+        IDs of the faces to build
+
+    Returns
+    -------
+    np.ndarray
+        LineString of each face
+    """
+    facepoints = mesh["Faces FacePoint Indexes"][()][faces]
+    coordinates = mesh["FacePoints Coordinate"][()]
+    perimeter_start, perimeter_count = mesh["Faces Perimeter Info"][()][faces].T
+    n_coords = perimeter_count.astype(np.int64) + 2
+    ends = np.cumsum(n_coords)
+    line_coords = np.empty((int(ends[-1]) if len(ends) else 0, 2))
+    line_coords[ends - n_coords] = coordinates[facepoints[:, 0]]
+    line_coords[ends - 1] = coordinates[facepoints[:, 1]]
+    if perimeter_count.any():
+        is_perimeter = np.ones(len(line_coords), dtype=bool)
+        is_perimeter[ends - n_coords] = False
+        is_perimeter[ends - 1] = False
+        offset = np.repeat(perimeter_start - (ends - n_coords + 1), perimeter_count)
+        perimeter_values = mesh["Faces Perimeter Values"][()]
+        line_coords[is_perimeter] = perimeter_values[
+            np.flatnonzero(is_perimeter) + offset
+        ]
+    return shapely.linestrings(
+        line_coords, indices=np.repeat(np.arange(len(faces)), n_coords)
+    )
+
+
+def _mesh_face_lines(
+    plan_hdf: RasPlanHdf,
+    mesh_name: str,
+    face_ids: Optional[np.ndarray] = None,
+) -> gpd.GeoDataFrame:
+    """Build the face lines of one 2D flow area mesh.
+
+    Parameters
+    ----------
+    plan_hdf : RasPlanHdf
+        HEC-RAS plan HDF file object
+    mesh_name : str
+        Name of the mesh
+    face_ids : np.ndarray, optional
+        IDs of the faces to build, in the order of the returned rows, by default
+        None, which builds every face of the mesh
+
+    Returns
+    -------
+    gpd.GeoDataFrame
+        Face lines, with columns "mesh_name", "face_id" and "geometry"
+
+    Raises
+    ------
+    ValueError
+        If the mesh is not found in the plan HDF file
+    """
+    mesh = plan_hdf.get(f"{RasPlanHdf.FLOW_AREA_2D_PATH}/{mesh_name}")
+    if mesh is None:
+        raise ValueError(f"Mesh '{mesh_name}' not found in the Plan HDF file.")
+    if face_ids is None:
+        face_ids = np.arange(len(mesh["Faces FacePoint Indexes"]))
+    face_ids = np.asarray(face_ids, dtype=np.int64)
+    return gpd.GeoDataFrame(
+        {
+            "mesh_name": mesh_name,
+            "face_id": face_ids,
+            "geometry": _face_lines(mesh, face_ids),
+        },
+        geometry="geometry",
+        crs=plan_hdf.projection(),
+    )
+
+
+def _time_window(
+    plan_hdf: RasPlanHdf,
+    start: Optional[Union[int, str, datetime]] = None,
+    end: Optional[Union[int, str, datetime]] = None,
+) -> slice:
+    """Resolve a time window to a positional slice of the unsteady time steps.
+
+    Integers are positional indices, like a Python slice: `start` is included
+    and `end` is excluded, and negative values count from the end. Anything
+    else is parsed as a time with `pd.Timestamp`, and both bounds are included.
+
+    Parameters
+    ----------
+    plan_hdf : RasPlanHdf
+        HEC-RAS plan HDF file object
+    start : Union[int, str, datetime], optional
+        First time step, or time, of the window, by default the first time step
+    end : Union[int, str, datetime], optional
+        End time step, or last time, of the window, by default the last time step
+
+    Returns
+    -------
+    slice
+        Slice with non-negative start and stop, and a step of 1
+
+    Raises
+    ------
+    ValueError
+        If the window contains less than 2 time steps
+    """
+    stamps = plan_hdf[f"{RasPlanHdf.UNSTEADY_TIME_SERIES_PATH}/Time Date Stamp (ms)"]
+    n_times = stamps.shape[0]
+    times = None
+    bounds = []
+    for value, side in ((start, "left"), (end, "right")):
+        if value is not None and not isinstance(value, (int, np.integer)):
+            if times is None:
+                times = pd.DatetimeIndex(plan_hdf.unsteady_datetimes())
+            value = int(times.searchsorted(pd.Timestamp(value), side=side))
+        bounds.append(value)
+    window_start, window_stop, _ = slice(*bounds).indices(n_times)
+    if window_stop - window_start < 2:
+        raise ValueError(
+            f"Time window from {start} to {end} contains less than 2 time steps"
+        )
+    return slice(window_start, window_stop)
+
+
+def _mesh_timeseries_dataset(
+    plan_hdf: RasPlanHdf, mesh_name: str, var: str
+) -> h5py.Dataset:
+    """Return the HDF5 dataset of a 2D mesh time series output variable.
+
+    Parameters
+    ----------
+    plan_hdf : RasPlanHdf
+        HEC-RAS plan HDF file object
+    mesh_name : str
+        Name of the mesh
+    var : str
+        Name of the time series output variable, e.g. "Water Surface"
+
+    Returns
+    -------
+    h5py.Dataset
+        Dataset with dimensions (time, element)
+
+    Raises
+    ------
+    ValueError
+        If the variable is not found for the mesh in the plan HDF file
+    """
+    path = f"{RasPlanHdf.UNSTEADY_TIME_SERIES_PATH}/2D Flow Areas/{mesh_name}/{var}"
+    dataset = plan_hdf.get(path)
+    if dataset is None:
+        raise ValueError(
+            f"Could not find '{var}' output for mesh '{mesh_name}' in the Plan HDF file."
+        )
+    return dataset
+
+
+def _chunk_size(
+    dataset: h5py.Dataset,
+    chunk_size: Optional[int] = None,
+    max_memory: Optional[int] = None,
+    n_times: Optional[int] = None,
+) -> int:
+    """Determine the number of elements to read and score per block.
+
+    Parameters
+    ----------
+    dataset : h5py.Dataset
+        Dataset with dimensions (time, element)
+    chunk_size : int, optional
+        Requested number of elements per block
+    max_memory : int, optional
+        Working memory budget in bytes for scoring a block
+    n_times : int, optional
+        Number of time steps read per element, by default all time steps
+
+    Returns
+    -------
+    int
+        Number of elements per block. When larger than the HDF5 chunk width
+        but less than the number of elements, it is rounded down to a multiple
+        of it so that each block read only touches whole HDF5 chunks; all
+        elements are otherwise read at once. When smaller than the HDF5 chunk width, it is
+        rounded up to the chunk width if that still fits `max_memory`.
+
+    Raises
+    ------
+    ValueError
+        If `max_memory` is too small to score a single element
+    """
+    n_elements = dataset.shape[1]
+    if n_times is None:
+        n_times = dataset.shape[0]
+    size = n_elements if chunk_size is None else chunk_size
+    budget_size = None
+    if max_memory is not None:
+        element_bytes = max(n_times, 1) * _score_bytes_per_value(dataset.dtype)
+        budget_size = max_memory // element_bytes
+        if budget_size < 1:
+            raise ValueError(
+                f"max_memory of {max_memory} bytes is too small to score a single"
+                f" element of {n_times} time steps (about {element_bytes} bytes)"
+            )
+        size = min(size, budget_size)
+    if dataset.chunks is not None:
+        hdf_chunk = dataset.chunks[1]
+        if hdf_chunk <= size < n_elements:
+            size -= size % hdf_chunk
+        elif size < hdf_chunk and budget_size is not None and hdf_chunk <= budget_size:
+            size = hdf_chunk
+    return max(int(size), 1)
+
+
+def _chunked_scores(
+    dataset: h5py.Dataset,
+    n_elements: int,
+    range_threshold: float,
+    chunk_size: int,
+    time_window: slice = slice(None),
+    workers: Optional[int] = None,
+    prescreen_threshold: Optional[float] = None,
+) -> np.ndarray:
+    """Score a (time, element) HDF5 dataset in blocks of elements.
+
+    Only one block of the time series is held in memory at a time, and only
+    the time steps in `time_window` are read.
+
+    Parameters
+    ----------
+    dataset : h5py.Dataset
+        Dataset with dimensions (time, element)
+    n_elements : int
+        Number of leading elements to score, e.g. excluding ghost cells
+    range_threshold : float
+        Threshold for range normalization in stability calculation
+    chunk_size : int
+        Number of elements per block
+    time_window : slice, optional
+        Time steps to score, by default all
+    workers : int, optional
+        Number of threads to score each block with, by default None
+    prescreen_threshold : float, optional
+        Unstable threshold of the pre-screen: elements whose score bound is
+        below it are not scored, and receive a NaN score. By default None,
+        which scores every element.
+
+    Returns
+    -------
+    np.ndarray
+        Stability score for each element
+    """
+    scores = np.empty(n_elements, dtype=np.float64)
+    for start in range(0, n_elements, chunk_size):
+        stop = min(start + chunk_size, n_elements)
+        scores[start:stop] = _score_block(
+            dataset[time_window, start:stop],
+            range_threshold,
+            workers,
+            prescreen_threshold,
+        )
+    return scores
+
+
+def _score_block(
+    values: np.ndarray,
+    range_threshold: float,
+    workers: Optional[int] = None,
+    prescreen_threshold: Optional[float] = None,
+) -> np.ndarray:
+    """Score a (time, element) block of hydrographs in one batched call.
+
+    Parameters
+    ----------
+    values : np.ndarray
+        Hydrographs, with dimensions (time, element)
+    range_threshold : float
+        Threshold for range normalization in stability calculation
+    workers : int, optional
+        Number of threads to score with, by default None
+    prescreen_threshold : float, optional
+        Unstable threshold of the pre-screen, by default None, which scores
+        every element
+
+    Returns
+    -------
+    np.ndarray
+        Stability score for each element
+    """
+    if prescreen_threshold is None:
+        return hydrostab.stability_score(
+            values, range_threshold=range_threshold, axis=0, workers=workers
+        )
+    return hydrostab._prescreened_scores(
+        values, prescreen_threshold, range_threshold, axis=0, workers=workers
+    )
+
+
+def _cache_variable(var: str, time_window: Optional[slice] = None) -> str:
+    """Return the cache key of a variable, including its time window if any."""
+    if time_window is None:
+        return var
+    return f"{var} [{time_window.start}:{time_window.stop}]"
+
+
 def _calculate_stability(
     dataset: xr.Dataset,
     variables: list[str],
     unstable_threshold: float,
     range_threshold: float,
+    lazy: bool = False,
+    cache: Optional[ScoreCache] = None,
+    cache_key: Optional[dict] = None,
+    time_window: Optional[slice] = None,
+    workers: Optional[int] = None,
+    prescreen: bool = False,
 ) -> tuple[xr.Dataset, list[str]]:
     """Calculate stability scores and flags for given variables in a dataset.
 
+    Dask-backed variables (rashdf returns these when dask is installed) are
+    rechunked to a single chunk along time and scored in parallel, chunk by
+    chunk along the element dimension. Unless `lazy` is True, the scores and
+    flags of all variables are then computed together in one dask graph.
+    Scores found in `cache` are not recomputed; scores that are not are
+    computed eagerly and stored. The dataset is sliced to `time_window` before
+    anything is read, so dask-backed variables only read that hyperslab.
+
     Parameters
     ----------
     dataset : xr.Dataset
@@ -43,37 +496,123 @@ def _calculate_stability(
         Threshold above which a stability score indicates instability
     range_threshold : float
         Threshold for range normalization in stability calculation
+    lazy : bool, optional
+        If True, leave the stability scores and flags as lazy dask arrays,
+        converting the dataset to dask first if needed, by default False
+    cache : ScoreCache, optional
+        Cache of stability scores, by default None
+    cache_key : dict, optional
+        Plan file, element type and mesh name of the dataset in the cache,
+        required if `cache` is given
+    time_window : slice, optional
+        Time steps to score, by default all
+    workers : int, optional
+        Number of threads to score with: split across the elements of
+        in-memory variables, or the number of dask threads computing
+        dask-backed variables. By default None, which scores in-memory
+        variables in the calling thread and uses the default dask scheduler.
+    prescreen : bool, optional
+        If True, only score elements whose score bound is at least
+        `unstable_threshold`; the others receive a NaN score and are not
+        cached. By default False.
 
     Returns
     -------
     tuple[xr.Dataset, list[str]]
         Modified dataset with stability scores and flags, and list of added variable names
     """
+    if time_window is not None:
+        dataset = dataset.isel(time=time_window)
+    if lazy:
+        dataset = dataset.chunk({"time": -1})
+    compute_kwargs = {}
+    if workers is not None:
+        compute_kwargs = {"scheduler": "threads", "num_workers": workers}
     stability_vars = []
     for var in dataset.data_vars:
         if var in variables:
             da = dataset[var]
-            da_scores = xr.apply_ufunc(
-                hydrostab.stability_score,
-                da,
-                input_core_dims=[["time"]],
-                kwargs={"range_threshold": range_threshold},
-                vectorize=True,
-            )
-            da_stable = da_scores < unstable_threshold
+            da_scores = None
+            if cache is not None:
+                template = da.isel(time=0, drop=True)
+                scores = cache.get(
+                    variable=_cache_variable(var, time_window),
+                    range_threshold=range_threshold,
+                    **cache_key,
+                )
+                if scores is not None and scores.shape == template.shape:
+                    da_scores = template.copy(data=scores)
+            if da_scores is None:
+                func = hydrostab.stability_score
+                kwargs = {"range_threshold": range_threshold, "axis": -1}
+                if prescreen:
+                    func = hydrostab._prescreened_scores
+                    kwargs["unstable_threshold"] = unstable_threshold
+                if da.chunks is not None:
+                    # Each chunk must hold complete hydrographs
+                    element_dims = {dim: "auto" for dim in da.dims if dim != "time"}
+                    da = da.chunk({"time": -1, **element_dims})
+                else:
+                    kwargs["workers"] = workers
+                # apply_ufunc moves the core "time" dimension to the last axis,
+                # so every element of a chunk is scored in a single batched call
+                da_scores = xr.apply_ufunc(
+                    func,
+                    da,
+                    input_core_dims=[["time"]],
+                    kwargs=kwargs,
+                    dask="parallelized",
+                    output_dtypes=[np.float64],
+                )
+                if cache is not None and not prescreen:
+                    da_scores = da_scores.compute(**compute_kwargs)
+                    cache.put(
+                        variable=_cache_variable(var, time_window),
+                        range_threshold=range_threshold,
+                        scores=da_scores.values,
+                        **cache_key,
+                    )
+            # NaN scores were proven stable by the pre-screen
+            da_stable = ~(da_scores >= unstable_threshold)
             stability_score_var = var + " Stability Score"
             stability_var = var + " is Stable"
             stability_vars.extend([stability_score_var, stability_var])
             dataset[stability_score_var] = da_scores
             dataset[stability_var] = da_stable
+    if not lazy:
+        computed = dataset[stability_vars].compute(**compute_kwargs)
+        dataset = dataset.assign({var: computed[var] for var in stability_vars})
     return dataset, stability_vars
 
 
+def _read_in_blocks(
+    chunk_size: Optional[int],
+    max_memory: Optional[int],
+    cache: Optional[ScoreCache],
+    time_window: Optional[slice],
+    lazy: bool,
+) -> bool:
+    """Return True if output should be scored straight from the HDF file.
+
+    Reading in blocks bounds memory use, looks up cached scores before any
+    output is read and only reads the time window, whereas rashdf loads the
+    whole dataset first.
+    """
+    if chunk_size is not None or max_memory is not None:
+        return True
+    return (cache is not None or time_window is not None) and not lazy
+
+
 def reflines_stability(
     plan_hdf: RasPlanHdf,
     unstable_threshold: float = 0.002,
     range_threshold: float = 0.1,
     gdf: bool = False,
+    lazy: bool = False,
+    cache: Optional[ScoreCache] = None,
+    start: Optional[Union[int, str, datetime]] = None,
+    end: Optional[Union[int, str, datetime]] = None,
+    workers: Optional[int] = None,
 ) -> Union[xr.Dataset, gpd.GeoDataFrame]:
     """Calculate stability metrics for reference lines.
 
@@ -87,16 +626,67 @@ def reflines_stability(
         Threshold for range normalization in stability calculation, by default 0.1
     gdf : bool, optional
         Return results as GeoDataFrame if True, by default False
+    lazy : bool, optional
+        If True and `gdf` is False, return stability scores and flags as lazy
+        dask arrays, to be computed (in parallel, in one graph) when accessed or
+        written out. Requires dask. By default False.
+    cache : ScoreCache, optional
+        On-disk cache of stability scores. Cached scores are reused, e.g. when
+        only `unstable_threshold` changes, and new scores are stored. Unless
+        `lazy`, the output is then read directly from the HDF file only if
+        its scores are not cached, and the returned Dataset only holds the
+        stability scores and flags. By default None.
+    start : Union[int, str, datetime], optional
+        Start of the time window to score: a time step index, or a time
+        (included). Unless `lazy`, only the window is read from the HDF file,
+        as with `cache`. By default the first time step.
+    end : Union[int, str, datetime], optional
+        End of the time window to score: a time step index (excluded), or a
+        time (included). By default the last time step.
+    workers : int, optional
+        Number of threads to score with, by default None, which scores
+        in-memory output in the calling thread and computes dask-backed output
+        with the default dask scheduler
 
     Returns
     -------
     Union[xr.Dataset, gpd.GeoDataFrame]
         Dataset or GeoDataFrame containing stability metrics
+
+    Raises
+    ------
+    ValueError
+        If the time window contains less than 2 time steps
     """
-    ds_reflines = plan_hdf.reference_lines_timeseries_output()
-    ds_reflines, stability_vars = _calculate_stability(
-        ds_reflines, ["Flow", "Water Surface"], unstable_threshold, range_threshold
-    )
+    time_window = None
+    if start is not None or end is not None:
+        time_window = _time_window(plan_hdf, start, end)
+    ds_reflines = None
+    if _read_in_blocks(None, None, cache, time_window, lazy and not gdf):
+        ds_reflines = _reference_stability(
+            plan_hdf,
+            "reflines",
+            unstable_threshold,
+            range_threshold,
+            cache=cache,
+            time_window=time_window,
+            workers=workers,
+        )
+    if ds_reflines is not None:
+        stability_vars = list(ds_reflines.data_vars)
+    else:
+        ds_reflines = plan_hdf.reference_lines_timeseries_output()
+        ds_reflines, stability_vars = _calculate_stability(
+            ds_reflines,
+            ["Flow", "Water Surface"],
+            unstable_threshold,
+            range_threshold,
+            lazy=lazy and not gdf,
+            cache=cache,
+            cache_key={"plan_file": plan_hdf.filename, "element_type": "reflines"},
+            time_window=time_window,
+            workers=workers,
+        )
 
     if gdf:
         gdf_reflines = plan_hdf.reference_lines()
@@ -111,6 +701,11 @@ def refpoints_stability(
     unstable_threshold: float = 0.002,
     range_threshold: float = 0.1,
     gdf: bool = False,
+    lazy: bool = False,
+    cache: Optional[ScoreCache] = None,
+    start: Optional[Union[int, str, datetime]] = None,
+    end: Optional[Union[int, str, datetime]] = None,
+    workers: Optional[int] = None,
 ) -> Union[xr.Dataset, gpd.GeoDataFrame]:
     """Calculate stability metrics for reference points.
 
@@ -124,16 +719,67 @@ def refpoints_stability(
         Threshold for range normalization in stability calculation, by default 0.1
     gdf : bool, optional
         Return results as GeoDataFrame if True, by default False
+    lazy : bool, optional
+        If True and `gdf` is False, return stability scores and flags as lazy
+        dask arrays, to be computed (in parallel, in one graph) when accessed or
+        written out. Requires dask. By default False.
+    cache : ScoreCache, optional
+        On-disk cache of stability scores. Cached scores are reused, e.g. when
+        only `unstable_threshold` changes, and new scores are stored. Unless
+        `lazy`, the output is then read directly from the HDF file only if
+        its scores are not cached, and the returned Dataset only holds the
+        stability scores and flags. By default None.
+    start : Union[int, str, datetime], optional
+        Start of the time window to score: a time step index, or a time
+        (included). Unless `lazy`, only the window is read from the HDF file,
+        as with `cache`. By default the first time step.
+    end : Union[int, str, datetime], optional
+        End of the time window to score: a time step index (excluded), or a
+        time (included). By default the last time step.
+    workers : int, optional
+        Number of threads to score with, by default None, which scores
+        in-memory output in the calling thread and computes dask-backed output
+        with the default dask scheduler
 
     Returns
     -------
     Union[xr.Dataset, gpd.GeoDataFrame]
         Dataset or GeoDataFrame containing stability metrics
+
+    Raises
+    ------
+    ValueError
+        If the time window contains less than 2 time steps
     """
-    ds_refpoints = plan_hdf.reference_points_timeseries_output()
-    ds_refpoints, stability_vars = _calculate_stability(
-        ds_refpoints, ["Flow", "Water Surface"], unstable_threshold, range_threshold
-    )
+    time_window = None
+    if start is not None or end is not None:
+        time_window = _time_window(plan_hdf, start, end)
+    ds_refpoints = None
+    if _read_in_blocks(None, None, cache, time_window, lazy and not gdf):
+        ds_refpoints = _reference_stability(
+            plan_hdf,
+            "refpoints",
+            unstable_threshold,
+            range_threshold,
+            cache=cache,
+            time_window=time_window,
+            workers=workers,
+        )
+    if ds_refpoints is not None:
+        stability_vars = list(ds_refpoints.data_vars)
+    else:
+        ds_refpoints = plan_hdf.reference_points_timeseries_output()
+        ds_refpoints, stability_vars = _calculate_stability(
+            ds_refpoints,
+            ["Flow", "Water Surface"],
+            unstable_threshold,
+            range_threshold,
+            lazy=lazy and not gdf,
+            cache=cache,
+            cache_key={"plan_file": plan_hdf.filename, "element_type": "refpoints"},
+            time_window=time_window,
+            workers=workers,
+        )
 
     if gdf:
         gdf_refpoints = plan_hdf.reference_points()
@@ -145,15 +791,276 @@ def refpoints_stability(
     return ds_refpoints
 
 
+def _hdf_scores(
+    dataset: h5py.Dataset,
+    variable: str,
+    n_elements: int,
+    range_threshold: float,
+    chunk_size: Optional[int] = None,
+    max_memory: Optional[int] = None,
+    cache: Optional[ScoreCache] = None,
+    cache_key: Optional[dict] = None,
+    time_window: Optional[slice] = None,
+    workers: Optional[int] = None,
+    prescreen_threshold: Optional[float] = None,
+) -> np.ndarray:
+    """Score the leading elements of a (time, element) HDF5 dataset in blocks.
+
+    Parameters
+    ----------
+    dataset : h5py.Dataset
+        Dataset with dimensions (time, element)
+    variable : str
+        Name of the output variable, e.g. "Water Surface"
+    n_elements : int
+        Number of leading elements to score, e.g. excluding ghost cells
+    range_threshold : float
+        Threshold for range normalization in stability calculation
+    chunk_size : int, optional
+        Number of elements to read and score per block
+    max_memory : int, optional
+        Approximate working memory budget in bytes for scoring a block of elements
+    cache : ScoreCache, optional
+        Cache of stability scores; the dataset is not read if the scores are cached
+    cache_key : dict, optional
+        Plan file, element type and mesh name of the dataset in the cache,
+        required if `cache` is given
+    time_window : slice, optional
+        Time steps to score, by default all
+    workers : int, optional
+        Number of threads to score each block with, by default None
+    prescreen_threshold : float, optional
+        Unstable threshold of the pre-screen, by default None, which scores
+        every element. Pre-screened scores are not cached.
+
+    Returns
+    -------
+    np.ndarray
+        Stability score for each element
+    """
+    if cache is not None:
+        cache_key = {
+            **cache_key,
+            "variable": _cache_variable(variable, time_window),
+            "range_threshold": range_threshold,
+        }
+        scores = cache.get(**cache_key)
+        if scores is not None and scores.shape == (n_elements,):
+            return scores
+    if time_window is None:
+        time_window = slice(0, dataset.shape[0])
+    n_times = time_window.stop - time_window.start
+    size = _chunk_size(dataset, chunk_size, max_memory, n_times)
+    scores = _chunked_scores(
+        dataset,
+        n_elements,
+        range_threshold,
+        size,
+        time_window,
+        workers,
+        prescreen_threshold,
+    )
+    if cache is not None and prescreen_threshold is None:
+        cache.put(scores=scores, **cache_key)
+    return scores
+
+
+def _stability_dataset(
+    scores: dict[str, np.ndarray],
+    unstable_threshold: float,
+    dim: str,
+    coords: Optional[dict] = None,
+    attrs: Optional[dict] = None,
+) -> tuple[xr.Dataset, list[str]]:
+    """Build a Dataset of stability scores and flags from per-variable scores.
+
+    Parameters
+    ----------
+    scores : dict[str, np.ndarray]
+        Stability score for each element, for each variable
+    unstable_threshold : float
+        Threshold above which a stability score indicates instability
+    dim : str
+        Name of the element dimension, e.g. "cell_id"
+    coords : dict, optional
+        Extra coordinates along `dim`, by default None
+    attrs : dict, optional
+        Dataset attributes, by default None
+
+    Returns
+    -------
+    tuple[xr.Dataset, list[str]]
+        Dataset with stability scores and flags, and list of variable names
+    """
+    data_vars = {}
+    for var, var_scores in scores.items():
+        data_vars[var + " Stability Score"] = (dim, var_scores)
+        # NaN scores were proven stable by the pre-screen
+        data_vars[var + " is Stable"] = (dim, ~(var_scores >= unstable_threshold))
+    n_elements = len(next(iter(scores.values()))) if scores else 0
+    ds = xr.Dataset(
+        data_vars,
+        coords={dim: np.arange(n_elements), **(coords or {})},
+        attrs=attrs or {},
+    )
+    return ds, list(data_vars)
+
+
+def _mesh_stability_chunked(
+    plan_hdf: RasPlanHdf,
+    mesh_name: str,
+    element_type: str,
+    variables: Sequence[str],
+    unstable_threshold: float,
+    range_threshold: float,
+    chunk_size: Optional[int] = None,
+    max_memory: Optional[int] = None,
+    cache: Optional[ScoreCache] = None,
+    time_window: Optional[slice] = None,
+    workers: Optional[int] = None,
+    prescreen: bool = False,
+) -> tuple[xr.Dataset, list[str]]:
+    """Calculate mesh cell or face stability by reading elements in blocks.
+
+    Parameters
+    ----------
+    plan_hdf : RasPlanHdf
+        HEC-RAS plan HDF file object
+    mesh_name : str
+        Name of the mesh to analyze
+    element_type : str
+        "mesh_cells" or "mesh_faces"
+    variables : Sequence[str]
+        Time series output variables to analyze, e.g. ["Water Surface"]
+    unstable_threshold : float
+        Threshold above which a stability score indicates instability
+    range_threshold : float
+        Threshold for range normalization in stability calculation
+    chunk_size : int, optional
+        Number of elements to read and score per block
+    max_memory : int, optional
+        Approximate working memory budget in bytes for scoring a block of elements
+    cache : ScoreCache, optional
+        Cache of stability scores; the HDF file is not read if the scores are cached
+    time_window : slice, optional
+        Time steps to score, by default all
+    workers : int, optional
+        Number of threads to score each block with, by default None
+    prescreen : bool, optional
+        If True, only score elements whose score bound is at least
+        `unstable_threshold`, by default False
+
+    Returns
+    -------
+    tuple[xr.Dataset, list[str]]
+        Dataset with per-element stability scores and flags, and list of
+        variable names
+    """
+    scores = {}
+    for var in variables:
+        dataset = _mesh_timeseries_dataset(plan_hdf, mesh_name, var)
+        if element_type == "mesh_cells":
+            # Ghost cells at the end of the output are not scored
+            n_elements = _mesh_cell_count(plan_hdf, mesh_name)
+        else:
+            n_elements = dataset.shape[1]
+        scores[var] = _hdf_scores(
+            dataset,
+            var,
+            n_elements,
+            range_threshold,
+            chunk_size,
+            max_memory,
+            cache,
+            {
+                "plan_file": plan_hdf.filename,
+                "element_type": element_type,
+                "mesh_name": mesh_name,
+            },
+            time_window,
+            workers,
+            unstable_threshold if prescreen else None,
+        )
+    dim = "cell_id" if element_type == "mesh_cells" else "face_id"
+    return _stability_dataset(
+        scores, unstable_threshold, dim, attrs={"mesh_name": mesh_name}
+    )
+
+
+def _check_gdf_subset(gdf_subset: Optional[Union[str, int]]) -> None:
+    """Raise a ValueError if `gdf_subset` is not None, "unstable" or a positive int."""
+    if gdf_subset is not None and not (
+        gdf_subset == "unstable"
+        or (isinstance(gdf_subset, (int, np.integer)) and gdf_subset > 0)
+    ):
+        raise ValueError(
+            f"gdf_subset must be 'unstable' or a positive integer, got {gdf_subset!r}"
+        )
+
+
+def _subset_ids(
+    ds: xr.Dataset,
+    stability_vars: list[str],
+    n_elements: int,
+    gdf_subset: Optional[Union[str, int]],
+) -> Optional[np.ndarray]:
+    """Select the elements of a `gdf_subset`, over all scored variables.
+
+    Parameters
+    ----------
+    ds : xr.Dataset
+        Dataset with stability scores and flags
+    stability_vars : list[str]
+        Score and flag variable names, in pairs
+    n_elements : int
+        Number of leading elements to select from, e.g. excluding ghost cells
+    gdf_subset : Union[str, int], optional
+        "unstable" for the elements flagged unstable for any variable, or an
+        integer K for the K elements with the highest score of any variable
+
+    Returns
+    -------
+    Optional[np.ndarray]
+        IDs of the selected elements, or None for every element
+    """
+    if gdf_subset is None:
+        return None
+    if gdf_subset == "unstable":
+        stable = [ds[var].values[:n_elements] for var in stability_vars[1::2]]
+        return np.flatnonzero(~np.logical_and.reduce(stable))
+    # fmax ignores the NaN scores of pre-screened elements
+    scores = np.fmax.reduce(
+        [ds[var].values[:n_elements] for var in stability_vars[::2]]
+    )
+    # Stable sort, so ties keep element order; NaN scores sort last
+    return np.argsort(-scores, kind="stable")[:gdf_subset]
+
+
 def mesh_cells_stability(
     plan_hdf: RasPlanHdf,
     mesh_name: str,
     unstable_threshold: float = 0.002,
     range_threshold: float = 0.1,
     gdf: bool = False,
+    chunk_size: Optional[int] = None,
+    max_memory: Optional[int] = None,
+    lazy: bool = False,
+    cache: Optional[ScoreCache] = None,
+    gdf_subset: Optional[Union[str, int]] = None,
+    start: Optional[Union[int, str, datetime]] = None,
+    end: Optional[Union[int, str, datetime]] = None,
+    workers: Optional[int] = None,
+    prescreen: bool = False,
 ) -> Union[xr.Dataset, gpd.GeoDataFrame]:
     """Calculate stability metrics for mesh cells.
 
+    If `chunk_size`, `max_memory`, `cache` or a time window is given, the
+    Water Surface output is read from the HDF file in blocks of cells and only
+    the per-cell stability score and flag are kept, so memory use is bounded
+    regardless of the mesh size, cached scores are found before any output is
+    read and only the time window is read. The returned Dataset then does not
+    include the Water Surface time series or ghost cells.
+
     Parameters
     ----------
     plan_hdf : RasPlanHdf
@@ -166,21 +1073,876 @@ def mesh_cells_stability(
         Threshold for range normalization in stability calculation, by default 0.1
     gdf : bool, optional
         Return results as GeoDataFrame if True, by default False
+    chunk_size : int, optional
+        Number of cells to read and score per block, by default None
+    max_memory : int, optional
+        Approximate working memory budget in bytes for scoring a block of cells,
+        by default None
+    lazy : bool, optional
+        If True and `gdf` is False, return stability scores and flags as lazy
+        dask arrays, to be computed (in parallel, in one graph) when accessed or
+        written out. Ignored in chunked mode. Requires dask. By default False.
+    cache : ScoreCache, optional
+        On-disk cache of stability scores. Cached scores are reused, e.g. when
+        only `unstable_threshold` changes, and new scores are stored. Unless
+        `lazy`, the output is then read directly from the HDF file only if
+        its scores are not cached, and the returned Dataset only holds the
+        stability scores and flags. By default None.
+    gdf_subset : Union[str, int], optional
+        With `gdf`, build polygons only for a subset of cells: "unstable" for
+        the cells flagged unstable, or an integer K for the K cells with the
+        highest scores, in descending order of score. By default None, which
+        returns every cell.
+    start : Union[int, str, datetime], optional
+        Start of the time window to score: a time step index, or a time
+        (included). Unless `lazy`, only the window is read from the HDF file,
+        as with `cache`. By default the first time step.
+    end : Union[int, str, datetime], optional
+        End of the time window to score: a time step index (excluded), or a
+        time (included). By default the last time step.
+    workers : int, optional
+        Number of threads to score with, by default None, which scores
+        in-memory output in the calling thread and computes dask-backed output
+        with the default dask scheduler
+    prescreen : bool, optional
+        If True, first bound the score of every cell in a cheaper pass and
+        only compute the full score of cells whose bound is at least
+        `unstable_threshold`. Flags are unchanged; cells proven stable by
+        their bound have a NaN score, and sort last with an integer
+        `gdf_subset`. Pre-screened scores are not cached. By default False.
 
     Returns
     -------
     Union[xr.Dataset, gpd.GeoDataFrame]
-        Dataset or GeoDataFrame containing stability metrics
+        Dataset or GeoDataFrame containing stability metrics. Polygons are
+        built only for the target mesh and scores are joined by cell position.
+
+    Raises
+    ------
+    ValueError
+        If `gdf_subset` is not "unstable" or a positive integer, or if the
+        time window contains less than 2 time steps
     """
-    ds_mesh = plan_hdf.mesh_cells_timeseries_output(mesh_name)
-    ds_mesh, stability_vars = _calculate_stability(
-        ds_mesh, ["Water Surface"], unstable_threshold, range_threshold
-    )
+    _check_gdf_subset(gdf_subset)
+    time_window = None
+    if start is not None or end is not None:
+        time_window = _time_window(plan_hdf, start, end)
+    if _read_in_blocks(chunk_size, max_memory, cache, time_window, lazy and not gdf):
+        ds_mesh, stability_vars = _mesh_stability_chunked(
+            plan_hdf,
+            mesh_name,
+            "mesh_cells",
+            ["Water Surface"],
+            unstable_threshold,
+            range_threshold,
+            chunk_size,
+            max_memory,
+            cache,
+            time_window,
+            workers,
+            prescreen,
+        )
+    else:
+        ds_mesh = plan_hdf.mesh_cells_timeseries_output(mesh_name)
+        ds_mesh, stability_vars = _calculate_stability(
+            ds_mesh,
+            ["Water Surface"],
+            unstable_threshold,
+            range_threshold,
+            lazy=lazy and not gdf,
+            cache=cache,
+            cache_key={
+                "plan_file": plan_hdf.filename,
+                "element_type": "mesh_cells",
+                "mesh_name": mesh_name,
+            },
+            time_window=time_window,
+            workers=workers,
+            prescreen=prescreen,
+        )
 
     if gdf:
-        gdf_mesh = plan_hdf.mesh_cell_polygons()
-        gdf_mesh = gdf_mesh[gdf_mesh["mesh_name"] == mesh_name]
+        n_cells = _mesh_cell_count(plan_hdf, mesh_name)
+        cell_ids = _subset_ids(ds_mesh, stability_vars, n_cells, gdf_subset)
+        gdf_mesh = _mesh_cell_polygons(plan_hdf, mesh_name, cell_ids)
         for stabvar in stability_vars:
-            gdf_mesh[_reformat_var_name(stabvar)] = ds_mesh[stabvar].to_series()
+            values = ds_mesh[stabvar].values[:n_cells]
+            gdf_mesh[_reformat_var_name(stabvar)] = (
+                values if cell_ids is None else values[cell_ids]
+            )
         return gdf_mesh
     return ds_mesh
+
+
+def mesh_faces_stability(
+    plan_hdf: RasPlanHdf,
+    mesh_name: str,
+    unstable_threshold: float = 0.002,
+    range_threshold: float = 0.1,
+    gdf: bool = False,
+    chunk_size: Optional[int] = None,
+    max_memory: Optional[int] = None,
+    lazy: bool = False,
+    cache: Optional[ScoreCache] = None,
+    gdf_subset: Optional[Union[str, int]] = None,
+    start: Optional[Union[int, str, datetime]] = None,
+    end: Optional[Union[int, str, datetime]] = None,
+    workers: Optional[int] = None,
+    prescreen: bool = False,
+    variables: Sequence[str] = MESH_FACE_VARIABLES,
+) -> Union[xr.Dataset, gpd.GeoDataFrame]:
+    """Calculate stability metrics for mesh faces.
+
+    Meshes have more faces than cells, so large meshes are best analyzed with
+    `chunk_size` or `max_memory`: each variable is then read from the HDF file
+    in blocks of faces, as in `mesh_cells_stability`, and the returned Dataset
+    only holds the per-face stability scores and flags.
+
+    Parameters
+    ----------
+    plan_hdf : RasPlanHdf
+        HEC-RAS plan HDF file object
+    mesh_name : str
+        Name of the mesh to analyze
+    unstable_threshold : float, optional
+        Threshold above which a stability score indicates instability, by default 0.002
+    range_threshold : float, optional
+        Threshold for range normalization in stability calculation, by default 0.1
+    gdf : bool, optional
+        Return results as GeoDataFrame if True, by default False
+    chunk_size : int, optional
+        Number of faces to read and score per block, by default None
+    max_memory : int, optional
+        Approximate working memory budget in bytes for scoring a block of faces,
+        by default None
+    lazy : bool, optional
+        If True and `gdf` is False, return stability scores and flags as lazy
+        dask arrays. Ignored in chunked mode. Requires dask. By default False.
+    cache : ScoreCache, optional
+        On-disk cache of stability scores. Unless `lazy`, faces are then read
+        in blocks as in chunked mode, and only if their scores are not cached.
+        By default None.
+    gdf_subset : Union[str, int], optional
+        With `gdf`, build lines only for a subset of faces: "unstable" for the
+        faces flagged unstable for any variable, or an integer K for the K
+        faces with the highest score of any variable, in descending order.
+        By default None, which returns every face.
+    start : Union[int, str, datetime], optional
+        Start of the time window to score: a time step index, or a time
+        (included). Unless `lazy`, only the window is read from the HDF file,
+        as with `cache`. By default the first time step.
+    end : Union[int, str, datetime], optional
+        End of the time window to score: a time step index (excluded), or a
+        time (included). By default the last time step.
+    workers : int, optional
+        Number of threads to score with, by default None
+    prescreen : bool, optional
+        If True, only compute the full score of faces whose score bound is at
+        least `unstable_threshold`; the others have a NaN score. By default False.
+    variables : Sequence[str], optional
+        Face time series output variables to analyze, those missing from the
+        plan are skipped, by default `MESH_FACE_VARIABLES`
+
+    Returns
+    -------
+    Union[xr.Dataset, gpd.GeoDataFrame]
+        Dataset or GeoDataFrame containing stability metrics, with dimension
+        or column "face_id". Lines are built only for the target mesh.
+
+    Raises
+    ------
+    ValueError
+        If none of `variables` is in the face output of the mesh, if
+        `gdf_subset` is not "unstable" or a positive integer, or if the time
+        window contains less than 2 time steps
+    """
+    _check_gdf_subset(gdf_subset)
+    output = plan_hdf.get(
+        f"{RasPlanHdf.UNSTEADY_TIME_SERIES_PATH}/2D Flow Areas/{mesh_name}"
+    )
+    variables = [var for var in variables if output is not None and var in output]
+    if not variables:
+        raise ValueError(
+            f"Could not find face output for mesh '{mesh_name}' in the Plan HDF file."
+        )
+    time_window = None
+    if start is not None or end is not None:
+        time_window = _time_window(plan_hdf, start, end)
+    if _read_in_blocks(chunk_size, max_memory, cache, time_window, lazy and not gdf):
+        ds_faces, stability_vars = _mesh_stability_chunked(
+            plan_hdf,
+            mesh_name,
+            "mesh_faces",
+            variables,
+            unstable_threshold,
+            range_threshold,
+            chunk_size,
+            max_memory,
+            cache,
+            time_window,
+            workers,
+            prescreen,
+        )
+    else:
+        ds_faces = plan_hdf.mesh_faces_timeseries_output(mesh_name)
+        ds_faces, stability_vars = _calculate_stability(
+            ds_faces,
+            variables,
+            unstable_threshold,
+            range_threshold,
+            lazy=lazy and not gdf,
+            cache=cache,
+            cache_key={
+                "plan_file": plan_hdf.filename,
+                "element_type": "mesh_faces",
+                "mesh_name": mesh_name,
+            },
+            time_window=time_window,
+            workers=workers,
+            prescreen=prescreen,
+        )
+
+    if gdf:
+        n_faces = ds_faces.sizes["face_id"]
+        face_ids = _subset_ids(ds_faces, stability_vars, n_faces, gdf_subset)
+        gdf_faces = _mesh_face_lines(plan_hdf, mesh_name, face_ids)
+        for stabvar in stability_vars:
+            values = ds_faces[stabvar].values
+            gdf_faces[_reformat_var_name(stabvar)] = (
+                values if face_ids is None else values[face_ids]
+            )
+        return gdf_faces
+    return ds_faces
+
+
+def cross_sections_stability(
+    plan_hdf: RasPlanHdf,
+    unstable_threshold: float = 0.002,
+    range_threshold: float = 0.1,
+    gdf: bool = False,
+    max_memory: Optional[int] = None,
+    cache: Optional[ScoreCache] = None,
+    start: Optional[Union[int, str, datetime]] = None,
+    end: Optional[Union[int, str, datetime]] = None,
+    workers: Optional[int] = None,
+    prescreen: bool = False,
+    variables: Sequence[str] = CROSS_SECTION_VARIABLES,
+) -> Union[xr.Dataset, gpd.GeoDataFrame]:
+    """Calculate stability metrics for 1D cross sections.
+
+    Each variable is read for every cross section in one HDF read, or in
+    blocks of cross sections within `max_memory`, and scored in one batched
+    call.
+
+    Parameters
+    ----------
+    plan_hdf : RasPlanHdf
+        HEC-RAS plan HDF file object
+    unstable_threshold : float, optional
+        Threshold above which a stability score indicates instability, by default 0.002
+    range_threshold : float, optional
+        Threshold for range normalization in stability calculation, by default 0.1
+    gdf : bool, optional
+        Return results joined to the cross section lines on River, Reach and
+        RS as a GeoDataFrame if True, by default False
+    max_memory : int, optional
+        Approximate working memory budget in bytes for scoring a block of cross
+        sections, by default None
+    cache : ScoreCache, optional
+        On-disk cache of stability scores, by default None
+    start : Union[int, str, datetime], optional
+        Start of the time window to score: a time step index, or a time
+        (included). By default the first time step.
+    end : Union[int, str, datetime], optional
+        End of the time window to score: a time step index (excluded), or a
+        time (included). By default the last time step.
+    workers : int, optional
+        Number of threads to score with, by default None
+    prescreen : bool, optional
+        If True, only compute the full score of cross sections whose score
+        bound is at least `unstable_threshold`; the others have a NaN score.
+        By default False.
+    variables : Sequence[str], optional
+        Cross section time series output variables to analyze, those missing
+        from the plan are skipped, by default `CROSS_SECTION_VARIABLES`
+
+    Returns
+    -------
+    Union[xr.Dataset, gpd.GeoDataFrame]
+        Dataset with dimension "xs_id" and "river", "reach" and "rs"
+        coordinates, or GeoDataFrame of the cross sections, containing
+        stability metrics
+
+    Raises
+    ------
+    ValueError
+        If none of `variables` is in the cross section output, if the time
+        window contains less than 2 time steps, or if `gdf` is True and the
+        cross sections with output do not match the cross section geometry
+    """
+    group = plan_hdf.get(f"{RasPlanHdf.UNSTEADY_TIME_SERIES_PATH}/Cross Sections")
+    variables = [var for var in variables if group is not None and var in group]
+    if not variables:
+        raise ValueError("Could not find cross section output in the Plan HDF file.")
+    time_window = None
+    if start is not None or end is not None:
+        time_window = _time_window(plan_hdf, start, end)
+    scores = {}
+    for var in variables:
+        scores[var] = _hdf_scores(
+            group[var],
+            var,
+            group[var].shape[1],
+            range_threshold,
+            max_memory=max_memory,
+            cache=cache,
+            cache_key={
+                "plan_file": plan_hdf.filename,
+                "element_type": "cross_sections",
+            },
+            time_window=time_window,
+            workers=workers,
+            prescreen_threshold=unstable_threshold if prescreen else None,
+        )
+    n_xs = len(scores[variables[0]])
+    coords = {}
+    xs_attrs = plan_hdf.get(f"{RasPlanHdf.CROSS_SECTIONS_PATH}/Attributes")
+    if xs_attrs is not None and len(xs_attrs) == n_xs:
+        xs_attrs = xs_attrs[()]
+        for column in ["River", "Reach", "RS"]:
+            if column in xs_attrs.dtype.names:
+                coords[column.lower()] = (
+                    "xs_id",
+                    [value.decode("utf-8").strip() for value in xs_attrs[column]],
+                )
+    ds_xs, stability_vars = _stability_dataset(
+        scores, unstable_threshold, "xs_id", coords=coords
+    )
+
+    if gdf:
+        key = ["River", "Reach", "RS"]
+        if not all(column.lower() in coords for column in key):
+            raise ValueError(
+                f"The {n_xs} cross sections with output do not match the cross"
+                " section geometry of the Plan HDF file."
+            )
+        table = pd.DataFrame(
+            {
+                **{column: ds_xs[column.lower()].values for column in key},
+                **{
+                    _reformat_var_name(var): ds_xs[var].values for var in stability_vars
+                },
+            }
+        )
+        gdf_xs = plan_hdf.cross_sections()
+        gdf_xs[key] = gdf_xs[key].astype(str).apply(lambda column: column.str.strip())
+        return gdf_xs.merge(table, on=key, how="left", validate="one_to_one")
+    return ds_xs
+
+
+class _StructureColumns:
+    """A (time, structure) view of one variable of the structure output.
+
+    Each structure has its own "Structure Variables" dataset, with one column
+    per variable. Indexing the view like a 2D HDF5 dataset reads the column of
+    the variable from each structure of the block, so the structures can be
+    read and scored in blocks, like mesh and cross section output.
+
+    Parameters
+    ----------
+    datasets : list[h5py.Dataset]
+        "Structure Variables" dataset of each structure
+    columns : list[int]
+        Column of the variable in each dataset
+    """
+
+    chunks = None
+
+    def __init__(self, datasets: list[h5py.Dataset], columns: list[int]):
+        self.datasets = datasets
+        self.columns = columns
+        self.shape = (datasets[0].shape[0], len(datasets))
+        self.dtype = np.result_type(*(dataset.dtype for dataset in datasets))
+
+    def __getitem__(self, key: tuple[slice, slice]) -> np.ndarray:
+        """Read a (time, structure) block of the variable."""
+        time_window, structures = key
+        return np.column_stack(
+            [
+                self.datasets[i][time_window, self.columns[i]]
+                for i in range(len(self.datasets))[structures]
+            ]
+        )
+
+
+def _structure_attributes(
+    plan_hdf: RasPlanHdf, types: list[str], names: list[str]
+) -> dict[str, list[str]]:
+    """Look up the geometry attributes of the structures with output.
+
+    Inline and lateral structure output is named after the River, Reach and RS
+    of the structure, and SA/2D area connection output after the Connection.
+    Structures that are not found in the geometry have empty attributes.
+
+    Parameters
+    ----------
+    plan_hdf : RasPlanHdf
+        HEC-RAS plan HDF file object
+    types : list[str]
+        Type of each structure: "Inline", "Lateral" or "Connection"
+    names : list[str]
+        Name of the output group of each structure
+
+    Returns
+    -------
+    dict[str, list[str]]
+        River, Reach, RS and Connection of each structure
+    """
+    fields = ["River", "Reach", "RS", "Connection"]
+    records = {}
+    attributes = plan_hdf.get(f"{RasPlanHdf.GEOM_STRUCTURES_PATH}/Attributes")
+    if attributes is not None:
+        attributes = attributes[()]
+        for row in attributes:
+            record = {
+                field: row[field].decode("utf-8").strip()
+                if field in attributes.dtype.names
+                else ""
+                for field in ["Type", *fields]
+            }
+            if record["Type"] == "Connection":
+                name = record["Connection"]
+            else:
+                name = " ".join(record[field] for field in ["River", "Reach", "RS"])
+            records.setdefault((record["Type"], name), record)
+    empty = dict.fromkeys(fields, "")
+    matched = [
+        records.get((structure_type, name), empty)
+        for structure_type, name in zip(types, names)
+    ]
+    return {field: [record[field] for record in matched] for field in fields}
+
+
+def structures_stability(
+    plan_hdf: RasPlanHdf,
+    unstable_threshold: float = 0.002,
+    range_threshold: float = 0.1,
+    gdf: bool = False,
+    max_memory: Optional[int] = None,
+    cache: Optional[ScoreCache] = None,
+    start: Optional[Union[int, str, datetime]] = None,
+    end: Optional[Union[int, str, datetime]] = None,
+    workers: Optional[int] = None,
+    prescreen: bool = False,
+    variables: Sequence[str] = STRUCTURE_VARIABLES,
+) -> Union[xr.Dataset, gpd.GeoDataFrame]:
+    """Calculate stability metrics for 1D structures and SA/2D connections.
+
+    Each variable of the "Structure Variables" output of every inline
+    structure, lateral structure and SA/2D area connection is read as one
+    (time, structure) block, or in blocks of structures within `max_memory`,
+    and scored in one batched call. Structures without output for a variable
+    have a NaN score for it and are flagged stable.
+
+    Parameters
+    ----------
+    plan_hdf : RasPlanHdf
+        HEC-RAS plan HDF file object
+    unstable_threshold : float, optional
+        Threshold above which a stability score indicates instability, by default 0.002
+    range_threshold : float, optional
+        Threshold for range normalization in stability calculation, by default 0.1
+    gdf : bool, optional
+        Return results joined to the structure centerlines as a GeoDataFrame
+        if True, by default False. Structures are matched on their Type,
+        River, Reach, RS and Connection attributes; unmatched structures have
+        no geometry.
+    max_memory : int, optional
+        Approximate working memory budget in bytes for scoring a block of
+        structures, by default None
+    cache : ScoreCache, optional
+        On-disk cache of stability scores, by default None
+    start : Union[int, str, datetime], optional
+        Start of the time window to score: a time step index, or a time
+        (included). By default the first time step.
+    end : Union[int, str, datetime], optional
+        End of the time window to score: a time step index (excluded), or a
+        time (included). By default the last time step.
+    workers : int, optional
+        Number of threads to score with, by default None
+    prescreen : bool, optional
+        If True, only compute the full score of structures whose score bound
+        is at least `unstable_threshold`; the others have a NaN score.
+        By default False.
+    variables : Sequence[str], optional
+        Structure variables to analyze, by default `STRUCTURE_VARIABLES`
+
+    Returns
+    -------
+    Union[xr.Dataset, gpd.GeoDataFrame]
+        Dataset with dimension "structure_id", "structure_type" ("Inline",
+        "Lateral" or "Connection") and "structure_name" coordinates and
+        "river", "reach", "rs" and "connection" coordinates from the structure
+        geometry, or GeoDataFrame, containing stability metrics
+
+    Raises
+    ------
+    ValueError
+        If the plan has no structure output, or if the time window contains
+        less than 2 time steps
+    """
+    time_window = None
+    if start is not None or end is not None:
+        time_window = _time_window(plan_hdf, start, end)
+    types, names = [], []
+    outputs = {var: ([], [], []) for var in variables}
+    for group_name, structure_type in STRUCTURE_OUTPUT_GROUPS.items():
+        group = plan_hdf.get(f"{RasPlanHdf.UNSTEADY_TIME_SERIES_PATH}/{group_name}")
+        if group is None:
+            continue
+        for name, structure in group.items():
+            dataset = structure.get("Structure Variables")
+            if dataset is None:
+                continue
+            labels = [
+                label.decode("utf-8") for label in dataset.attrs["Variable_Unit"][:, 0]
+            ]
+            for var in variables:
+                if var in labels:
+                    ids, datasets, columns = outputs[var]
+                    ids.append(len(names))
+                    datasets.append(dataset)
+                    columns.append(labels.index(var))
+            types.append(structure_type)
+            names.append(name)
+    if not names:
+        raise ValueError("Could not find structure output in the Plan HDF file.")
+
+    scores = {}
+    for var, (ids, datasets, columns) in outputs.items():
+        if not ids:
+            continue
+        scores[var] = np.full(len(names), np.nan)
+        scores[var][ids] = _hdf_scores(
+            _StructureColumns(datasets, columns),
+            var,
+            len(ids),
+            range_threshold,
+            max_memory=max_memory,
+            cache=cache,
+            cache_key={"plan_file": plan_hdf.filename, "element_type": "structures"},
+            time_window=time_window,
+            workers=workers,
+            prescreen_threshold=unstable_threshold if prescreen else None,
+        )
+    dim = "structure_id"
+    attributes = _structure_attributes(plan_hdf, types, names)
+    ds_structures, stability_vars = _stability_dataset(
+        scores,
+        unstable_threshold,
+        dim,
+        coords={
+            "structure_type": (dim, types),
+            "structure_name": (dim, names),
+            **{field.lower(): (dim, values) for field, values in attributes.items()},
+        },
+    )
+
+    if gdf:
+        key = ["Type", "River", "Reach", "RS", "Connection"]
+        table = pd.DataFrame(
+            {
+                dim: np.arange(len(names)),
+                "Type": types,
+                **attributes,
+                "structure_name": names,
+                **{
+                    _reformat_var_name(var): ds_structures[var].values
+                    for var in stability_vars
+                },
+            }
+        )
+        gdf_structures = plan_hdf.structures()
+        gdf_structures[key] = (
+            gdf_structures[key].astype(str).apply(lambda column: column.str.strip())
+        )
+        return gdf_structures.merge(table, on=key, how="right")
+    return ds_structures
+
+
+ELEMENT_TYPES = ("reflines", "refpoints", "mesh_cells")
+
+
+class PlanStability:
+    """Stability scores and flags of every element of a plan, from `plan_stability`.
+
+    Parameters
+    ----------
+    plan_file : str
+        Path to the HEC-RAS plan HDF file
+    reflines : xr.Dataset, optional
+        Reference line stability, with dimension "refln_id", or None if the
+        plan has no reference line output or they were not analyzed
+    refpoints : xr.Dataset, optional
+        Reference point stability, with dimension "refpt_id", or None
+    mesh_cells : dict[str, xr.Dataset], optional
+        Mesh cell stability for each mesh, with dimension "cell_id"
+    """
+
+    def __init__(
+        self,
+        plan_file: str,
+        reflines: Optional[xr.Dataset] = None,
+        refpoints: Optional[xr.Dataset] = None,
+        mesh_cells: Optional[dict[str, xr.Dataset]] = None,
+    ):
+        self.plan_file = plan_file
+        self.reflines = reflines
+        self.refpoints = refpoints
+        self.mesh_cells = {} if mesh_cells is None else mesh_cells
+
+    def _datasets(self) -> list[tuple[str, Optional[str], xr.Dataset]]:
+        """Return the element type, mesh name and Dataset of each element group."""
+        datasets = [
+            (element_type, None, ds)
+            for element_type, ds in (
+                ("reflines", self.reflines),
+                ("refpoints", self.refpoints),
+            )
+            if ds is not None
+        ]
+        datasets += [
+            ("mesh_cells", mesh_name, ds) for mesh_name, ds in self.mesh_cells.items()
+        ]
+        return datasets
+
+    def summary(self) -> pd.DataFrame:
+        """Return the number of unstable elements for each element group and variable.
+
+        Returns
+        -------
+        pd.DataFrame
+            One row per element type, mesh (for mesh cells) and variable, with
+            the number of elements "n_elements", the number of unstable
+            elements "n_unstable" and the highest score "max_score"
+        """
+        rows = []
+        for element_type, mesh_name, ds in self._datasets():
+            for var in ds.data_vars:
+                if not var.endswith(" Stability Score"):
+                    continue
+                variable = var[: -len(" Stability Score")]
+                scores = ds[var].values
+                rows.append(
+                    {
+                        "element_type": element_type,
+                        "mesh_name": mesh_name,
+                        "variable": variable,
+                        "n_elements": len(scores),
+                        "n_unstable": int(np.sum(~ds[variable + " is Stable"].values)),
+                        "max_score": float(scores.max()) if len(scores) else np.nan,
+                    }
+                )
+        return pd.DataFrame(
+            rows,
+            columns=[
+                "element_type",
+                "mesh_name",
+                "variable",
+                "n_elements",
+                "n_unstable",
+                "max_score",
+            ],
+        )
+
+    @property
+    def is_stable(self) -> bool:
+        """True if every analyzed element of the plan is stable."""
+        return bool((self.summary()["n_unstable"] == 0).all())
+
+    def __repr__(self) -> str:
+        """Summarize the analyzed element groups."""
+        return f"PlanStability({self.plan_file!r})\n{self.summary().to_string()}"
+
+
+def _reference_stability(
+    plan_hdf: RasPlanHdf,
+    element_type: str,
+    unstable_threshold: float,
+    range_threshold: float,
+    max_memory: Optional[int] = None,
+    cache: Optional[ScoreCache] = None,
+    time_window: Optional[slice] = None,
+    workers: Optional[int] = None,
+) -> Optional[xr.Dataset]:
+    """Score the Flow and Water Surface output of reference lines or points.
+
+    Returns None if the plan has no output for this element type.
+    """
+    if element_type == "reflines":
+        output_path, abbrev = RasPlanHdf.REFERENCE_LINES_OUTPUT_PATH, "refln"
+    else:
+        output_path, abbrev = RasPlanHdf.REFERENCE_POINTS_OUTPUT_PATH, "refpt"
+    group = plan_hdf.get(output_path)
+    if group is None:
+        return None
+    labels = [name.decode("utf-8").split("|") for name in group["Name"][()]]
+    names = [label[0] for label in labels]
+    mesh_names = [label[1] for label in labels]
+    scores = {}
+    for var in ["Flow", "Water Surface"]:
+        if var in group:
+            scores[var] = _hdf_scores(
+                group[var],
+                var,
+                len(names),
+                range_threshold,
+                max_memory=max_memory,
+                cache=cache,
+                cache_key={
+                    "plan_file": plan_hdf.filename,
+                    "element_type": element_type,
+                },
+                time_window=time_window,
+                workers=workers,
+            )
+    if not scores:
+        return None
+    dim = f"{abbrev}_id"
+    ds, _ = _stability_dataset(
+        scores,
+        unstable_threshold,
+        dim,
+        coords={
+            f"{abbrev}_name": (dim, names),
+            "mesh_name": (dim, mesh_names),
+        },
+    )
+    return ds
+
+
+def plan_stability(
+    plan_hdf: RasPlanHdf,
+    unstable_threshold: float = 0.002,
+    range_threshold: float = 0.1,
+    element_types: Sequence[str] = ELEMENT_TYPES,
+    mesh_names: Optional[Sequence[str]] = None,
+    chunk_size: Optional[int] = None,
+    max_memory: Optional[int] = None,
+    cache: Optional[ScoreCache] = None,
+    start: Optional[Union[int, str, datetime]] = None,
+    end: Optional[Union[int, str, datetime]] = None,
+    workers: Optional[int] = None,
+) -> PlanStability:
+    """Calculate stability metrics for every reference line, reference point and mesh cell.
+
+    Every output dataset is read directly from the HDF file once (in blocks of
+    elements if `chunk_size` or `max_memory` is given), and the time stamps are
+    only parsed if the time window is given as times. The Flow and Water
+    Surface output of reference lines and points and the Water Surface output
+    of the cells of every 2D mesh are scored. Only the scores and flags are
+    kept, not the time series.
+
+    Parameters
+    ----------
+    plan_hdf : RasPlanHdf
+        HEC-RAS plan HDF file object
+    unstable_threshold : float, optional
+        Threshold above which a stability score indicates instability, by default 0.002
+    range_threshold : float, optional
+        Threshold for range normalization in stability calculation, by default 0.1
+    element_types : Sequence[str], optional
+        Element types to analyze, any of "reflines", "refpoints" and "mesh_cells",
+        by default all
+    mesh_names : Sequence[str], optional
+        Names of the 2D meshes to analyze, by default every mesh with Water
+        Surface output
+    chunk_size : int, optional
+        Number of mesh cells to read and score per block, by default None
+    max_memory : int, optional
+        Approximate working memory budget in bytes for scoring a block of
+        elements, by default None
+    cache : ScoreCache, optional
+        On-disk cache of stability scores to reuse and update, by default None
+    start : Union[int, str, datetime], optional
+        Start of the time window to score: a time step index, or a time
+        (included). By default the first time step.
+    end : Union[int, str, datetime], optional
+        End of the time window to score: a time step index (excluded), or a
+        time (included). By default the last time step.
+    workers : int, optional
+        Number of threads to score each block of elements with, by default
+        None, which scores in the calling thread
+
+    Returns
+    -------
+    PlanStability
+        Stability scores and flags of every analyzed element
+
+    Raises
+    ------
+    ValueError
+        If an element type is not recognized, a requested mesh is not found,
+        or the time window contains less than 2 time steps
+
+    Examples
+    --------
+    >>> with RasPlanHdf("Muncie.p04.hdf") as plan_hdf:
+    ...     result = plan_stability(plan_hdf)
+    >>> result.summary()
+    >>> result.mesh_cells["2D Interior Area"]["Water Surface Stability Score"]
+    """
+    unknown = set(element_types) - set(ELEMENT_TYPES)
+    if unknown:
+        raise ValueError(f"Unknown element types: {sorted(unknown)}")
+    time_window = None
+    if start is not None or end is not None:
+        time_window = _time_window(plan_hdf, start, end)
+
+    references = {}
+    for element_type in ("reflines", "refpoints"):
+        if element_type in element_types:
+            references[element_type] = _reference_stability(
+                plan_hdf,
+                element_type,
+                unstable_threshold,
+                range_threshold,
+                max_memory,
+                cache,
+                time_window,
+                workers,
+            )
+
+    mesh_cells = {}
+    if "mesh_cells" in element_types:
+        names = mesh_names
+        if names is None:
+            names = [
+                mesh_name
+                for mesh_name in plan_hdf.mesh_area_names()
+                if plan_hdf.get(
+                    f"{RasPlanHdf.UNSTEADY_TIME_SERIES_PATH}/2D Flow Areas/"
+                    f"{mesh_name}/Water Surface"
+                )
+                is not None
+            ]
+        for mesh_name in names:
+            mesh_cells[mesh_name], _ = _mesh_stability_chunked(
+                plan_hdf,
+                mesh_name,
+                "mesh_cells",
+                ["Water Surface"],
+                unstable_threshold,
+                range_threshold,
+                chunk_size,
+                max_memory,
+                cache,
+                time_window,
+                workers,
+            )
+    return PlanStability(
+        plan_hdf.filename,
+        reflines=references.get("reflines"),
+        refpoints=references.get("refpoints"),
+        mesh_cells=mesh_cells,
+    )
@@ -0,0 +1,174 @@
+"""Online (streaming) hydrograph stability scoring."""
+
+import numpy as np
+import numpy.typing as npt
+
+from typing import Tuple, Union
+
+
+class StabilityAccumulator:
+    """Accumulate slope change stability scores one time step at a time.
+
+    The slope change score is the sum of the magnitude of slope sign changes,
+    normalized by the hydrograph range and length. It only depends on the
+    running minimum and maximum, the last value and the last first difference,
+    so it can be computed incrementally in O(elements) memory, without holding
+    the full time series. Scores match `hydrostab.stability_score`.
+
+    Parameters
+    ----------
+    shape : Union[int, Tuple[int, ...]], optional
+        Shape of the values at each time step, e.g. the number of mesh cells.
+        By default (), for a single hydrograph.
+    range_threshold : float, optional
+        If the range of values in a hydrograph is less than this threshold,
+        its score is 0.0, by default 0.1
+
+    Examples
+    --------
+    >>> acc = StabilityAccumulator(shape=n_cells)
+    >>> for values in water_surface_by_time_step:
+    ...     acc.update(values)
+    >>> scores = acc.score()
+    """
+
+    def __init__(
+        self, shape: Union[int, Tuple[int, ...]] = (), range_threshold: float = 0.1
+    ):
+        self.shape = np.empty(shape, dtype=np.bool_).shape
+        self.range_threshold = range_threshold
+        self.count = 0
+        self._min = np.full(self.shape, np.inf)
+        self._max = np.full(self.shape, -np.inf)
+        self._raw_sum = np.zeros(self.shape)
+        self._last_value = np.zeros(self.shape)
+        self._last_diff = np.zeros(self.shape)
+
+    def _coerce(self, values: npt.ArrayLike, shape: Tuple[int, ...]) -> np.ndarray:
+        values = np.asarray(values, dtype=np.float64)
+        if values.shape != shape:
+            raise ValueError(f"Expected values of shape {shape}, got {values.shape}")
+        if not np.all(np.isfinite(values)):
+            raise ValueError("Input contains NaN or infinite values")
+        return values
+
+    def update(self, values: npt.ArrayLike) -> None:
+        """Add the values of one time step.
+
+        Parameters
+        ----------
+        values : npt.ArrayLike
+            Hydrograph values at the time step, with the accumulator shape
+
+        Raises
+        ------
+        ValueError
+            If values have the wrong shape or contain NaN/infinite values
+        """
+        values = self._coerce(values, self.shape)
+        if self.count >= 1:
+            diff = values - self._last_value
+            if self.count >= 2:
+                sign_changes = np.sign(diff) != np.sign(self._last_diff)
+                self._raw_sum += np.where(
+                    sign_changes, np.abs(diff - self._last_diff), 0.0
+                )
+            self._last_diff = diff
+        np.minimum(self._min, values, out=self._min)
+        np.maximum(self._max, values, out=self._max)
+        # Copy, as callers commonly reuse one read buffer for every time step
+        self._last_value = values.copy()
+        self.count += 1
+
+    def extend(self, values: npt.ArrayLike, axis: int = 0) -> None:
+        """Add the values of several consecutive time steps at once.
+
+        Parameters
+        ----------
+        values : npt.ArrayLike
+            Hydrograph values for a block of time steps, with time along `axis`
+            and the accumulator shape along the remaining axes
+        axis : int, optional
+            Time axis of the values array, by default 0
+
+        Raises
+        ------
+        ValueError
+            If values have the wrong shape or contain NaN/infinite values
+        """
+        values = np.moveaxis(np.asarray(values, dtype=np.float64), axis, 0)
+        values = self._coerce(values, (values.shape[0],) + self.shape)
+        if values.shape[0] == 0:
+            return
+
+        # Continue the first differences and their signs from the previous block
+        if self.count >= 1:
+            diff = np.diff(values, axis=0, prepend=self._last_value[np.newaxis])
+        else:
+            diff = np.diff(values, axis=0)
+        if self.count >= 2:
+            diff = np.concatenate([self._last_diff[np.newaxis], diff])
+
+        if diff.shape[0] >= 2:
+            sign = np.sign(diff)
+            sign_changes = sign[1:] != sign[:-1]
+            sign_changes_magnitude = np.abs(np.diff(diff, axis=0))
+            self._raw_sum += np.sum(sign_changes_magnitude, axis=0, where=sign_changes)
+        # Copy the last time step rather than keeping views into the block, so
+        # the block can be freed or its buffer reused by the caller
+        if diff.shape[0] >= 1:
+            self._last_diff = diff[-1].copy()
+        np.minimum(self._min, values.min(axis=0), out=self._min)
+        np.maximum(self._max, values.max(axis=0), out=self._max)
+        self._last_value = values[-1].copy()
+        self.count += values.shape[0]
+
+    def score(self) -> Union[float, npt.NDArray[np.float64]]:
+        """Return the stability scores of the values accumulated so far.
+
+        Returns
+        -------
+        Union[float, npt.NDArray[np.float64]]
+            Stability score, or an array of scores with the accumulator shape
+
+        Raises
+        ------
+        ValueError
+            If less than 2 time steps have been accumulated
+        """
+        if self.count < 2:
+            raise ValueError("Input must have at least 2 points")
+        h_range = self._max - self._min
+        flat = h_range < self.range_threshold
+        scores = np.divide(
+            self._raw_sum,
+            h_range * self.count,
+            out=np.zeros(self.shape),
+            where=~flat,
+        )
+        if scores.ndim == 0:
+            return float(scores)
+        return scores
+
+    def stability(
+        self, unstable_threshold: float = 0.002
+    ) -> Tuple[
+        Union[bool, npt.NDArray[np.bool_]], Union[float, npt.NDArray[np.float64]]
+    ]:
+        """Classify the values accumulated so far as stable or unstable.
+
+        Parameters
+        ----------
+        unstable_threshold : float, optional
+            Threshold above which a stability score indicates instability,
+            by default 0.002
+
+        Returns
+        -------
+        is_stable : Union[bool, npt.NDArray[np.bool_]]
+            True if the hydrograph is classified as stable, False otherwise
+        score : Union[float, npt.NDArray[np.float64]]
+            Stability score based on slope sign changes
+        """
+        score = self.score()
+        return score < unstable_threshold, score
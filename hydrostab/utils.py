@@ -4,7 +4,11 @@ from __future__ import annotations
 
 import numpy as np
 import numpy.typing as npt
-import pandas as pd
+
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import pandas as pd
 
 
 def coerce_array(array: npt.ArrayLike) -> npt.NDArray[np.float64]:
@@ -36,6 +40,8 @@ def coerce_dt_array(dt_array: npt.ArrayLike) -> pd.Series[pd.Timestamp]:
     dt_array = np.asarray(dt_array)  # Convert to NumPy array
     if dt_array.ndim != 1:
         raise ValueError("Input must be 1D")
+    import pandas as pd
+
     return pd.to_datetime(dt_array)
 
 
@@ -44,18 +50,29 @@ def coerce_dt_array(dt_array: npt.ArrayLike) -> pd.Series[pd.Timestamp]:
 import numpy as np
 import numpy.typing as npt
 
+from typing import Optional, Union
+
 
-def coerce_array(arr: npt.ArrayLike) -> npt.NDArray[np.float64]:
+def coerce_array(
+    arr: npt.ArrayLike, axis: Optional[int] = None
+) -> Union[npt.NDArray[np.float32], npt.NDArray[np.float64]]:
     """Convert input to numpy array and validate.
 
+    float32 and float64 arrays are used as they are, without a copy, so that
+    float32 model output is processed in float32. Other input is converted
+    to float64.
+
     Parameters
     ----------
     arr : npt.ArrayLike
         Input array to validate
+    axis : int, optional
+        Time axis of the array. If given, the array must have at least 2 points
+        along this axis; otherwise the array must have at least 2 points in total.
 
     Returns
     -------
-    npt.NDArray[np.float64]
+    Union[npt.NDArray[np.float32], npt.NDArray[np.float64]]
         Validated numpy array
 
     Raises
@@ -63,12 +80,22 @@ def coerce_array(arr: npt.ArrayLike) -> npt.NDArray[np.float64]:
     ValueError
         If array has less than 2 points or contains NaN/infinite values
     """
-    arr = np.asarray(arr, dtype=np.float64)
-
-    if arr.size < 2:
-        raise ValueError("Input must have at least 2 points")
-
-    if np.any(np.isnan(arr)) or np.any(np.isinf(arr)):
+    arr = np.asarray(arr)
+    if arr.dtype not in (np.float32, np.float64):
+        arr = arr.astype(np.float64)
+
+    if axis is None:
+        if arr.size < 2:
+            raise ValueError("Input must have at least 2 points")
+    else:
+        if arr.ndim == 0:
+            raise ValueError("Input must be at least 1D")
+        if arr.shape[axis] < 2:
+            raise ValueError("Input must have at least 2 points along the time axis")
+
+    # A finite sum proves that all values are finite without a full-size
+    # temporary; only an overflowing sum needs the element-wise check
+    if not np.isfinite(np.sum(arr, dtype=np.float64)) and not np.all(np.isfinite(arr)):
         raise ValueError("Input contains NaN or infinite values")
 
     return arr
@@ -0,0 +1,291 @@
+import numpy as np
+import pytest
+
+from datetime import datetime, timedelta
+
+
+BASE_OUTPUT_PATH = "Results/Unsteady/Output/Output Blocks/Base Output"
+TIME_SERIES_PATH = f"{BASE_OUTPUT_PATH}/Unsteady Time Series"
+FLOW_AREA_2D_PATH = "Geometry/2D Flow Areas"
+MESH_NAME = "TestMesh"
+
+
+def _hydrographs(
+    n_times: int, n_elements: int, unstable: np.ndarray, seed: int = 0
+) -> np.ndarray:
+    """Build smooth flood-wave hydrographs, with oscillations for unstable elements."""
+    rng = np.random.default_rng(seed)
+    t = np.linspace(0.0, 1.0, n_times)[:, None]
+    peak = rng.uniform(0.3, 0.6, n_elements)
+    base = rng.uniform(100.0, 200.0, n_elements)
+    amplitude = rng.uniform(5.0, 50.0, n_elements)
+    values = base + amplitude * np.exp(-(((t - peak) / 0.1) ** 2))
+    oscillation = 0.2 * amplitude * np.sin(np.arange(n_times) * np.pi / 2)[:, None]
+    values[:, unstable] += oscillation[:, unstable]
+    return values.astype(np.float32)
+
+
+def _write_timeseries(group, name: str, values: np.ndarray, units: str) -> None:
+    chunks = (min(values.shape[0], 16), min(values.shape[1], 64))
+    dataset = group.create_dataset(name, data=values, chunks=chunks)
+    dataset.attrs["Units"] = np.bytes_(units)
+
+
+def _write_polylines(group, lines: list) -> None:
+    info = []
+    points = []
+    for i, line in enumerate(lines):
+        info.append((len(points), len(line), i, 1))
+        points.extend(line)
+    group.create_dataset("Polyline Info", data=np.array(info, dtype=np.int32))
+    group.create_dataset(
+        "Polyline Parts",
+        data=np.array([(0, len(line)) for line in lines], dtype=np.int32),
+    )
+    group.create_dataset("Polyline Points", data=np.array(points, dtype=np.float64))
+
+
+def _write_mesh_geometry(hdf, nx: int, ny: int, size: float = 10.0) -> int:
+    """Write a regular grid of square cells; return the number of faces."""
+    n_cells = nx * ny
+    facepoints = np.array(
+        [(i * size, j * size) for j in range(ny + 1) for i in range(nx + 1)],
+        dtype=np.float64,
+    )
+
+    def fp(i, j):
+        return j * (nx + 1) + i
+
+    faces = []
+    face_ids = {}
+    for j in range(ny + 1):
+        for i in range(nx):
+            face_ids[("h", i, j)] = len(faces)
+            faces.append((fp(i, j), fp(i + 1, j)))
+    for j in range(ny):
+        for i in range(nx + 1):
+            face_ids[("v", i, j)] = len(faces)
+            faces.append((fp(i, j), fp(i, j + 1)))
+
+    cell_face_info = []
+    cell_face_values = []
+    for j in range(ny):
+        for i in range(nx):
+            cell_face_info.append((len(cell_face_values), 4))
+            for key in [("h", i, j), ("v", i + 1, j), ("h", i, j + 1), ("v", i, j)]:
+                cell_face_values.append((face_ids[key], 1))
+
+    attrs_dtype = np.dtype([("Name", "S16"), ("Cell Count", np.int32)])
+    hdf.create_dataset(
+        f"{FLOW_AREA_2D_PATH}/Attributes",
+        data=np.array([(MESH_NAME.encode(), n_cells)], dtype=attrs_dtype),
+    )
+    hdf.create_dataset(
+        f"{FLOW_AREA_2D_PATH}/Cell Info", data=np.array([(0, n_cells)], dtype=np.int32)
+    )
+    centers = np.array(
+        [((i + 0.5) * size, (j + 0.5) * size) for j in range(ny) for i in range(nx)]
+    )
+    hdf.create_dataset(f"{FLOW_AREA_2D_PATH}/Cell Points", data=centers)
+    mesh = hdf.require_group(f"{FLOW_AREA_2D_PATH}/{MESH_NAME}")
+    mesh.create_dataset(
+        "Cells Face and Orientation Info", data=np.array(cell_face_info, np.int32)
+    )
+    mesh.create_dataset(
+        "Cells Face and Orientation Values", data=np.array(cell_face_values, np.int32)
+    )
+    mesh.create_dataset("Faces FacePoint Indexes", data=np.array(faces, np.int32))
+    mesh.create_dataset("FacePoints Coordinate", data=facepoints)
+    mesh.create_dataset(
+        "Faces Perimeter Info", data=np.zeros((len(faces), 2), dtype=np.int32)
+    )
+    mesh.create_dataset("Faces Perimeter Values", data=np.zeros((0, 2)))
+    mesh.create_dataset(
+        "Perimeter",
+        data=np.array([(0, 0), (nx * size, 0), (nx * size, ny * size), (0, ny * size)]),
+    )
+    return len(faces)
+
+
+def make_plan_hdf(
+    path,
+    n_times: int = 96,
+    nx: int = 8,
+    ny: int = 6,
+    n_reflines: int = 4,
+    n_refpoints: int = 3,
+    ghost_cells: int = 2,
+    n_xs: int = 5,
+) -> dict:
+    """Write a minimal synthetic HEC-RAS plan HDF file for testing.
+
+    Returns a dict of the expected instability of each element type.
+    """
+    h5py = pytest.importorskip("h5py")
+
+    n_cells = nx * ny
+    start = datetime(2020, 1, 1)
+    times = [start + timedelta(minutes=15 * i) for i in range(n_times)]
+    stamps = [t.strftime("%d%b%Y %H:%M:%S:000").encode() for t in times]
+
+    unstable_reflines = np.arange(n_reflines) == n_reflines - 1
+    unstable_refpoints = np.arange(n_refpoints) == 0
+    unstable_cells = np.zeros(n_cells, dtype=bool)
+    unstable_cells[[1, n_cells // 2, n_cells - 1]] = True
+    unstable_xs = np.arange(n_xs) == 1
+    # Inline structure, then SA/2D connection
+    unstable_structures = np.array([False, True])
+
+    with h5py.File(path, "w") as hdf:
+        hdf.create_dataset(f"{TIME_SERIES_PATH}/Time Date Stamp (ms)", data=stamps)
+        hdf.require_group(
+            f"{BASE_OUTPUT_PATH}/Summary Output/2D Flow Areas/{MESH_NAME}"
+        )
+        n_faces = _write_mesh_geometry(hdf, nx, ny)
+        unstable_faces = np.zeros(n_faces, dtype=bool)
+        unstable_faces[[0, n_faces // 3]] = True
+
+        # Reference lines
+        refln_names = [f"Line {i}" for i in range(n_reflines)]
+        geom = hdf.require_group("Geometry/Reference Lines")
+        attrs_dtype = np.dtype([("Name", "S16"), ("SA-2D", "S16"), ("Type", "S16")])
+        geom.create_dataset(
+            "Attributes",
+            data=np.array(
+                [(n.encode(), MESH_NAME.encode(), b"Internal") for n in refln_names],
+                dtype=attrs_dtype,
+            ),
+        )
+        _write_polylines(
+            geom, [[(5.0 * i, 0.0), (5.0 * i, 10.0)] for i in range(n_reflines)]
+        )
+        out = hdf.require_group(f"{TIME_SERIES_PATH}/Reference Lines")
+        out.create_dataset(
+            "Name", data=[f"{n}|{MESH_NAME}".encode() for n in refln_names]
+        )
+        flows = _hydrographs(n_times, n_reflines, unstable_reflines, seed=1)
+        _write_timeseries(out, "Flow", flows, "cfs")
+        _write_timeseries(out, "Water Surface", flows / 10.0, "ft")
+
+        # Reference points
+        refpt_names = [f"Point {i}" for i in range(n_refpoints)]
+        geom = hdf.require_group("Geometry/Reference Points")
+        attrs_dtype = np.dtype(
+            [("Name", "S16"), ("SA/2D", "S16"), ("Cell Index", np.int32)]
+        )
+        geom.create_dataset(
+            "Attributes",
+            data=np.array(
+                [
+                    (n.encode(), MESH_NAME.encode(), i)
+                    for i, n in enumerate(refpt_names)
+                ],
+                dtype=attrs_dtype,
+            ),
+        )
+        geom.create_dataset(
+            "Points", data=np.array([(5.0 * i, 5.0) for i in range(n_refpoints)])
+        )
+        out = hdf.require_group(f"{TIME_SERIES_PATH}/Reference Points")
+        out.create_dataset(
+            "Name", data=[f"{n}|{MESH_NAME}".encode() for n in refpt_names]
+        )
+        flows = _hydrographs(n_times, n_refpoints, unstable_refpoints, seed=2)
+        _write_timeseries(out, "Flow", flows, "cfs")
+        _write_timeseries(out, "Water Surface", flows / 10.0, "ft")
+
+        # 2D mesh cells (with trailing ghost cells) and faces
+        out = hdf.require_group(f"{TIME_SERIES_PATH}/2D Flow Areas/{MESH_NAME}")
+        ws = np.zeros((n_times, n_cells + ghost_cells), dtype=np.float32)
+        ws[:, :n_cells] = _hydrographs(n_times, n_cells, unstable_cells, seed=3)
+        _write_timeseries(out, "Water Surface", ws, "ft")
+        face_flow = _hydrographs(n_times, n_faces, unstable_faces, seed=4)
+        _write_timeseries(out, "Face Flow", face_flow, "cfs")
+        _write_timeseries(out, "Face Velocity", face_flow / 100.0, "ft/s")
+
+        # 1D cross sections, numbered upstream to downstream
+        geom = hdf.require_group("Geometry/Cross Sections")
+        attrs_dtype = np.dtype([("River", "S16"), ("Reach", "S16"), ("RS", "S16")])
+        geom.create_dataset(
+            "Attributes",
+            data=np.array(
+                [
+                    (b"Creek", b"Upper", str(1000 - 100 * i).encode())
+                    for i in range(n_xs)
+                ],
+                dtype=attrs_dtype,
+            ),
+        )
+        _write_polylines(
+            geom, [[(-50.0, 20.0 * i), (50.0, 20.0 * i)] for i in range(n_xs)]
+        )
+        out = hdf.require_group(f"{TIME_SERIES_PATH}/Cross Sections")
+        flows = _hydrographs(n_times, n_xs, unstable_xs, seed=5)
+        _write_timeseries(out, "Flow", flows, "cfs")
+        _write_timeseries(out, "Water Surface", flows / 10.0, "ft")
+
+        # Inline structure and SA/2D connection
+        geom = hdf.require_group("Geometry/Structures")
+        attrs_dtype = np.dtype(
+            [
+                ("Type", "S16"),
+                ("River", "S16"),
+                ("Reach", "S16"),
+                ("RS", "S16"),
+                ("Connection", "S16"),
+            ]
+        )
+        geom.create_dataset(
+            "Attributes",
+            data=np.array(
+                [
+                    (b"Inline", b"Creek", b"Upper", b"850", b""),
+                    (b"Connection", b"", b"", b"", b"Levee"),
+                ],
+                dtype=attrs_dtype,
+            ),
+        )
+        lines = [[(-50.0, 30.0), (50.0, 30.0)], [(0.0, 0.0), (0.0, 60.0)]]
+        info = [(2 * i, 2, i, 1) for i in range(len(lines))]
+        geom.create_dataset("Centerline Info", data=np.array(info, dtype=np.int32))
+        geom.create_dataset(
+            "Centerline Parts", data=np.array([(0, 2)] * len(lines), dtype=np.int32)
+        )
+        geom.create_dataset("Centerline Points", data=np.concatenate(lines))
+        flows = _hydrographs(n_times, 2, unstable_structures, seed=6)
+        variable_units = np.array(
+            [
+                (b"Total Flow", b"cfs"),
+                (b"Weir Flow", b"cfs"),
+                (b"Stage HW", b"ft"),
+                (b"Stage TW", b"ft"),
+            ]
+        )
+        for i, group_name in enumerate(
+            ["Inline Structures/Creek Upper 850", "SA 2D Area Conn/Levee"]
+        ):
+            out = hdf.require_group(f"{TIME_SERIES_PATH}/{group_name}")
+            values = np.column_stack(
+                [flows[:, i], flows[:, i], flows[:, i] / 10.0, flows[:, i] / 20.0]
+            )
+            dataset = out.create_dataset(
+                "Structure Variables", data=values.astype(np.float32)
+            )
+            dataset.attrs["Variable_Unit"] = variable_units
+
+    return {
+        "reflines": unstable_reflines,
+        "refpoints": unstable_refpoints,
+        "cells": unstable_cells,
+        "faces": unstable_faces,
+        "cross_sections": unstable_xs,
+        "structures": unstable_structures,
+    }
+
+
+@pytest.fixture
+def plan_hdf_path(tmp_path):
+    """Path to a synthetic plan HDF file and its expected unstable elements."""
+    path = tmp_path / "synthetic.p01.hdf"
+    expected = make_plan_hdf(path)
+    return path, expected
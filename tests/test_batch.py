@@ -0,0 +1,134 @@
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("rashdf")
+
+from hydrostab.batch import (  # noqa: E402
+    TABLE_COLUMNS,
+    batch_stability,
+    main,
+    plan_stability_table,
+    write_batch_stability,
+)
+
+from conftest import make_plan_hdf  # noqa: E402
+
+
+@pytest.fixture
+def plan_files(tmp_path):
+    expected = {}
+    for i in range(3):
+        path = tmp_path / f"model.p0{i + 1}.hdf"
+        expected[str(path)] = make_plan_hdf(path)
+    bad = tmp_path / "model.p04.hdf"
+    bad.write_text("not an HDF file")
+    return tmp_path, expected, str(bad)
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_batch_stability(plan_files, workers):
+    tmp_path, expected, bad = plan_files
+    table, failures = batch_stability(str(tmp_path / "*.hdf"), workers=workers)
+    assert list(failures) == [bad]
+    assert list(table.columns) == TABLE_COLUMNS
+    assert list(table["plan"].unique()) == list(expected)
+    for plan, unstable in expected.items():
+        rows = table[(table["plan"] == plan) & (table["variable"] == "Flow")]
+        reflines = rows[rows["element_type"] == "reflines"]
+        np.testing.assert_array_equal(~reflines["is_stable"], unstable["reflines"])
+        cells = table[(table["plan"] == plan) & (table["element_type"] == "mesh_cells")]
+        np.testing.assert_array_equal(~cells["is_stable"], unstable["cells"])
+
+
+def test_batch_stability_serial_then_parallel(plan_files):
+    # HDF5 is used in this process before the worker pool starts
+    tmp_path, _, _ = plan_files
+    serial, _ = batch_stability(str(tmp_path / "*.hdf"), workers=1)
+    parallel, failures = batch_stability(str(tmp_path / "*.hdf"), workers=2)
+    assert len(failures) == 1
+    pd.testing.assert_frame_equal(serial, parallel)
+
+
+def test_batch_stability_parquet_requires_pyarrow(plan_files, monkeypatch):
+    tmp_path, _, _ = plan_files
+    monkeypatch.setitem(sys.modules, "pyarrow", None)
+    with pytest.raises(ImportError, match="parquet"):
+        batch_stability(
+            str(tmp_path / "*.hdf"), workers=1, output=tmp_path / "scores.parquet"
+        )
+
+
+def test_batch_main(plan_files, tmp_path, capsys):
+    _, expected, bad = plan_files
+    output = tmp_path / "scores.csv"
+    code = main([*expected, "-o", str(output), "--workers", "1", "--chunk-size", "10"])
+    assert code == 0
+    table = pd.read_csv(output)
+    assert set(table["plan"]) == set(expected)
+    assert main([bad, "-o", str(output), "--workers", "1"]) == 1
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_write_batch_stability_parquet(plan_files, tmp_path, workers):
+    pytest.importorskip("pyarrow")
+    _, expected, bad = plan_files
+    output = tmp_path / "scores.parquet"
+    failures = write_batch_stability([*expected, bad], output, workers=workers)
+    assert list(failures) == [bad]
+    table = pd.read_parquet(output)
+    reference, _ = batch_stability(list(expected), workers=1)
+    table = table.sort_values(["plan"], kind="stable").reset_index(drop=True)
+    assert list(table.columns) == TABLE_COLUMNS
+    columns = ["plan", "element_type", "element_id", "variable", "score", "is_stable"]
+    pd.testing.assert_frame_equal(table[columns], reference[columns], check_dtype=False)
+
+
+def test_main_geoparquet(plan_files, tmp_path):
+    gpd = pytest.importorskip("geopandas")
+    pytest.importorskip("pyarrow")
+    _, expected, _ = plan_files
+    output = tmp_path / "scores.parquet"
+    assert main([*expected, "-o", str(output), "--workers", "1", "--geometry"]) == 0
+    gdf = gpd.read_parquet(output)
+    assert len(gdf) == len(expected) * (4 * 2 + 3 * 2 + 48)
+    assert gdf.geometry.notna().all()
+    cells = gdf[gdf["element_type"] == "mesh_cells"]
+    assert (cells.geometry.geom_type == "Polygon").all()
+
+
+def test_plan_stability_table_geometry_per_mesh(plan_files, monkeypatch):
+    import hydrostab.batch
+
+    _, expected, _ = plan_files
+    calls = []
+    mesh_cell_polygons = hydrostab.batch._mesh_cell_polygons
+
+    def record(plan_hdf, mesh_name, *args, **kwargs):
+        calls.append(mesh_name)
+        return mesh_cell_polygons(plan_hdf, mesh_name, *args, **kwargs)
+
+    monkeypatch.setattr(hydrostab.batch, "_mesh_cell_polygons", record)
+    table = plan_stability_table(
+        next(iter(expected)), element_types=["mesh_cells"], geometry=True
+    )
+    assert calls == ["TestMesh"]
+    assert table["geometry"].notna().all()
+
+
+def test_batch_stability_cache(plan_files, tmp_path):
+    from hydrostab.cache import ScoreCache
+
+    tmp_path, expected, _ = plan_files
+    cache = ScoreCache(tmp_path / "scores.sqlite")
+    first, _ = batch_stability(list(expected), workers=2, cache=cache)
+    # Two variables of reference lines and points, and mesh cells, per plan
+    assert len(cache) == len(expected) * 5
+    second, _ = batch_stability(
+        list(expected), unstable_threshold=0.01, workers=1, cache=cache
+    )
+    pd.testing.assert_series_equal(first["score"], second["score"])
+    np.testing.assert_array_equal(second["is_stable"], second["score"] < 0.01)
+    cache.close()
@@ -0,0 +1,95 @@
+import os
+import pickle
+
+import numpy as np
+import pytest
+
+import hydrostab
+from hydrostab.cache import ScoreCache
+
+
+@pytest.fixture
+def plan_file(tmp_path):
+    path = tmp_path / "model.p01.hdf"
+    path.write_bytes(b"plan")
+    return path
+
+
+def test_score_cache_roundtrip(tmp_path, plan_file):
+    cache = ScoreCache(tmp_path / "cache" / "scores.sqlite")
+    scores = np.array([0.0, 0.001, 0.01])
+    assert cache.get(plan_file, "mesh_cells", "Water Surface", 0.1, "Mesh") is None
+    cache.put(plan_file, "mesh_cells", "Water Surface", 0.1, scores, "Mesh")
+    cached = cache.get(plan_file, "mesh_cells", "Water Surface", 0.1, "Mesh")
+    np.testing.assert_array_equal(cached, scores)
+    assert cache.get(plan_file, "mesh_cells", "Water Surface", 0.2, "Mesh") is None
+    assert cache.get(plan_file, "mesh_cells", "Face Flow", 0.1, "Mesh") is None
+    assert len(cache) == 1 and cache.size == scores.nbytes
+
+    # Pickled by path, e.g. for worker processes
+    restored = pickle.loads(pickle.dumps(cache))
+    np.testing.assert_array_equal(
+        restored.get(plan_file, "mesh_cells", "Water Surface", 0.1, "Mesh"), scores
+    )
+    restored.close()
+    cache.close()
+
+
+def test_score_cache_invalidation(tmp_path, plan_file):
+    with ScoreCache(tmp_path / "scores.sqlite") as cache:
+        cache.put(plan_file, "reflines", "Flow", 0.1, np.ones(4))
+        cache.put(plan_file, "reflines", "Water Surface", 0.1, np.ones(4))
+        assert cache.invalidate(plan_file) == 2
+        assert len(cache) == 0
+
+        # Scores of a plan file that changed are discarded
+        cache.put(plan_file, "reflines", "Flow", 0.1, np.ones(4))
+        stat = os.stat(plan_file)
+        os.utime(plan_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        assert cache.get(plan_file, "reflines", "Flow", 0.1) is None
+        assert len(cache) == 0
+
+
+def test_score_cache_lru_eviction(tmp_path, plan_file):
+    with ScoreCache(tmp_path / "scores.sqlite", max_bytes=2 * 80) as cache:
+        cache.put(plan_file, "reflines", "a", 0.1, np.zeros(10))
+        cache.put(plan_file, "reflines", "b", 0.1, np.zeros(10))
+        # Use "a" so that "b" is the least recently used
+        assert cache.get(plan_file, "reflines", "a", 0.1) is not None
+        cache.put(plan_file, "reflines", "c", 0.1, np.zeros(10))
+        assert len(cache) == 2
+        assert cache.get(plan_file, "reflines", "b", 0.1) is None
+        assert cache.get(plan_file, "reflines", "a", 0.1) is not None
+        assert cache.get(plan_file, "reflines", "c", 0.1) is not None
+
+
+@pytest.mark.parametrize("chunk_size", [None, 10])
+def test_mesh_cells_stability_cached(tmp_path, plan_hdf_path, monkeypatch, chunk_size):
+    pytest.importorskip("rashdf")
+    from rashdf import RasPlanHdf
+
+    from hydrostab.ras import mesh_cells_stability
+
+    path, expected = plan_hdf_path
+    cache = ScoreCache(tmp_path / "scores.sqlite")
+    with RasPlanHdf(path) as plan_hdf:
+        ds = mesh_cells_stability(
+            plan_hdf, "TestMesh", chunk_size=chunk_size, cache=cache
+        )
+        assert len(cache) == 1
+
+        def fail(*args, **kwargs):
+            raise AssertionError("scores were recomputed")
+
+        monkeypatch.setattr(hydrostab, "stability_score", fail)
+        scores = ds["Water Surface Stability Score"].values
+        threshold = np.median(scores)
+        cached = mesh_cells_stability(
+            plan_hdf, "TestMesh", threshold, chunk_size=chunk_size, cache=cache
+        )
+    np.testing.assert_array_equal(cached["Water Surface Stability Score"], scores)
+    np.testing.assert_array_equal(cached["Water Surface is Stable"], scores < threshold)
+    np.testing.assert_array_equal(
+        ~ds["Water Surface is Stable"].values, expected["cells"]
+    )
+    cache.close()
@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+
+import hydrostab
+from hydrostab.calibration import (
+    METHODS,
+    load_corpus,
+    roc_auc,
+    score_corpus,
+    threshold_sweep,
+)
+from hydrostab.experimental import abrupt_changes
+
+
+@pytest.fixture(scope="module")
+def corpus():
+    return load_corpus("tests/data/hydrographs")
+
+
+@pytest.fixture(scope="module")
+def corpus_scores(corpus):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return score_corpus(corpus, range_thresholds=(0.1, 10.0))
+
+
+def test_score_corpus(corpus, corpus_scores):
+    scores, timings = corpus_scores
+    assert set(timings) == set(METHODS)
+    for rt in (0.1, 10.0):
+        slope = scores[
+            (scores["method"] == "slope_change") & (scores["range_threshold"] == rt)
+        ]
+        expected = [
+            hydrostab.stability_score(values, range_threshold=rt)
+            for values in corpus["values"]
+        ]
+        np.testing.assert_allclose(slope["score"], expected, rtol=1e-12)
+
+    # Abrupt change scores classify like abrupt_changes at any percent change
+    abrupt = scores[scores["method"] == "abrupt_changes"]["score"].to_numpy()
+    for percent_change in (0.05, 0.2):
+        expected = [abrupt_changes(v, percent_change, 5) for v in corpus["values"]]
+        np.testing.assert_array_equal(abrupt < percent_change, expected)
+
+
+def test_threshold_sweep(corpus, corpus_scores):
+    scores, _ = corpus_scores
+    sweep = threshold_sweep(scores, {m: [0.002, 0.5] for m in METHODS})
+    row = sweep[
+        (sweep["method"] == "slope_change")
+        & (sweep["range_threshold"] == 0.1)
+        & (sweep["threshold"] == 0.002)
+    ].iloc[0]
+    # The default threshold separates the corpus
+    assert row["tp"] == corpus["unstable"].sum()
+    assert row["fp"] == 0 and row["accuracy"] == 1.0
+    assert (sweep[["tp", "fp", "tn", "fn"]].sum(axis=1) == len(corpus)).all()
+
+    auc = roc_auc(threshold_sweep(scores))
+    assert auc[("slope_change", 0.1)] == 1.0
+    assert ((auc >= 0.0) & (auc <= 1.0)).all()
@@ -1,7 +1,7 @@
 import numpy as np
 import pytest
 
-from hydrostab import stability_score, is_stable, stability
+from hydrostab import rolling_stability_score, stability_score, is_stable, stability
 
 
 def test_constant_signal():
@@ -37,3 +37,75 @@ def test_zero_range():
     signal = np.zeros(100)
     assert stability_score(signal) == 0.0
     assert is_stable(signal) is True
+
+
+def test_batched_matches_1d():
+    """Test that N-D input is scored along the given axis like 1D input."""
+    rng = np.random.default_rng(0)
+    signals = rng.normal(size=(3, 4, 50)).cumsum(axis=-1)
+    expected = np.array(
+        [[stability_score(signals[i, j]) for j in range(4)] for i in range(3)]
+    )
+    np.testing.assert_allclose(stability_score(signals), expected, rtol=1e-12)
+    np.testing.assert_allclose(
+        stability_score(np.moveaxis(signals, -1, 0), axis=0), expected, rtol=1e-12
+    )
+    flags, scores = stability(signals)
+    np.testing.assert_array_equal(flags, is_stable(signals))
+    np.testing.assert_array_equal(flags, scores < 0.002)
+
+
+def test_batched_flat_and_short():
+    """Test flat rows in a batch and too-short time axes."""
+    signals = np.vstack([np.zeros(10), np.arange(10.0) % 2])
+    scores = stability_score(signals)
+    assert scores[0] == 0.0 and scores[1] > 0.0
+    with pytest.raises(ValueError):
+        stability_score(np.ones((5, 1)))
+
+
+def test_rolling_stability_score():
+    """Test windowed scores against scoring each window separately."""
+    rng = np.random.default_rng(1)
+    signals = rng.normal(size=(3, 60)).cumsum(axis=-1)
+    window, stride = 10, 5
+    scores = rolling_stability_score(signals, window, stride)
+    assert scores.shape == (3, 11)
+    for i, signal in enumerate(signals):
+        # Window scores are normalized by the range of the whole signal
+        expected = [
+            stability_score(signal[s : s + window], range_threshold=0.0)
+            * np.ptp(signal[s : s + window])
+            / np.ptp(signal)
+            for s in range(0, 51, stride)
+        ]
+        np.testing.assert_allclose(scores[i], expected, rtol=1e-9)
+    np.testing.assert_array_equal(
+        rolling_stability_score(signals.T, window, stride, axis=0), scores.T
+    )
+    np.testing.assert_allclose(
+        rolling_stability_score(signals, 60)[:, 0], stability_score(signals)
+    )
+
+
+def test_rolling_stability_score_flat_and_invalid():
+    """Test flat signals and invalid windows."""
+    assert np.all(rolling_stability_score(np.zeros(10), 4) == 0.0)
+    with pytest.raises(ValueError):
+        rolling_stability_score(np.arange(10.0), 11)
+    with pytest.raises(ValueError):
+        rolling_stability_score(np.arange(10.0), 4, stride=0)
+
+
+def test_coerce_array_no_copy():
+    """Test that float arrays are validated without a copy or upcast."""
+    from hydrostab.utils import coerce_array
+
+    for dtype in (np.float32, np.float64):
+        values = np.arange(10, dtype=dtype)
+        assert coerce_array(values) is values
+    assert coerce_array([1, 2, 3]).dtype == np.float64
+    with pytest.raises(ValueError):
+        coerce_array(np.array([1.0, np.nan], dtype=np.float32))
+    with pytest.raises(ValueError):
+        coerce_array(np.array([1e308, 1e308, -np.inf]))
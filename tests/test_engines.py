@@ -0,0 +1,165 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from pathlib import Path
+
+import hydrostab
+
+
+HYDROGRAPHS = sorted(Path("tests/data/hydrographs").rglob("*.csv"))
+
+
+def test_numba_engine_matches_numpy_on_corpus():
+    pytest.importorskip("numba")
+    for csv in HYDROGRAPHS:
+        flows = pd.read_csv(csv)["flow"].to_numpy()
+        expected = hydrostab.stability(flows)
+        is_stable, score = hydrostab.stability(flows, engine="numba")
+        assert is_stable == expected[0]
+        assert score == pytest.approx(expected[1], rel=1e-12, abs=0.0)
+
+
+@pytest.mark.parametrize("axis", [0, -1])
+def test_numba_engine_batched(axis):
+    pytest.importorskip("numba")
+    rng = np.random.default_rng(0)
+    values = rng.normal(size=(120, 7, 3)).cumsum(axis=0)
+    values[:, 0, 0] = 1.0  # flat hydrograph
+    values = np.moveaxis(values, 0, axis)
+    expected = hydrostab.stability_score(values, axis=axis)
+    scores = hydrostab.stability_score(values, axis=axis, engine="numba")
+    assert scores.shape == expected.shape == (7, 3)
+    np.testing.assert_allclose(scores, expected, rtol=1e-12)
+
+
+def test_engine_selection():
+    flows = np.sin(np.arange(50.0))
+    assert hydrostab.stability_score(flows, engine="auto") == pytest.approx(
+        hydrostab.stability_score(flows), rel=1e-12
+    )
+    with pytest.raises(ValueError):
+        hydrostab.stability_score(flows, engine="fortran")
+
+
+@pytest.mark.parametrize("engine", ["numpy", "numba"])
+def test_early_exit_matches_is_stable_on_corpus(engine):
+    if engine == "numba":
+        pytest.importorskip("numba")
+    for csv in HYDROGRAPHS:
+        flows = pd.read_csv(csv)["flow"].to_numpy()
+        stable, examined = hydrostab.is_stable_early_exit(
+            flows, engine=engine, block_size=16
+        )
+        assert stable == hydrostab.is_stable(flows)
+        if stable:
+            assert examined == len(flows)
+        else:
+            assert 3 <= examined <= len(flows)
+
+
+@pytest.mark.parametrize("engine", ["numpy", "numba"])
+@pytest.mark.parametrize("axis", [0, -1])
+def test_early_exit_batched(engine, axis):
+    if engine == "numba":
+        pytest.importorskip("numba")
+    rng = np.random.default_rng(1)
+    t = np.linspace(0, 1, 300)[:, None]
+    values = 100 * np.exp(-(((t - 0.5) / 0.1) ** 2)) * rng.uniform(0.5, 2, 40)
+    values[:, :10] += rng.normal(size=(300, 10))  # noisy, unstable
+    values[:, 10] = 5.0  # flat
+    values = np.moveaxis(values, 0, axis)
+    stable, examined = hydrostab.is_stable_early_exit(
+        values, axis=axis, engine=engine, block_size=32
+    )
+    np.testing.assert_array_equal(stable, hydrostab.is_stable(values, axis=axis))
+    assert not stable[:10].any()
+    assert (examined[:10] < 300).all()
+    assert examined[10] == 0
+    assert (examined[11:] == 300).all()
+
+    if engine == "numpy":
+        # Every block size gives the same position of proven instability
+        _, examined_1 = hydrostab.is_stable_early_exit(values, axis=axis, block_size=1)
+        np.testing.assert_array_equal(examined, examined_1)
+
+
+@pytest.mark.parametrize("engine", ["numpy", "numba"])
+def test_float32_input(engine):
+    if engine == "numba":
+        pytest.importorskip("numba")
+    rng = np.random.default_rng(2)
+    t = np.linspace(0, 1, 200)[:, None]
+    values = 100 * np.exp(-(((t - 0.5) / 0.1) ** 2)) * rng.uniform(0.5, 2, 20)
+    values[:, :5] += rng.normal(size=(200, 5))
+    values32 = values.astype(np.float32)
+    scores = hydrostab.stability_score(values32, axis=0, engine=engine)
+    assert scores.dtype == np.float64
+    np.testing.assert_allclose(
+        scores,
+        hydrostab.stability_score(values32.astype(np.float64), axis=0),
+        rtol=1e-5,
+    )
+    stable, _ = hydrostab.is_stable_early_exit(values32, axis=0, engine=engine)
+    np.testing.assert_array_equal(stable, hydrostab.is_stable(values32, axis=0))
+    rolling = hydrostab.rolling_stability_score(values32, 50, stride=25, axis=0)
+    assert rolling.dtype == np.float64
+
+
+@pytest.mark.parametrize("engine", ["numpy", "numba"])
+@pytest.mark.parametrize("axis", [0, -1])
+def test_workers_match_single_thread(engine, axis, monkeypatch):
+    if engine == "numba":
+        pytest.importorskip("numba")
+    # Split the 37 hydrographs into several blocks of work
+    monkeypatch.setattr(hydrostab, "_BLOCK_ELEMENTS", 8)
+    rng = np.random.default_rng(3)
+    values = rng.normal(size=(150, 37)).cumsum(axis=0)
+    values[:, 5] = 2.0  # flat
+    values = np.moveaxis(values, 0, axis)
+    expected = hydrostab.stability_score(values, axis=axis, engine=engine)
+    stable, examined = hydrostab.is_stable_early_exit(values, axis=axis, engine=engine)
+    for workers in [1, 4, 64]:
+        scores = hydrostab.stability_score(
+            values, axis=axis, engine=engine, workers=workers
+        )
+        np.testing.assert_array_equal(scores, expected)
+        result = hydrostab.is_stable_early_exit(
+            values, axis=axis, engine=engine, workers=workers
+        )
+        np.testing.assert_array_equal(result[0], stable)
+        np.testing.assert_array_equal(result[1], examined)
+    assert hydrostab.stability_score(values[0], workers=4) == pytest.approx(
+        hydrostab.stability_score(values[0]), rel=1e-12
+    )
+    with pytest.raises(ValueError):
+        hydrostab.stability_score(values, axis=axis, workers=0)
+
+
+@pytest.mark.parametrize("engine", ["numpy", "numba"])
+@pytest.mark.parametrize("axis", [0, -1])
+def test_prescreen_matches_full(engine, axis):
+    if engine == "numba":
+        pytest.importorskip("numba")
+    rng = np.random.default_rng(5)
+    t = np.linspace(0.0, 1.0, 200)[:, np.newaxis]
+    smooth = 10.0 * np.exp(-(((t - rng.uniform(0.3, 0.6, 30)) / 0.1) ** 2))
+    noisy = smooth[:, :20] + rng.normal(scale=0.05, size=(200, 20))
+    values = np.concatenate([smooth, noisy, np.ones((200, 5))], axis=1)
+    values = np.moveaxis(values, 0, axis)
+    full_stable, full_scores = hydrostab.stability(values, axis=axis, engine=engine)
+    # Thresholds on either side of the scores of the noisy hydrographs
+    for threshold in [0.002, *np.quantile(full_scores[30:50], [0.25, 0.75])]:
+        stable, scores = hydrostab.stability(
+            values, threshold, axis=axis, engine=engine, prescreen=True
+        )
+        np.testing.assert_array_equal(stable, full_scores < threshold)
+        scored = ~np.isnan(scores)
+        assert not scored[:30].any()
+        np.testing.assert_allclose(scores[scored], full_scores[scored], rtol=1e-12)
+        np.testing.assert_array_equal(scores[-5:], 0.0)
+        np.testing.assert_array_equal(
+            hydrostab.is_stable(values, threshold, axis=axis, prescreen=True), stable
+        )
+    assert full_stable[:30].all()
+    assert hydrostab.stability(np.moveaxis(values, axis, 0)[:, 0], prescreen=True)[0]
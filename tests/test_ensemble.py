@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("rashdf")
+
+from hydrostab.batch import batch_stability  # noqa: E402
+from hydrostab.ensemble import EnsembleStability  # noqa: E402
+
+from conftest import make_plan_hdf  # noqa: E402
+
+
+@pytest.fixture
+def event_files(tmp_path):
+    paths = []
+    for i in range(4):
+        path = tmp_path / f"event{i}.p01.hdf"
+        make_plan_hdf(path, n_times=48 + 8 * i)
+        paths.append(str(path))
+    return paths
+
+
+def test_ensemble_statistics(event_files):
+    ensemble = EnsembleStability()
+    for path in event_files:
+        ensemble.add_plan(path)
+    stats = ensemble.statistics(quantiles=(0.0, 0.5, 1.0))
+
+    table, _ = batch_stability(event_files, workers=1)
+    scores = np.stack(
+        [table.loc[table["plan"] == p, "score"].to_numpy() for p in event_files]
+    )
+    unstable = np.stack(
+        [~table.loc[table["plan"] == p, "is_stable"].to_numpy() for p in event_files]
+    )
+    assert (stats["n_events"] == 4).all()
+    np.testing.assert_array_equal(stats["n_unstable"], unstable.sum(axis=0))
+    np.testing.assert_allclose(stats["unstable_fraction"], unstable.mean(axis=0))
+    np.testing.assert_allclose(stats["score_min"], scores.min(axis=0))
+    np.testing.assert_allclose(stats["score_max"], scores.max(axis=0))
+    np.testing.assert_allclose(stats["score_mean"], scores.mean(axis=0))
+    np.testing.assert_allclose(stats["score_q0"], scores.min(axis=0))
+    np.testing.assert_allclose(stats["score_q100"], scores.max(axis=0))
+    median = stats["score_q50"].to_numpy()
+    assert (median >= scores.min(axis=0)).all()
+    assert (median <= scores.max(axis=0)).all()
+
+
+def test_ensemble_add_plans_and_geodataframe(event_files, tmp_path):
+    bad = tmp_path / "bad.p01.hdf"
+    bad.write_text("not an HDF file")
+    ensemble = EnsembleStability(element_types=["reflines", "mesh_cells"])
+    failures = ensemble.add_plans([*event_files, str(bad)], workers=2)
+    assert list(failures) == [str(bad)]
+    assert sorted(ensemble.plans) == sorted(event_files)
+
+    gdf = ensemble.to_geodataframe("mesh_cells")
+    assert len(gdf) == 48
+    assert gdf["water_surface_unstable_fraction"].iloc[1] == 1.0
+    gdf = ensemble.to_geodataframe("reflines")
+    assert list(gdf["flow_n_events"]) == [4] * 4
+
+
+def test_ensemble_mismatched_plan(event_files, tmp_path):
+    other = tmp_path / "other.p01.hdf"
+    make_plan_hdf(other, nx=4)
+    ensemble = EnsembleStability()
+    ensemble.add_plan(event_files[0])
+    with pytest.raises(ValueError):
+        ensemble.add_plan(other)
+    with pytest.raises(ValueError):
+        EnsembleStability().statistics()
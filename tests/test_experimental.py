@@ -0,0 +1,104 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from pathlib import Path
+
+import hydrostab.experimental as experimental
+from hydrostab.experimental import (
+    _find_first_peak,
+    abrupt_changes,
+    fft_stability,
+    oscillation_fraction,
+)
+
+
+HYDROGRAPHS = sorted(Path("tests/data/hydrographs").rglob("*.csv"))
+
+
+@pytest.mark.parametrize(
+    "flow, expected",
+    [
+        ([1.0, 2.0, 3.0, 2.0, 1.0, 0.0], 4),
+        ([1.0, 2.0, 3.0, 2.0, 1.0], 5),
+        ([1.0, 3.0, 3.0, 2.0, 1.0, 0.0], 4),
+        ([1.0, 2.0, 3.0, 4.0, 5.0], 5),
+        ([5.0, 4.0, 3.0, 2.0, 1.0], 2),
+        ([1.0, 2.0], 2),
+    ],
+)
+def test_find_first_peak(flow, expected):
+    assert _find_first_peak(np.array(flow)) == expected
+
+
+def test_abrupt_changes():
+    ramp_up = np.array([0.0, 10.0, 10.5, 10.2, 9.8, 9.0, 8.0, 7.0])
+    assert abrupt_changes(ramp_up, 0.5, 5) is True
+    jump_after_peak = np.array([0.0, 5.0, 10.0, 9.0, 8.0, 2.0, 1.0, 0.5])
+    assert abrupt_changes(jump_after_peak, 0.5, 5) is False
+
+
+def test_abrupt_changes_batched():
+    length = 500
+    hydrographs = [pd.read_csv(csv)["flow"].to_numpy() for csv in HYDROGRAPHS]
+    hydrographs = np.stack([np.resize(h, length) for h in hydrographs])
+    expected = [abrupt_changes(h, 0.1, 5) for h in hydrographs]
+    np.testing.assert_array_equal(abrupt_changes(hydrographs, 0.1, 5), expected)
+    np.testing.assert_array_equal(
+        abrupt_changes(hydrographs.T, 0.1, 5, axis=0), expected
+    )
+    peaks = [_find_first_peak(h) for h in hydrographs]
+    np.testing.assert_array_equal(_find_first_peak(hydrographs), peaks)
+
+
+def test_oscillation_fraction_batched():
+    length = 500
+    hydrographs = [pd.read_csv(csv)["flow"].to_numpy() for csv in HYDROGRAPHS]
+    hydrographs = np.stack([np.resize(h, length) for h in hydrographs])
+    hydrographs[0, :10] = -1.0
+    original = hydrographs.copy()
+    times = pd.date_range("2020-01-01", periods=length, freq="15min")
+
+    fraction, rate, std, interval = oscillation_fraction(hydrographs, times, 0.1)
+    np.testing.assert_array_equal(hydrographs, original)
+    assert interval == 15.0
+    assert rate.shape == hydrographs.shape
+    expected = [oscillation_fraction(h, times, 0.1) for h in hydrographs]
+    np.testing.assert_array_equal(fraction, [e[0] for e in expected])
+    np.testing.assert_array_equal(rate, [e[1] for e in expected])
+    np.testing.assert_array_equal(std, [e[2] for e in expected])
+
+    fraction_t, rate_t, std_t, _ = oscillation_fraction(hydrographs.T, times, 0.1, 0)
+    np.testing.assert_array_equal(fraction_t, fraction)
+    np.testing.assert_array_equal(rate_t, rate.T)
+
+
+def test_oscillation_fraction_length_mismatch():
+    times = pd.date_range("2020-01-01", periods=10, freq="15min")
+    with pytest.raises(ValueError, match="same length"):
+        oscillation_fraction(np.ones((3, 12)), times, 0.1)
+
+
+@pytest.mark.parametrize("kwargs", [{}, {"normalize": True}, {"standardize": True}])
+def test_fft_stability_batched(kwargs, monkeypatch):
+    length = 500
+    hydrographs = [pd.read_csv(csv)["flow"].to_numpy() for csv in HYDROGRAPHS]
+    hydrographs = np.stack([np.resize(h, length) + 1.0 for h in hydrographs])
+    expected = [fft_stability(h, 0.25, 2.0, 0.1, **kwargs) for h in hydrographs]
+
+    is_stable, proportion, spectrum, freqs = fft_stability(
+        hydrographs, 0.25, 2.0, 0.1, **kwargs
+    )
+    np.testing.assert_array_equal(is_stable, [e[0] for e in expected])
+    np.testing.assert_array_equal(proportion, [e[1] for e in expected])
+    np.testing.assert_array_equal(spectrum, [e[2] for e in expected])
+    np.testing.assert_array_equal(freqs, expected[0][3])
+
+    # Blocks of hydrographs without spectra
+    monkeypatch.setattr(experimental, "_FFT_BLOCK_SIZE", 7)
+    is_stable, proportion, spectrum, _ = fft_stability(
+        hydrographs.T, 0.25, 2.0, 0.1, axis=0, return_spectrum=False, **kwargs
+    )
+    assert spectrum is None
+    np.testing.assert_array_equal(is_stable, [e[0] for e in expected])
+    np.testing.assert_allclose(proportion, [e[1] for e in expected], rtol=1e-12)
@@ -0,0 +1,29 @@
+import subprocess
+import sys
+
+HEAVY_MODULES = ["pandas", "xarray", "rashdf", "geopandas", "scipy", "numba"]
+
+
+def _run(code: str) -> str:
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    return result.stdout.strip()
+
+
+def test_import_is_light():
+    loaded = _run(
+        "import sys, hydrostab;"
+        f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    )
+    assert loaded == ""
+
+
+def test_lazy_submodules():
+    loaded = _run(
+        "import sys, hydrostab;"
+        "hydrostab.experimental.fft_stability;"
+        "print('pandas' in sys.modules, 'hydrostab.ras' in sys.modules)"
+    )
+    assert loaded == "False False"
+    assert _run("import hydrostab; print(hydrostab.ras.__name__)") == "hydrostab.ras"
@@ -0,0 +1,430 @@
+import h5py
+import numpy as np
+import pytest
+
+import hydrostab
+
+pytest.importorskip("rashdf")
+
+from rashdf import RasPlanHdf  # noqa: E402
+
+from hydrostab.cache import ScoreCache  # noqa: E402
+from hydrostab.ras import (  # noqa: E402
+    _chunk_size,
+    cross_sections_stability,
+    _mesh_cell_polygons,
+    _mesh_face_lines,
+    _mesh_timeseries_dataset,
+    _score_bytes_per_value,
+    mesh_cells_stability,
+    mesh_faces_stability,
+    plan_stability,
+    reflines_stability,
+    refpoints_stability,
+    structures_stability,
+)
+
+
+def test_reflines_stability(plan_hdf_path):
+    path, expected = plan_hdf_path
+    with RasPlanHdf(path) as plan_hdf:
+        ds = reflines_stability(plan_hdf)
+        flows = np.asarray(plan_hdf.reference_lines_timeseries_output()["Flow"])
+    scores = ds["Flow Stability Score"].values
+    reference = [hydrostab.stability_score(flows[:, i]) for i in range(flows.shape[1])]
+    np.testing.assert_allclose(scores, reference, rtol=1e-12)
+    assert list(~ds["Flow is Stable"].values) == list(expected["reflines"])
+
+
+def test_refpoints_stability_gdf(plan_hdf_path):
+    path, expected = plan_hdf_path
+    with RasPlanHdf(path) as plan_hdf:
+        gdf = refpoints_stability(plan_hdf, gdf=True)
+    assert "water_surface_stability_score" in gdf.columns
+    assert list(~gdf["flow_is_stable"]) == list(expected["refpoints"])
+
+
+def test_mesh_cells_stability(plan_hdf_path):
+    path, expected = plan_hdf_path
+    with RasPlanHdf(path) as plan_hdf:
+        ds = mesh_cells_stability(plan_hdf, "TestMesh")
+        gdf = mesh_cells_stability(plan_hdf, "TestMesh", gdf=True)
+    assert ds["Water Surface Stability Score"].dims == ("cell_id",)
+    np.testing.assert_array_equal(
+        ~ds["Water Surface is Stable"].values, expected["cells"]
+    )
+    np.testing.assert_array_equal(
+        gdf["water_surface_stability_score"], ds["Water Surface Stability Score"]
+    )
+
+
+def test_mesh_cells_stability_gdf_subset(plan_hdf_path):
+    path, expected = plan_hdf_path
+    with RasPlanHdf(path) as plan_hdf:
+        ds = mesh_cells_stability(plan_hdf, "TestMesh")
+        full = mesh_cells_stability(plan_hdf, "TestMesh", gdf=True)
+        unstable = mesh_cells_stability(
+            plan_hdf, "TestMesh", gdf=True, gdf_subset="unstable"
+        )
+        top = mesh_cells_stability(plan_hdf, "TestMesh", gdf=True, gdf_subset=3)
+        with pytest.raises(ValueError):
+            mesh_cells_stability(plan_hdf, "TestMesh", gdf=True, gdf_subset=0)
+    np.testing.assert_array_equal(
+        unstable["cell_id"], np.flatnonzero(expected["cells"])
+    )
+    assert not unstable["water_surface_is_stable"].any()
+    scores = ds["Water Surface Stability Score"].values
+    np.testing.assert_array_equal(top["cell_id"], np.argsort(-scores)[:3])
+    np.testing.assert_array_equal(
+        top["water_surface_stability_score"], np.sort(scores)[::-1][:3]
+    )
+    full = full.set_index("cell_id")
+    for subset in (unstable, top):
+        assert subset.geometry.geom_equals(
+            full.geometry.loc[subset["cell_id"]].reset_index(drop=True)
+        ).all()
+
+
+def test_mesh_cell_polygons_and_face_lines_match_rashdf(plan_hdf_path):
+    path, _ = plan_hdf_path
+    with h5py.File(path, "r+") as hdf:
+        # Bend two faces through perimeter points
+        mesh = hdf["Geometry/2D Flow Areas/TestMesh"]
+        facepoint_indexes = mesh["Faces FacePoint Indexes"][()]
+        coordinates = mesh["FacePoints Coordinate"][()]
+        perimeter_info = mesh["Faces Perimeter Info"][()]
+        perimeter_values = []
+        for face, n_points in [(3, 1), (10, 2)]:
+            a, b = coordinates[facepoint_indexes[face]]
+            perimeter_info[face] = (len(perimeter_values), n_points)
+            for j in range(1, n_points + 1):
+                perimeter_values.append(a + (b - a) * j / (n_points + 1) + 1.0)
+        del mesh["Faces Perimeter Info"], mesh["Faces Perimeter Values"]
+        mesh["Faces Perimeter Info"] = perimeter_info
+        mesh["Faces Perimeter Values"] = np.array(perimeter_values)
+    with RasPlanHdf(path) as plan_hdf:
+        expected = plan_hdf.mesh_cell_polygons(include_output=False)
+        gdf = _mesh_cell_polygons(plan_hdf, "TestMesh")
+        subset = _mesh_cell_polygons(plan_hdf, "TestMesh", [7, 2])
+        expected_faces = plan_hdf.mesh_cell_faces(include_output=False)
+        faces = _mesh_face_lines(plan_hdf, "TestMesh")
+        face_subset = _mesh_face_lines(plan_hdf, "TestMesh", [10, 4])
+    np.testing.assert_array_equal(gdf["cell_id"], expected["cell_id"])
+    assert gdf.geometry.geom_equals_exact(expected.geometry, tolerance=0).all()
+    assert subset.geometry.geom_equals_exact(
+        expected.geometry.iloc[[7, 2]].reset_index(drop=True), tolerance=0
+    ).all()
+    np.testing.assert_array_equal(faces["face_id"], expected_faces["face_id"])
+    assert faces.geometry.geom_equals_exact(expected_faces.geometry, tolerance=0).all()
+    assert face_subset.geometry.geom_equals_exact(
+        expected_faces.geometry.iloc[[10, 4]].reset_index(drop=True), tolerance=0
+    ).all()
+
+
+def test_stability_time_window(plan_hdf_path, tmp_path, monkeypatch):
+    path, _ = plan_hdf_path
+    with RasPlanHdf(path) as plan_hdf:
+        times = plan_hdf.unsteady_datetimes()
+        flow = plan_hdf.reference_lines_timeseries_output()["Flow"].values
+        ws = plan_hdf.mesh_cells_timeseries_output("TestMesh")["Water Surface"].values
+
+        def fail(*args, **kwargs):
+            raise AssertionError("windowed output was loaded through rashdf")
+
+        # Windows are read as hyperslabs of the HDF datasets
+        for loader in (
+            "reference_lines_timeseries_output",
+            "mesh_cells_timeseries_output",
+        ):
+            monkeypatch.setattr(plan_hdf, loader, fail)
+        ds = reflines_stability(plan_hdf, start=10, end=60)
+        ds_times = reflines_stability(plan_hdf, start=str(times[10]), end=times[59])
+        mesh = mesh_cells_stability(plan_hdf, "TestMesh", start=-40)
+        mesh_chunked = mesh_cells_stability(
+            plan_hdf, "TestMesh", start=-40, chunk_size=7
+        )
+        with ScoreCache(tmp_path / "scores.sqlite") as cache:
+            full = mesh_cells_stability(plan_hdf, "TestMesh", cache=cache)
+            cached = mesh_cells_stability(
+                plan_hdf, "TestMesh", cache=cache, start=-40, chunk_size=7
+            )
+            assert len(cache) == 2
+        with pytest.raises(ValueError):
+            reflines_stability(plan_hdf, start=5, end=6)
+    assert "time" not in ds.dims
+    expected = hydrostab.stability_score(flow[10:60], axis=0)
+    np.testing.assert_allclose(ds["Flow Stability Score"], expected, rtol=1e-12)
+    np.testing.assert_array_equal(
+        ds_times["Flow Stability Score"], ds["Flow Stability Score"]
+    )
+    expected = hydrostab.stability_score(ws[-40:, :48], axis=0)
+    score = "Water Surface Stability Score"
+    np.testing.assert_allclose(mesh[score][:48], expected, rtol=1e-12)
+    np.testing.assert_allclose(mesh_chunked[score], expected, rtol=1e-12)
+    np.testing.assert_allclose(cached[score], expected, rtol=1e-12)
+    assert not np.allclose(full[score][:48], expected)
+
+
+def test_stability_cache_skips_rashdf(plan_hdf_path, tmp_path, monkeypatch):
+    path, expected = plan_hdf_path
+    with RasPlanHdf(path) as plan_hdf, ScoreCache(tmp_path / "scores.sqlite") as cache:
+        reflines = reflines_stability(plan_hdf)
+        cells = mesh_cells_stability(plan_hdf, "TestMesh")
+        reflines_stability(plan_hdf, cache=cache)
+        mesh_cells_stability(plan_hdf, "TestMesh", cache=cache)
+        mesh_faces_stability(plan_hdf, "TestMesh", cache=cache)
+        assert len(cache) == 5
+
+        def fail(*args, **kwargs):
+            raise AssertionError("output was read despite cached scores")
+
+        for loader in (
+            "reference_lines_timeseries_output",
+            "mesh_cells_timeseries_output",
+            "mesh_faces_timeseries_output",
+        ):
+            monkeypatch.setattr(plan_hdf, loader, fail)
+        monkeypatch.setattr(hydrostab.ras, "_chunked_scores", fail)
+        cached_reflines = reflines_stability(plan_hdf, cache=cache)
+        cached_cells = mesh_cells_stability(plan_hdf, "TestMesh", cache=cache)
+    score = "Flow Stability Score"
+    np.testing.assert_allclose(cached_reflines[score], reflines[score], rtol=1e-12)
+    assert list(~cached_reflines["Flow is Stable"].values) == list(expected["reflines"])
+    score = "Water Surface Stability Score"
+    np.testing.assert_allclose(cached_cells[score], cells[score][:48], rtol=1e-12)
+
+
+def test_plan_stability(plan_hdf_path):
+    path, expected = plan_hdf_path
+    with RasPlanHdf(path) as plan_hdf:
+        result = plan_stability(plan_hdf, chunk_size=10)
+        reflines = reflines_stability(plan_hdf)
+        mesh = mesh_cells_stability(plan_hdf, "TestMesh")
+        windowed = plan_stability(plan_hdf, element_types=["refpoints"], start=10)
+        refpoints = refpoints_stability(plan_hdf, start=10)
+        with pytest.raises(ValueError):
+            plan_stability(plan_hdf, element_types=["faces"])
+    assert list(result.mesh_cells) == ["TestMesh"]
+    for var in ["Flow Stability Score", "Water Surface is Stable"]:
+        np.testing.assert_allclose(result.reflines[var], reflines[var], rtol=1e-12)
+    np.testing.assert_array_equal(result.reflines["refln_name"], reflines["refln_name"])
+    np.testing.assert_allclose(
+        result.mesh_cells["TestMesh"]["Water Surface Stability Score"],
+        mesh["Water Surface Stability Score"][:48],
+        rtol=1e-12,
+    )
+    assert windowed.reflines is None and not windowed.mesh_cells
+    np.testing.assert_allclose(
+        windowed.refpoints["Flow Stability Score"],
+        refpoints["Flow Stability Score"],
+        rtol=1e-12,
+    )
+
+    summary = result.summary().set_index(["element_type", "variable"])
+    assert summary.loc[("reflines", "Flow"), "n_unstable"] == sum(expected["reflines"])
+    assert summary.loc[("mesh_cells", "Water Surface"), "n_unstable"] == sum(
+        expected["cells"]
+    )
+    assert summary.loc[("mesh_cells", "Water Surface"), "n_elements"] == 48
+    assert not result.is_stable
+
+
+def test_reflines_stability_lazy(plan_hdf_path):
+    dask = pytest.importorskip("dask")
+    path, _ = plan_hdf_path
+    with RasPlanHdf(path) as plan_hdf:
+        eager = reflines_stability(plan_hdf)
+        lazy = reflines_stability(plan_hdf, lazy=True)
+        assert isinstance(lazy["Flow Stability Score"].data, dask.array.Array)
+        lazy = lazy.compute()
+    for var in ["Flow Stability Score", "Water Surface is Stable"]:
+        np.testing.assert_array_equal(lazy[var].values, eager[var].values)
+
+
+def test_mesh_cells_stability_lazy(plan_hdf_path):
+    pytest.importorskip("dask")
+    path, expected = plan_hdf_path
+    with RasPlanHdf(path) as plan_hdf:
+        ds = mesh_cells_stability(plan_hdf, "TestMesh", lazy=True)
+        unstable = ~ds["Water Surface is Stable"].values
+    np.testing.assert_array_equal(unstable, expected["cells"])
+
+
+@pytest.mark.parametrize(
+    "chunk_kwargs",
+    [{"chunk_size": 5}, {"chunk_size": 1000}, {"max_memory": 96 * 24 * 3}],
+)
+def test_mesh_cells_stability_chunked(plan_hdf_path, chunk_kwargs):
+    path, expected = plan_hdf_path
+    with RasPlanHdf(path) as plan_hdf:
+        ds = mesh_cells_stability(plan_hdf, "TestMesh")
+        ds_chunked = mesh_cells_stability(plan_hdf, "TestMesh", **chunk_kwargs)
+        gdf = mesh_cells_stability(plan_hdf, "TestMesh", gdf=True, **chunk_kwargs)
+    assert "Water Surface" not in ds_chunked
+    np.testing.assert_allclose(
+        ds_chunked["Water Surface Stability Score"],
+        ds["Water Surface Stability Score"],
+        rtol=1e-12,
+    )
+    np.testing.assert_array_equal(
+        ~ds_chunked["Water Surface is Stable"].values, expected["cells"]
+    )
+    assert len(gdf) == len(expected["cells"])
+
+
+def test_stability_workers(plan_hdf_path):
+    path, _ = plan_hdf_path
+    score = "Water Surface Stability Score"
+    with RasPlanHdf(path) as plan_hdf:
+        ds = mesh_cells_stability(plan_hdf, "TestMesh")
+        threaded = mesh_cells_stability(plan_hdf, "TestMesh", workers=3)
+        chunked = mesh_cells_stability(plan_hdf, "TestMesh", chunk_size=20, workers=3)
+        result = plan_stability(plan_hdf, workers=3)
+    np.testing.assert_array_equal(threaded[score], ds[score])
+    np.testing.assert_array_equal(chunked[score], ds[score][:48])
+    np.testing.assert_array_equal(result.mesh_cells["TestMesh"][score], chunked[score])
+
+
+def test_mesh_cells_stability_prescreen(plan_hdf_path, tmp_path):
+    path, expected = plan_hdf_path
+    score, stable = "Water Surface Stability Score", "Water Surface is Stable"
+    # The score bounds of the stable cells are below this threshold
+    threshold = 0.01
+    with RasPlanHdf(path) as plan_hdf:
+        ds = mesh_cells_stability(plan_hdf, "TestMesh", threshold)
+        screened = mesh_cells_stability(plan_hdf, "TestMesh", threshold, prescreen=True)
+        with ScoreCache(tmp_path / "scores.sqlite") as cache:
+            chunked = mesh_cells_stability(
+                plan_hdf,
+                "TestMesh",
+                threshold,
+                chunk_size=20,
+                cache=cache,
+                prescreen=True,
+            )
+            assert len(cache) == 0
+    np.testing.assert_array_equal(screened[stable], ds[stable])
+    np.testing.assert_array_equal(~chunked[stable].values, expected["cells"])
+    scored = ~np.isnan(chunked[score].values)
+    np.testing.assert_array_equal(scored, expected["cells"])
+    np.testing.assert_allclose(
+        chunked[score].values[scored], ds[score].values[:48][scored], rtol=1e-12
+    )
+
+
+@pytest.mark.parametrize("chunk_kwargs", [{}, {"chunk_size": 30}])
+def test_mesh_faces_stability(plan_hdf_path, chunk_kwargs):
+    path, expected = plan_hdf_path
+    with RasPlanHdf(path) as plan_hdf:
+        ds = mesh_faces_stability(plan_hdf, "TestMesh", **chunk_kwargs)
+        gdf = mesh_faces_stability(
+            plan_hdf, "TestMesh", gdf=True, gdf_subset="unstable", **chunk_kwargs
+        )
+        flow = mesh_faces_stability(plan_hdf, "TestMesh", variables=["Face Flow"])
+        with pytest.raises(ValueError):
+            mesh_faces_stability(plan_hdf, "NoSuchMesh", **chunk_kwargs)
+    for var in ["Face Flow", "Face Velocity"]:
+        np.testing.assert_array_equal(~ds[f"{var} is Stable"].values, expected["faces"])
+    np.testing.assert_array_equal(
+        ds["Face Flow Stability Score"], flow["Face Flow Stability Score"]
+    )
+    assert "Face Velocity Stability Score" not in flow
+    np.testing.assert_array_equal(gdf["face_id"], np.flatnonzero(expected["faces"]))
+    assert (gdf.geometry.geom_type == "LineString").all()
+
+
+def test_cross_sections_stability(plan_hdf_path):
+    path, expected = plan_hdf_path
+    with RasPlanHdf(path) as plan_hdf:
+        ds = cross_sections_stability(plan_hdf)
+        chunked = cross_sections_stability(plan_hdf, max_memory=96 * 24 * 2)
+        gdf = cross_sections_stability(plan_hdf, gdf=True, prescreen=True)
+        flows = plan_hdf[
+            "Results/Unsteady/Output/Output Blocks/Base Output/Unsteady Time Series/"
+            "Cross Sections/Flow"
+        ][()]
+    np.testing.assert_array_equal(
+        ~ds["Flow is Stable"].values, expected["cross_sections"]
+    )
+    np.testing.assert_array_equal(
+        ds["Flow Stability Score"], hydrostab.stability_score(flows, axis=0)
+    )
+    np.testing.assert_array_equal(
+        chunked["Water Surface Stability Score"], ds["Water Surface Stability Score"]
+    )
+    assert list(ds["rs"].values) == ["1000", "900", "800", "700", "600"]
+    assert list(~gdf["flow_is_stable"]) == list(expected["cross_sections"])
+    assert (gdf.geometry.geom_type == "LineString").all()
+
+
+def test_cross_sections_stability_geometry_mismatch(plan_hdf_path):
+    path, _ = plan_hdf_path
+    with h5py.File(path, "r+") as hdf:
+        attrs = hdf["Geometry/Cross Sections/Attributes"][()]
+        del hdf["Geometry/Cross Sections/Attributes"]
+        hdf["Geometry/Cross Sections/Attributes"] = attrs[:-1]
+    with RasPlanHdf(path) as plan_hdf:
+        assert "rs" not in cross_sections_stability(plan_hdf).coords
+        with pytest.raises(ValueError):
+            cross_sections_stability(plan_hdf, gdf=True)
+
+
+def test_structures_stability(plan_hdf_path, tmp_path):
+    path, expected = plan_hdf_path
+    with RasPlanHdf(path) as plan_hdf:
+        ds = structures_stability(plan_hdf)
+        gdf = structures_stability(plan_hdf, gdf=True, start=10)
+        flow = structures_stability(plan_hdf, variables=["Total Flow", "Gate Opening"])
+        # One float32 structure per block
+        n_times = len(plan_hdf.unsteady_datetimes())
+        blocks = structures_stability(plan_hdf, max_memory=n_times * 24)
+        with ScoreCache(tmp_path / "scores.sqlite") as cache:
+            structures_stability(plan_hdf, cache=cache)
+            cached = structures_stability(plan_hdf, cache=cache)
+            assert len(cache) == 3
+    assert list(ds["structure_type"].values) == ["Inline", "Connection"]
+    assert list(ds["structure_name"].values) == ["Creek Upper 850", "Levee"]
+    assert list(ds["river"].values) == ["Creek", ""]
+    assert list(ds["rs"].values) == ["850", ""]
+    assert list(ds["connection"].values) == ["", "Levee"]
+    assert list(gdf["Type"]) == ["Inline", "Connection"]
+    for other in (blocks, cached):
+        np.testing.assert_array_equal(
+            other["Stage HW Stability Score"], ds["Stage HW Stability Score"]
+        )
+    for var in ["Total Flow", "Stage HW", "Stage TW"]:
+        np.testing.assert_array_equal(
+            ~ds[f"{var} is Stable"].values, expected["structures"]
+        )
+    assert list(~gdf["total_flow_is_stable"]) == list(expected["structures"])
+    assert gdf.geometry.notna().all()
+    assert "Gate Opening Stability Score" not in flow
+    np.testing.assert_array_equal(
+        flow["Total Flow Stability Score"], ds["Total Flow Stability Score"]
+    )
+
+
+def test_mesh_cells_stability_chunked_missing_mesh(plan_hdf_path):
+    path, _ = plan_hdf_path
+    with RasPlanHdf(path) as plan_hdf:
+        with pytest.raises(ValueError):
+            mesh_cells_stability(plan_hdf, "NoSuchMesh", chunk_size=10)
+
+
+def test_mesh_cells_stability_chunked_memory_budget(plan_hdf_path):
+    path, _ = plan_hdf_path
+    with RasPlanHdf(path) as plan_hdf:
+        dataset = _mesh_timeseries_dataset(plan_hdf, "TestMesh", "Water Surface")
+        # HDF5 chunks are 50 cells wide and each float32 cell costs 96 * 24 bytes
+        assert _score_bytes_per_value(dataset.dtype) == 24
+        assert _chunk_size(dataset, max_memory=96 * 24 * 3) == 3
+        assert _chunk_size(dataset, max_memory=96 * 24 * 40) == 40
+        assert _chunk_size(dataset, chunk_size=5) == 5
+        assert _chunk_size(dataset, chunk_size=5, max_memory=96 * 24 * 64) == 50
+        # A block covering every element is read at once, not chunk by chunk
+        n_values = dataset.shape[1]
+        assert _chunk_size(dataset, max_memory=10**12) == n_values
+        assert _chunk_size(dataset, chunk_size=n_values, max_memory=10**12) == n_values
+        assert _chunk_size(dataset, chunk_size=2 * n_values) == 2 * n_values
+        with pytest.raises(ValueError):
+            mesh_cells_stability(plan_hdf, "TestMesh", max_memory=1)
@@ -0,0 +1,69 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from pathlib import Path
+
+from hydrostab import StabilityAccumulator, stability_score
+
+
+HYDROGRAPHS = sorted(Path("tests/data/hydrographs").rglob("*.csv"))
+
+
+def test_accumulator_matches_stability_score():
+    for csv in HYDROGRAPHS:
+        flows = pd.read_csv(csv)["flow"].to_numpy()
+        acc = StabilityAccumulator()
+        for value in flows:
+            acc.update(value)
+        assert acc.score() == pytest.approx(stability_score(flows), rel=1e-9)
+
+
+def test_accumulator_vectorized_blocks():
+    rng = np.random.default_rng(0)
+    values = rng.normal(size=(200, 3, 5)).cumsum(axis=0)
+    expected = stability_score(values, axis=0)
+
+    acc = StabilityAccumulator(shape=(3, 5))
+    for t in range(values.shape[0]):
+        acc.update(values[t])
+    np.testing.assert_allclose(acc.score(), expected, rtol=1e-9)
+
+    acc = StabilityAccumulator(shape=(3, 5))
+    for start in [0, 1, 2, 50, 51, 130]:
+        stop = {0: 1, 1: 2, 2: 50, 50: 51, 51: 130, 130: 200}[start]
+        acc.extend(values[start:stop])
+    np.testing.assert_allclose(acc.score(), expected, rtol=1e-9)
+    is_stable, score = acc.stability()
+    np.testing.assert_array_equal(is_stable, score < 0.002)
+
+
+def test_accumulator_invalid_input():
+    acc = StabilityAccumulator(shape=3)
+    acc.update([1.0, 2.0, 3.0])
+    with pytest.raises(ValueError):
+        acc.score()
+    with pytest.raises(ValueError):
+        acc.update([1.0, np.nan, 3.0])
+    with pytest.raises(ValueError):
+        acc.update([1.0, 2.0])
+
+
+def test_accumulator_reused_buffer():
+    rng = np.random.default_rng(1)
+    values = rng.normal(size=(100, 4)).cumsum(axis=0)
+    expected = stability_score(values, axis=0)
+
+    acc = StabilityAccumulator(shape=np.int64(4))
+    buf = np.empty(4)
+    for t in range(values.shape[0]):
+        buf[:] = values[t]
+        acc.update(buf)
+    np.testing.assert_allclose(acc.score(), expected, rtol=1e-9)
+
+    acc = StabilityAccumulator(shape=(4,))
+    block = np.empty((10, 4))
+    for start in range(0, values.shape[0], 10):
+        block[:] = values[start : start + 10]
+        acc.extend(block)
+    np.testing.assert_allclose(acc.score(), expected, rtol=1e-9)